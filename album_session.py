@@ -0,0 +1,119 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from conversation_engine import ConversationCancelled
+from telemetry import TELEMETRY
+
+log = logging.getLogger(__name__)
+
+FIRST_PHOTO_INTRO = "Let's look through some of your photos together."
+NEXT_PHOTO_INTRO = "Here's another photo."
+
+
+class PhotoPlan:
+    """What was prefetched for one photo of the album: its prior memory and the lines that introduce it."""
+
+    def __init__(self, image_filename, memory, intro):
+        self.image_filename = image_filename
+        self.memory = memory
+        self.intro = intro
+
+
+class AlbumSession:
+    """
+    One patient, a playlist of photos, one conversation per photo. While a
+    photo is being discussed, the next `lookahead` photos are prepared on a
+    background thread: the viewer thumbnail (prefetch_image), the prior
+    memory for the photo, synthesized audio for its introduction and its
+    opening questions. So the step to the next photo only waits for work
+    that is already done.
+
+    Memories are saved as each conversation ends; their AI summaries are
+    collected and handed to the summary queue together when the album ends
+    (pending memories survive a crash and are resumed by the queue).
+    """
+
+    def __init__(self, agent, patient_name, images, on_photo=None, prefetch_image=None, lookahead=1):
+        self.agent = agent
+        self.patient_name = patient_name
+        self.images = list(images)
+        self.on_photo = on_photo or (lambda index, image_filename: None)
+        self.prefetch_image = prefetch_image
+        self.lookahead = lookahead
+        self.completed = []
+        self.transitions_ms = []
+        self.summary_jobs = []
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="album-prefetch")
+        self._plans = {}
+
+    def _plan(self, index):
+        image_filename = self.images[index]
+        if self.prefetch_image is not None:
+            try:
+                self.prefetch_image(image_filename)
+            except Exception as e:
+                log.warning(f"⚠️ Could not prefetch {image_filename}: {e}")
+        memory = self.agent.lookup_memory(self.patient_name, image_filename)
+        intro = self._intro(index, memory)
+        # Prefetching only saves time; if it fails the intro and questions are produced live
+        try:
+            self.agent.prefetch_speech(intro)
+            self.agent.prefetch_questions(self.patient_name, image_filename, memory[0] if memory else None)
+        except Exception as e:
+            log.warning(f"⚠️ Could not prepare {image_filename} ahead: {e}")
+        return PhotoPlan(image_filename, memory, intro)
+
+    @staticmethod
+    def _intro(index, memory):
+        intro = [FIRST_PHOTO_INTRO if index == 0 else NEXT_PHOTO_INTRO]
+        if memory is not None:
+            intro.append(f"Last time, you told me this about it. {memory[0]}")
+        return intro
+
+    def _take_plan(self, index):
+        try:
+            return self._plans.pop(index).result()
+        except Exception as e:
+            log.warning(f"⚠️ Prefetch for {self.images[index]} failed: {e}")
+            return PhotoPlan(self.images[index], None, self._intro(index, None))
+
+    def _prefetch(self, index):
+        for ahead in range(index, min(index + 1 + self.lookahead, len(self.images))):
+            if ahead not in self._plans:
+                self._plans[ahead] = self._pool.submit(self._plan, ahead)
+
+    def defer_summary(self, patient_name, image_filename, conversation_id, responses):
+        self.summary_jobs.append((patient_name, image_filename, conversation_id, list(responses)))
+
+    def run(self):
+        """Walk the playlist; returns the conversation ids, stopping early if the patient cancels."""
+        transition_start = time.perf_counter()
+        try:
+            for index, image_filename in enumerate(self.images):
+                self._prefetch(index)
+                plan = self._take_plan(index)
+                self.on_photo(index, image_filename)
+                # From the end of one conversation until the next photo starts being introduced
+                elapsed = (time.perf_counter() - transition_start) * 1000
+                self.transitions_ms.append(elapsed)
+                TELEMETRY.record("album_transition", elapsed)
+                for line in plan.intro:
+                    self.agent.speak(line)
+                conversation_id = self.agent.start_conversation(self.patient_name, image_filename)
+                if conversation_id is not None:
+                    self.completed.append(conversation_id)
+                transition_start = time.perf_counter()
+        except ConversationCancelled:
+            log.info("Album session stopped")
+            self.agent.cancel_event.clear()
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._flush_summaries()
+        return self.completed
+
+    def _flush_summaries(self):
+        jobs, self.summary_jobs = self.summary_jobs, []
+        if jobs:
+            self.agent.summary_jobs.submit_many(jobs)
+            log.info(f"📝 Queued {len(jobs)} album summaries")
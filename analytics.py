@@ -0,0 +1,464 @@
+import functools
+import importlib.util
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+from startup import lazy_import
+
+log = logging.getLogger(__name__)
+
+if importlib.util.find_spec("pyarrow") is not None:
+    pa = lazy_import("pyarrow")
+    pq = lazy_import("pyarrow.parquet")
+else:
+    pa = pq = None
+
+# How a conversation ended, from the engine's final state
+OUTCOMES = ("done", "skipped", "cancelled", "failed")
+
+# Rollup rows under this patient name hold the totals across all patients
+ALL_PATIENTS = ""
+
+TURN_COLUMNS = [
+    "id", "conversation_id", "patient_name", "image_filename", "turn", "ts", "date",
+    "state", "prompt", "response", "emotion", "turn_ms",
+]
+
+
+@functools.lru_cache(maxsize=4096)
+def iso_week(date):
+    """'2026-W42' for a 'YYYY-MM-DD' date, the bucket weekly rollups use."""
+    year, week, _ = datetime.strptime(date, "%Y-%m-%d").isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class TurnRecorder:
+    """
+    Collects one conversation's per-turn events from the engine's on_event
+    port: the prompt just spoken, the reply heard in answer, its emotion and
+    how long the turn took from prompt to recognized reply.
+    """
+
+    def __init__(self, patient_name, image_filename, conversation_id):
+        self.patient_name = patient_name
+        self.image_filename = image_filename
+        self.conversation_id = conversation_id
+        self.started_at = datetime.now()
+        self.turns = []
+        self.skip_emotion = None
+        self._prompt = None
+        self._prompt_at = None
+        self._last_emotion = None
+
+    def on_event(self, kind, **data):
+        if kind == "say":
+            self._prompt = data["text"]
+            self._prompt_at = time.perf_counter()
+        elif kind == "hear":
+            now = time.perf_counter()
+            self.turns.append({
+                "turn": len(self.turns),
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "state": data.get("state"),
+                "prompt": self._prompt,
+                "response": data["text"],
+                "emotion": None,
+                "turn_ms": round((now - self._prompt_at) * 1000, 1) if self._prompt_at is not None else None,
+            })
+        elif kind == "emotion" and self.turns:
+            self.turns[-1]["emotion"] = data["emotion"]
+            self._last_emotion = data["emotion"]
+        elif kind == "state" and data.get("state") == "skipped":
+            # The emotion that led to the "difficult feeling" check the patient skipped from
+            self.skip_emotion = self._last_emotion
+
+    def conversation(self, outcome, responses):
+        date = self.started_at.strftime("%Y-%m-%d")
+        return {
+            "conversation_id": self.conversation_id,
+            "patient_name": self.patient_name,
+            "image_filename": self.image_filename,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "date": date,
+            "week": iso_week(date),
+            "turns": len(self.turns),
+            "responses": responses,
+            "outcome": outcome,
+            "skip_emotion": self.skip_emotion if outcome == "skipped" else None,
+        }
+
+
+class ConversationLog:
+    """
+    Append-only log of conversations and their turns in SQLite, with rollup
+    tables updated in the same transaction as each insert: sessions and
+    responses per patient per week, emotions per patient per day and week,
+    and outcomes per photo (with the emotion behind a skip). Weekly and
+    emotion rollups also keep an all-patients row, so reports read a few
+    hundred rows at most however many turns are logged.
+    export_parquet() copies new turns to date/patient-partitioned Parquet
+    for analysis elsewhere (needs pyarrow).
+    """
+
+    def __init__(self, db_file="conversation_log.db"):
+        self.db_file = str(db_file)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                conversation_id TEXT PRIMARY KEY,
+                patient_name TEXT NOT NULL,
+                image_filename TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                date TEXT NOT NULL,
+                week TEXT NOT NULL,
+                turns INTEGER NOT NULL,
+                responses INTEGER NOT NULL,
+                outcome TEXT NOT NULL,
+                skip_emotion TEXT
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                patient_name TEXT NOT NULL,
+                image_filename TEXT NOT NULL,
+                turn INTEGER NOT NULL,
+                ts TEXT NOT NULL,
+                date TEXT NOT NULL,
+                state TEXT,
+                prompt TEXT,
+                response TEXT,
+                emotion TEXT,
+                turn_ms REAL
+            );
+            CREATE INDEX IF NOT EXISTS turns_conversation ON turns (conversation_id);
+            CREATE TABLE IF NOT EXISTS rollup_weekly (
+                patient_name TEXT NOT NULL,
+                week TEXT NOT NULL,
+                sessions INTEGER NOT NULL,
+                turns INTEGER NOT NULL,
+                responses INTEGER NOT NULL,
+                PRIMARY KEY (patient_name, week)
+            );
+            CREATE TABLE IF NOT EXISTS rollup_emotions (
+                grain TEXT NOT NULL,
+                period TEXT NOT NULL,
+                patient_name TEXT NOT NULL,
+                emotion TEXT NOT NULL,
+                turns INTEGER NOT NULL,
+                PRIMARY KEY (grain, patient_name, period, emotion)
+            );
+            CREATE TABLE IF NOT EXISTS rollup_photos (
+                image_filename TEXT NOT NULL,
+                patient_name TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                emotion TEXT NOT NULL,
+                sessions INTEGER NOT NULL,
+                PRIMARY KEY (image_filename, patient_name, outcome, emotion)
+            );
+            CREATE INDEX IF NOT EXISTS rollup_photos_outcome ON rollup_photos (outcome, emotion, sessions);
+            CREATE TABLE IF NOT EXISTS export_state (
+                target TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def record(self, conversation, turns):
+        """Log a finished conversation (TurnRecorder.conversation()) and its turns, updating the rollups."""
+        self.record_many([(conversation, turns)])
+
+    def record_many(self, conversations):
+        with self._lock, self._conn:
+            for conversation, turns in conversations:
+                self._insert(conversation, turns)
+
+    def _insert(self, c, turns):
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO conversations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (c["conversation_id"], c["patient_name"], c["image_filename"], c["started_at"], c["date"],
+             c["week"], c["turns"], c["responses"], c["outcome"], c["skip_emotion"]),
+        )
+        if not cursor.rowcount:
+            return
+        self._conn.executemany(
+            "INSERT INTO turns (conversation_id, patient_name, image_filename, turn, ts, date, state, prompt, "
+            "response, emotion, turn_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(c["conversation_id"], c["patient_name"], c["image_filename"], t["turn"], t["ts"], t["ts"][:10],
+              t["state"], t["prompt"], t["response"], t["emotion"], t["turn_ms"]) for t in turns],
+        )
+        self._roll_up(c, turns)
+
+    def _roll_up(self, c, turns):
+        self._conn.executemany(
+            "INSERT INTO rollup_weekly VALUES (?, ?, 1, ?, ?) ON CONFLICT (patient_name, week) DO UPDATE SET "
+            "sessions = sessions + 1, turns = turns + excluded.turns, responses = responses + excluded.responses",
+            [(patient, c["week"], c["turns"], c["responses"]) for patient in (c["patient_name"], ALL_PATIENTS)],
+        )
+        emotions = {}
+        for t in turns:
+            if t["emotion"]:
+                date = t["ts"][:10]
+                for grain, period in (("day", date), ("week", iso_week(date))):
+                    for patient in (c["patient_name"], ALL_PATIENTS):
+                        key = (grain, period, patient, t["emotion"])
+                        emotions[key] = emotions.get(key, 0) + 1
+        self._conn.executemany(
+            "INSERT INTO rollup_emotions VALUES (?, ?, ?, ?, ?) ON CONFLICT (grain, patient_name, period, emotion) "
+            "DO UPDATE SET turns = turns + excluded.turns",
+            [key + (count,) for key, count in emotions.items()],
+        )
+        self._conn.execute(
+            "INSERT INTO rollup_photos VALUES (?, ?, ?, ?, 1) ON CONFLICT (image_filename, patient_name, "
+            "outcome, emotion) DO UPDATE SET sessions = sessions + 1",
+            (c["image_filename"], c["patient_name"], c["outcome"], c["skip_emotion"] or ""),
+        )
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from the logged turns (after editing or deleting history by hand)."""
+        with self._lock, self._conn:
+            for table in ("rollup_weekly", "rollup_emotions", "rollup_photos"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("""
+                INSERT INTO rollup_weekly
+                SELECT patient_name, week, COUNT(*), SUM(turns), SUM(responses)
+                FROM conversations GROUP BY patient_name, week
+            """)
+            self._conn.execute("""
+                INSERT INTO rollup_weekly
+                SELECT ?, week, SUM(sessions), SUM(turns), SUM(responses)
+                FROM rollup_weekly GROUP BY week
+            """, (ALL_PATIENTS,))
+            self._conn.execute("""
+                INSERT INTO rollup_emotions
+                SELECT 'day', date, patient_name, emotion, COUNT(*) FROM turns
+                WHERE emotion IS NOT NULL GROUP BY date, patient_name, emotion
+            """)
+            days = self._conn.execute(
+                "SELECT period, patient_name, emotion, turns FROM rollup_emotions WHERE grain = 'day'"
+            ).fetchall()
+            totals = {}
+            for date, patient, emotion, turns in days:
+                for grain, period in (("day", date), ("week", iso_week(date))):
+                    for key in ((grain, period, ALL_PATIENTS, emotion),) + (
+                            ((grain, period, patient, emotion),) if grain == "week" else ()):
+                        totals[key] = totals.get(key, 0) + turns
+            self._conn.executemany(
+                "INSERT INTO rollup_emotions VALUES (?, ?, ?, ?, ?)", [key + (n,) for key, n in totals.items()]
+            )
+            self._conn.execute("""
+                INSERT INTO rollup_photos
+                SELECT image_filename, patient_name, outcome, COALESCE(skip_emotion, ''), COUNT(*)
+                FROM conversations GROUP BY image_filename, patient_name, outcome, COALESCE(skip_emotion, '')
+            """)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def sessions_per_week(self, patient_name=None):
+        """[(week, sessions)] for one patient, or for all patients together, oldest week first."""
+        return self._query(
+            "SELECT week, sessions FROM rollup_weekly WHERE patient_name = ? ORDER BY week",
+            (patient_name or ALL_PATIENTS,),
+        )
+
+    def sessions_by_patient(self, week):
+        """[(patient_name, sessions)] in one ISO week, busiest first."""
+        return self._query(
+            "SELECT patient_name, sessions FROM rollup_weekly WHERE week = ? AND patient_name != ? "
+            "ORDER BY sessions DESC, patient_name",
+            (week, ALL_PATIENTS),
+        )
+
+    def emotion_distribution(self, patient_name=None, start=None, end=None, period="week"):
+        """{period: {emotion: turns}} for 'day' or ISO 'week' periods, optionally for one patient and date range."""
+        if period not in ("day", "week"):
+            raise ValueError(f"Unknown period '{period}'")
+        sql = "SELECT period, emotion, turns FROM rollup_emotions WHERE grain = ? AND patient_name = ?"
+        params = [period, patient_name or ALL_PATIENTS]
+        if start:
+            sql += " AND period >= ?"
+            params.append(start if period == "day" else iso_week(start))
+        if end:
+            sql += " AND period <= ?"
+            params.append(end if period == "day" else iso_week(end))
+        distribution = {}
+        for key, emotion, turns in self._query(sql + " ORDER BY period", params):
+            distribution.setdefault(key, {})[emotion] = turns
+        return distribution
+
+    def average_responses(self, patient_name=None):
+        """Mean number of responses kept per session."""
+        responses, sessions = self._query(
+            "SELECT SUM(responses), SUM(sessions) FROM rollup_weekly WHERE patient_name = ?",
+            (patient_name or ALL_PATIENTS,),
+        )[0]
+        return responses / sessions if sessions else 0.0
+
+    def skip_triggers(self, emotion="sad", patient_name=None, limit=10):
+        """Photos most often skipped after the given emotion: [(image_filename, patient_name, sessions)]."""
+        sql = "SELECT image_filename, patient_name, sessions FROM rollup_photos WHERE outcome = 'skipped' AND emotion = ?"
+        params = [emotion]
+        if patient_name:
+            sql += " AND patient_name = ?"
+            params.append(patient_name)
+        return self._query(sql + " ORDER BY sessions DESC, image_filename LIMIT ?", params + [limit])
+
+    def report(self, patient_name=None):
+        return {
+            "sessions_per_week": self.sessions_per_week(patient_name),
+            "emotions_per_week": self.emotion_distribution(patient_name),
+            "average_responses": round(self.average_responses(patient_name), 2),
+            "sad_skips": self.skip_triggers("sad", patient_name),
+        }
+
+    def turn_count(self):
+        return self._query("SELECT COUNT(*) FROM turns")[0][0]
+
+    def export_parquet(self, out_dir, batch_size=200_000):
+        """
+        Append turns logged since the last export to `out_dir` as Hive-style
+        partitions (date=YYYY-MM-DD/patient=NAME/part-<first id>.parquet),
+        readable with pyarrow.dataset, DuckDB or pandas. Each batch's files are
+        written atomically before the export position moves, and a re-run of
+        an interrupted batch overwrites the same files. Returns turns exported.
+        """
+        if pq is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        out_dir = Path(out_dir)
+        target = str(out_dir.resolve())
+        exported = 0
+        while True:
+            with self._lock:
+                row = self._conn.execute("SELECT last_id FROM export_state WHERE target = ?", (target,)).fetchone()
+                last_id = row[0] if row else 0
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(TURN_COLUMNS)} FROM turns WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return exported
+            partitions = {}
+            for row in rows:
+                partitions.setdefault((row[6], row[2]), []).append(row)
+            for (date, patient_name), part in partitions.items():
+                directory = out_dir / f"date={date}" / f"patient={quote(patient_name, safe='')}"
+                directory.mkdir(parents=True, exist_ok=True)
+                columns = {name: [r[i] for r in part] for i, name in enumerate(TURN_COLUMNS)}
+                table = pa.table({name: values for name, values in columns.items() if name not in ("date", "patient_name")})
+                path = directory / f"part-{part[0][0]:012d}.parquet"
+                tmp_path = directory / f".partial_{path.name}"
+                pq.write_table(table, tmp_path, compression="zstd")
+                os.replace(tmp_path, path)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO export_state VALUES (?, ?) ON CONFLICT (target) DO UPDATE SET last_id = excluded.last_id",
+                    (target, rows[-1][0]),
+                )
+            exported += len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _synthetic_conversations(count, seed=11):
+    import random
+    import uuid
+    from datetime import timedelta
+
+    rng = random.Random(seed)
+    emotions = ["neutral"] * 6 + ["happy"] * 3 + ["sad", "angry", "fear"]
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        patient = f"patient-{rng.randrange(200):03d}"
+        image = f"photo-{rng.randrange(400):03d}.jpg"
+        started = start + timedelta(minutes=rng.randrange(60 * 24 * 365))
+        recorder = TurnRecorder(patient, image, str(uuid.UUID(int=rng.getrandbits(128))))
+        recorder.started_at = started
+        outcome = "done"
+        for turn in range(rng.randint(3, 8)):
+            emotion = rng.choice(emotions)
+            recorder.turns.append({
+                "turn": turn, "ts": (started + timedelta(seconds=20 * turn)).isoformat(timespec="milliseconds"),
+                "state": "answer", "prompt": "Tell me about this photo", "response": f"reply {turn}",
+                "emotion": emotion, "turn_ms": rng.uniform(2000, 15000),
+            })
+            if emotion == "sad" and rng.random() < 0.3:
+                outcome, recorder.skip_emotion = "skipped", emotion
+                break
+        yield recorder.conversation(outcome, len(recorder.turns)), recorder.turns
+
+
+def benchmark(turns=1_000_000, db_file=None, repeat=50):
+    """Log ~`turns` synthetic turns, then time each report and (with pyarrow) the Parquet export."""
+    import tempfile
+
+    workdir = tempfile.mkdtemp(prefix="meemo_analytics_")
+    conversation_log = ConversationLog(db_file or os.path.join(workdir, "conversation_log.db"))
+    start = time.perf_counter()
+    batch = []
+    for conversation, conversation_turns in _synthetic_conversations(turns // 5):
+        batch.append((conversation, conversation_turns))
+        if len(batch) == 1000:
+            conversation_log.record_many(batch)
+            batch = []
+    conversation_log.record_many(batch)
+    logged = conversation_log.turn_count()
+    elapsed = time.perf_counter() - start
+    print(f"Logged {logged} turns in {elapsed:.1f}s ({logged / elapsed:.0f} turns/s, rollups included)")
+
+    start = time.perf_counter()
+    conversation_log.record(*next(_synthetic_conversations(1, seed=99)))
+    print(f"One conversation logged in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    reports = {
+        "sessions per week": lambda: conversation_log.sessions_per_week(),
+        "sessions by patient, one week": lambda: conversation_log.sessions_by_patient("2025-W10"),
+        "weekly emotions, one patient": lambda: conversation_log.emotion_distribution("patient-042"),
+        "weekly emotions, all": lambda: conversation_log.emotion_distribution(),
+        "average responses": lambda: conversation_log.average_responses(),
+        "sad skip photos": lambda: conversation_log.skip_triggers("sad"),
+    }
+    for name, report in reports.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            report()
+        print(f"{name:30s} {(time.perf_counter() - start) / repeat * 1000:7.2f} ms")
+    start = time.perf_counter()
+    with conversation_log._lock:
+        conversation_log._conn.execute(
+            "SELECT substr(date, 1, 7), emotion, COUNT(*) FROM turns GROUP BY 1, 2").fetchall()
+    print(f"{'(same from raw turns)':30s} {(time.perf_counter() - start) * 1000:7.2f} ms")
+
+    if pq is not None:
+        start = time.perf_counter()
+        exported = conversation_log.export_parquet(os.path.join(workdir, "turns"))
+        print(f"Exported {exported} turns to Parquet in {time.perf_counter() - start:.1f}s")
+    else:
+        print("pyarrow not installed: Parquet export skipped")
+    conversation_log.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "report"
+    if command == "benchmark":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    elif command == "export":
+        out = sys.argv[2] if len(sys.argv) > 2 else "analytics"
+        print(f"Exported {ConversationLog().export_parquet(out)} new turns to {out}/")
+    else:
+        import json
+
+        print(json.dumps(ConversationLog().report(sys.argv[2] if len(sys.argv) > 2 else None), indent=2))
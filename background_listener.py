@@ -0,0 +1,159 @@
+import logging
+import queue
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from startup import lazy_import
+
+log = logging.getLogger(__name__)
+
+sr = lazy_import("speech_recognition")
+
+
+def _duration(audio):
+    """Length in seconds of captured AudioData (raw frames at sample_rate * sample_width bytes per second)."""
+    return len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+
+
+class TurnTimer:
+    """Per-turn latency marks for the conversation loop, so serial and background capture can be compared."""
+
+    def __init__(self):
+        self.turns = []
+        self._current = None
+        self._lock = threading.Lock()
+
+    def mark(self, name, at=None):
+        at = at if at is not None else time.perf_counter()
+        with self._lock:
+            if name == "prompt_start" and self._current is not None and "prompt_end" in self._current:
+                if "speech_end" in self._current:
+                    self._current["next_prompt_start"] = at
+                self._current = None
+            if self._current is None:
+                self._current = {}
+                self.turns.append(self._current)
+            self._current.setdefault(name, at)
+
+    def summary(self):
+        spans = {
+            "prompt_ms": ("prompt_start", "prompt_end"),
+            "capture_wait_ms": ("prompt_end", "speech_end"),
+            "recognition_ms": ("speech_end", "recognized"),
+            "turnaround_ms": ("speech_end", "next_prompt_start"),
+        }
+        rows = []
+        for index, turn in enumerate(self.turns):
+            row = {"turn": index}
+            for label, (start, end) in spans.items():
+                if start in turn and end in turn:
+                    row[label] = round((turn[end] - turn[start]) * 1000, 1)
+            rows.append(row)
+        return rows
+
+    def report(self):
+        rows = self.summary()
+        for label in ("prompt_ms", "capture_wait_ms", "recognition_ms", "turnaround_ms"):
+            values = [row[label] for row in rows if label in row]
+            if values:
+                log.info(f"⏱️ {label}: mean {statistics.mean(values):.0f} ms, max {max(values):.0f} ms over {len(values)} turns")
+        return rows
+
+
+class BackgroundListener:
+    """
+    Keeps the microphone hot for the whole conversation using
+    Recognizer.listen_in_background. Each captured phrase is recognized on a
+    thread pool as soon as it ends, so recognition overlaps with whatever the
+    conversation loop is doing next. With barge_in enabled, speech captured
+    while the AI is talking stops playback; otherwise it is discarded as echo.
+    A phrase counts as captured during playback if it started before the
+    playback ended (plus echo_margin seconds), even when it ends after it,
+    so the tail of the AI's own question is not taken as the patient's answer.
+    """
+
+    def __init__(self, recognizer, microphone, recognize=None, workers=2,
+                 phrase_time_limit=15, barge_in=True, timer=None, analyze=None, echo_margin=0.3):
+        self.recognizer = recognizer
+        self.microphone = microphone
+        self.recognize = recognize or recognizer.recognize_google
+        self.phrase_time_limit = phrase_time_limit
+        self.barge_in = barge_in
+        self.echo_margin = echo_margin
+        self.timer = timer
+        # Optional analysis started on each phrase alongside recognition (returns a Future)
+        self.analyze = analyze
+        self.last_acoustic = None
+        self.last_recognition_ms = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stt")
+        self._results = queue.Queue()
+        self._stopper = None
+        self._playback = None
+        self._lock = threading.Lock()
+        self.barge_ins = 0
+
+    @property
+    def running(self):
+        return self._stopper is not None
+
+    def start(self):
+        if self._stopper is None:
+            self._stopper = self.recognizer.listen_in_background(
+                self.microphone, self._on_phrase, phrase_time_limit=self.phrase_time_limit
+            )
+
+    def stop(self):
+        if self._stopper is not None:
+            self._stopper(wait_for_stop=False)
+            self._stopper = None
+
+    def set_playback(self, handle):
+        with self._lock:
+            self._playback = handle
+
+    def _on_phrase(self, recognizer, audio):
+        captured_at = time.perf_counter()
+        with self._lock:
+            playback = self._playback
+        if playback is not None and not playback.done:
+            if not self.barge_in:
+                return
+            self.barge_ins += 1
+            playback.cancel()
+            log.info("✋ Patient started speaking - stopping playback")
+        elif playback is not None and not self.barge_in and playback.finished_at is not None:
+            # Playback ended before this phrase did; drop it if it started while playback (or its echo) was audible
+            if captured_at - _duration(audio) < playback.finished_at + self.echo_margin:
+                log.debug("🎤 Dropped a phrase that started during playback (echo)")
+                return
+        acoustic = self.analyze(audio) if self.analyze is not None else None
+        self._results.put((self._pool.submit(self._transcribe, audio, captured_at), acoustic))
+
+    def _transcribe(self, audio, captured_at):
+        try:
+            text = self.recognize(audio)
+        except sr.UnknownValueError:
+            text = "UNCLEAR"
+        except Exception as e:
+            log.warning(f"🎤 Speech error: {e}")
+            text = "ERROR"
+        return text, captured_at, time.perf_counter()
+
+    def next_utterance(self, timeout=30):
+        self.last_acoustic = None
+        try:
+            future, self.last_acoustic = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return "TIMEOUT"
+        text, captured_at, recognized_at = future.result()
+        self.last_recognition_ms = (recognized_at - captured_at) * 1000
+        if self.timer is not None:
+            self.timer.mark("speech_end", captured_at)
+            self.timer.mark("recognized", recognized_at)
+        return text
+
+    def shutdown(self):
+        self.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
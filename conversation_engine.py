@@ -0,0 +1,357 @@
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from intent_classifier import DEFAULT_CLASSIFIER
+
+log = logging.getLogger(__name__)
+
+
+class ConversationCancelled(Exception):
+    pass
+
+
+class EndpointClosed(ConversationCancelled):
+    """The audio source has nothing more to give (end of a recorded script or a closed socket)."""
+
+
+DEFAULT_QUESTIONS = [
+    "Tell me, what do you see in this photo? Take your time.",
+    "That's wonderful. Can you tell me more about what you remember from this moment?",
+    "Thank you for sharing that. What feelings does this photo bring up for you?"
+]
+
+DIFFICULT_EMOTIONS = ["sad", "angry", "fear", "frustrated"]
+
+LISTEN_STATUSES = ("TIMEOUT", "UNCLEAR", "ERROR")
+
+# Conversation states
+GREETING = "greeting"
+QUESTION = "question"
+ANSWER = "answer"
+EMOTION_CHECK = "emotion_check"
+MORE_OR_SAVE = "more_or_save"
+TELL_MORE = "tell_more"
+CONTINUE_OR_SAVE = "continue_or_save"
+SUMMARIZE = "summarize"
+PERSIST = "persist"
+SKIPPED = "skipped"
+DONE = "done"
+
+
+def is_stop(text):
+    return DEFAULT_CLASSIFIER.is_stop(text)
+
+
+def detect_text_emotion(speech_text):
+    return DEFAULT_CLASSIFIER.emotion(speech_text)
+
+
+class ConversationPorts:
+    """
+    Everything the dialogue needs from the outside world. The agent wires
+    these to its speakers, microphone and memory store; the headless runner
+    wires them to scripts and in-memory recorders. `ask(index, responses)`
+    picks each question; without it the engine's fixed list is used.
+    """
+
+    def __init__(self, speak, listen, detect_emotion, persist, on_event=None, ask=None):
+        self.speak = speak
+        self.listen = listen
+        self.detect_emotion = detect_emotion
+        self.persist = persist
+        self.on_event = on_event or (lambda kind, **data: None)
+        self.ask = ask
+
+
+class ConversationEngine:
+    """
+    The photo conversation as an explicit state machine:
+    greeting -> question N -> answer (-> emotion check) -> ... -> more/save
+    -> tell more -> summarize -> persist. Each state handler does its I/O
+    through the ports and returns the next state.
+    """
+
+    def __init__(self, patient_name, image_filename, ports, questions, max_responses=3, listen_timeout=30):
+        self.patient_name = patient_name
+        self.image_filename = image_filename
+        self.ports = ports
+        self.questions = questions
+        self.max_responses = max_responses
+        self.listen_timeout = listen_timeout
+        self.conversation_id = str(uuid.uuid4())
+        self.responses = []
+        self.question_index = 0
+        self.meaningful_responses = 0
+        self.difficult_acknowledged = False
+        self.pending_response = None
+        self.state = GREETING
+        self.saved = False
+        self._handlers = {
+            GREETING: self._greeting,
+            QUESTION: self._question,
+            ANSWER: self._answer,
+            EMOTION_CHECK: self._emotion_check,
+            MORE_OR_SAVE: self._more_or_save,
+            TELL_MORE: self._tell_more,
+            CONTINUE_OR_SAVE: self._continue_or_save,
+            SUMMARIZE: self._summarize,
+            PERSIST: self._persist,
+        }
+
+    def _say(self, text):
+        self.ports.on_event("say", text=text, state=self.state)
+        self.ports.speak(text)
+
+    def _add_response(self, response):
+        self.responses.append(response)
+        self.ports.on_event("response", text=response, index=len(self.responses) - 1)
+
+    def _hear(self):
+        text = self.ports.listen(timeout=self.listen_timeout)
+        self.ports.on_event("hear", text=text, state=self.state)
+        return text
+
+    def run(self):
+        log.info(f"Starting conversation about {self.image_filename} with {self.patient_name}")
+        while self.state not in (DONE, SKIPPED):
+            self.ports.on_event("state", state=self.state)
+            self.state = self._handlers[self.state]()
+        self.ports.on_event("state", state=self.state)
+        log.info("Conversation completed!")
+        return self.conversation_id
+
+    def _greeting(self):
+        self._say("I'd love to hear about this photo")
+        return QUESTION
+
+    def _question(self):
+        if self.ports.ask is None:
+            question = self.questions[self.question_index]
+        else:
+            question = self.ports.ask(self.question_index, list(self.responses))
+        self._say(question)
+        self.question_index += 1
+        return ANSWER
+
+    def _answer(self):
+        response = self._hear()
+        if response == "TIMEOUT":
+            self._say("I'm here whenever you're ready. Take all the time you need.")
+            return ANSWER
+        if response == "UNCLEAR":
+            self._say("I didn't quite catch that. Could you repeat it for me?")
+            return ANSWER
+        if response == "ERROR":
+            self._say("Let me try listening again. Please go ahead.")
+            return ANSWER
+
+        emotion = self.ports.detect_emotion(response)
+        self.ports.on_event("emotion", text=response, emotion=emotion)
+        log.debug(f"Detected speech emotion: {emotion}")
+        self.pending_response = response
+        if emotion in DIFFICULT_EMOTIONS and not self.difficult_acknowledged:
+            return EMOTION_CHECK
+        if emotion == "happy":
+            self._say("It's lovely to hear you're feeling happy!")
+        return self._record_answer()
+
+    def _emotion_check(self):
+        self._say("I notice this might be a difficult feeling. It's okay to take your time or skip if you want. Say 'skip' to move on or continue sharing.")
+        if is_stop(self._hear()):
+            self._say("Okay, I understand. We won't save this memory. Thank you for sharing with me today. Take care!")
+            log.info("User chose to skip and not save")
+            return SKIPPED
+        self.difficult_acknowledged = True
+        self._say("Thank you for continuing to share.")
+        return self._record_answer()
+
+    def _record_answer(self):
+        response, self.pending_response = self.pending_response, None
+        self._add_response(response)
+        self.meaningful_responses += 1
+        log.debug(f"Meaningful responses collected: {self.meaningful_responses}/{self.max_responses}")
+        if is_stop(response):
+            log.info("Patient wants to end conversation")
+            return SUMMARIZE
+        if self.meaningful_responses >= self.max_responses:
+            return MORE_OR_SAVE
+        if self.question_index < len(self.questions):
+            return QUESTION
+        return ANSWER
+
+    def _more_or_save(self):
+        self._say("Do you want to tell me more about the photo, or should I save what you've shared?")
+        if is_stop(self._hear()):
+            self._say("Okay, I'll save your memories now.")
+            return SUMMARIZE
+        self._say("Okay, please go ahead and tell me more.")
+        return TELL_MORE
+
+    def _tell_more(self):
+        response = self._hear()
+        if response in LISTEN_STATUSES:
+            self._say("I'm here whenever you're ready.")
+            return TELL_MORE
+        if is_stop(response):
+            self._say("Thanks for sharing more. I'll save your memories now.")
+            return SUMMARIZE
+        self._add_response(response)
+        return CONTINUE_OR_SAVE
+
+    def _continue_or_save(self):
+        self._say("Do you want to share more or should I save?")
+        if is_stop(self._hear()):
+            self._say("Thanks for sharing. I'll save your memories now.")
+            return SUMMARIZE
+        self._say("Okay, please continue.")
+        return TELL_MORE
+
+    def _summarize(self):
+        # The summary itself is produced by the persist port (queued in the background)
+        self.ports.on_event("summarize", responses=list(self.responses))
+        return PERSIST
+
+    def _persist(self):
+        self.saved = self.ports.persist(
+            self.patient_name, self.image_filename, self.conversation_id, list(self.responses)
+        )
+        self._say("Thank you for sharing those wonderful memories with me. I'll save them so we can remember together.")
+        return DONE
+
+
+class ScriptedPorts(ConversationPorts):
+    """
+    Ports for headless runs: replies come from a script of strings (or
+    TIMEOUT / UNCLEAR / ERROR), spoken prompts and events are recorded, and
+    persisted conversations are collected in memory unless `persist` is given.
+    """
+
+    def __init__(self, script, detect_emotion, persist=None, ask=None):
+        self.script = list(script)
+        self.position = 0
+        self.events = []
+        self.saved = []
+        super().__init__(
+            speak=lambda text: None,
+            listen=self._listen,
+            detect_emotion=detect_emotion,
+            persist=persist or self._collect,
+            on_event=self._record,
+            ask=ask,
+        )
+
+    def _listen(self, timeout=30):
+        if self.position >= len(self.script):
+            raise EndpointClosed("script finished")
+        reply = self.script[self.position]
+        self.position += 1
+        return reply
+
+    def _record(self, kind, **data):
+        self.events.append((kind, data))
+
+    def _collect(self, patient_name, image_filename, conversation_id, responses):
+        self.saved.append({
+            "patient_name": patient_name,
+            "image_filename": image_filename,
+            "conversation_id": conversation_id,
+            "responses": responses,
+        })
+        return True
+
+    @property
+    def spoken(self):
+        return [data["text"] for kind, data in self.events if kind == "say"]
+
+
+class HeadlessRunner:
+    """
+    Replays scripted sessions through ConversationEngine with no Tk, mic or
+    speakers, for regression and throughput testing. Scripts are lists of
+    patient replies; WAV transcripts can be fed in via stt_engines.FakeEngine.
+    `ask_for(patient_name, image_filename)` returns the ask port for a session.
+    """
+
+    def __init__(self, questions=None, detect_emotion=detect_text_emotion, persist=None, workers=1, ask_for=None):
+        self.questions = questions or DEFAULT_QUESTIONS
+        self.detect_emotion = detect_emotion
+        self.persist = persist
+        self.workers = workers
+        self.ask_for = ask_for
+
+    @staticmethod
+    def script_from_wavs(wav_paths, engine):
+        """Turn recorded WAV replies into a text script using a speech engine (e.g. FakeEngine)."""
+        from stt_engines import load_wav
+        return engine.transcribe_batch([load_wav(path) for path in wav_paths])
+
+    def run(self, script, patient_name="patient", image_filename="photo.jpg"):
+        ask = self.ask_for(patient_name, image_filename) if self.ask_for else None
+        ports = ScriptedPorts(script, self.detect_emotion, persist=self.persist, ask=ask)
+        engine = ConversationEngine(patient_name, image_filename, ports, self.questions)
+        result = {"patient_name": patient_name, "image_filename": image_filename, "error": None}
+        try:
+            engine.run()
+        except Exception as e:
+            result["error"] = e
+        result.update(
+            conversation_id=engine.conversation_id,
+            final_state=engine.state,
+            responses=engine.responses,
+            spoken=ports.spoken,
+            events=ports.events,
+            saved=engine.saved,
+        )
+        return result
+
+    def run_many(self, scripts):
+        start = time.perf_counter()
+        jobs = [(script, f"patient-{i}") for i, script in enumerate(scripts)]
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(lambda job: self.run(job[0], patient_name=job[1]), jobs))
+        else:
+            results = [self.run(script, patient_name=name) for script, name in jobs]
+        elapsed = time.perf_counter() - start
+        print(f"🧪 Replayed {len(results)} sessions in {elapsed:.2f}s "
+              f"({len(results) / elapsed * 60 if elapsed else float('inf'):.0f} sessions/minute)")
+        return results
+
+
+SAMPLE_SCRIPTS = [
+    ["I see my dog Max playing in the garden", "We were in Austria and it was very cold",
+     "I feel happy when I look at this photo", "that's all please save"],
+    ["TIMEOUT", "My sister and me at the beach", "UNCLEAR", "We built sandcastles all day",
+     "It was warm and sunny", "tell you more", "Our mother packed sandwiches", "no more, save it"],
+    ["This was my wedding day", "It makes me a little sad because she is gone", "skip"],
+    ["A birthday party", "I am done"],
+]
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import json
+    import sys
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    scripts_file = sys.argv[2] if len(sys.argv) > 2 else None
+    if scripts_file:
+        with open(scripts_file, encoding="utf-8") as f:
+            base_scripts = [json.loads(line) for line in f if line.strip()]
+    else:
+        base_scripts = SAMPLE_SCRIPTS
+    scripts = [base_scripts[i % len(base_scripts)] for i in range(count)]
+    runner = HeadlessRunner()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = runner.run_many(scripts)
+    elapsed = time.perf_counter() - start
+    print(f"🧪 Replayed {len(results)} sessions in {elapsed:.2f}s ({len(results) / elapsed * 60:.0f} sessions/minute)")
+    states = {}
+    for result in results:
+        states[result["final_state"]] = states.get(result["final_state"], 0) + 1
+    errors = [r for r in results if r["error"] is not None]
+    print(f"Final states: {states}, errors: {len(errors)}")
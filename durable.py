@@ -0,0 +1,156 @@
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+    fcntl = None
+else:
+    import fcntl
+    msvcrt = None
+
+
+def fsync_dir(directory):
+    """Make a rename inside `directory` durable (a no-op where directories can't be opened, e.g. Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, write, suffix=None):
+    """
+    Replace `path` all at once: write(tmp_path) fills a temporary file in the
+    same directory, which is fsynced and renamed over `path`. Readers (and a
+    crash at any point) see either the old file or the complete new one.
+    `suffix` keeps the extension for writers that choose a format by it.
+    """
+    path = Path(path)
+    directory = path.parent.resolve()
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".partial_{path.stem}_", suffix=suffix or path.suffix)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    fsync_dir(directory)
+    return path
+
+
+class FileLock:
+    """
+    Exclusive lock shared by threads and processes, held on `<path>` (a
+    separate lock file, so it can guard a file that gets replaced). flock on
+    POSIX, msvcrt.locking on Windows; released automatically if the process dies.
+    """
+
+    def __init__(self, path, timeout=30.0, poll=0.05):
+        self.path = str(path)
+        self.timeout = timeout
+        self.poll = poll
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        if not self._thread_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise TimeoutError(f"Timed out waiting for {self.path}")
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while True:
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise TimeoutError(f"Timed out waiting for {self.path}")
+                    time.sleep(self.poll)
+        except BaseException:
+            os.close(fd)
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class GroupCommit:
+    """
+    Batches concurrent writes into one flush. submit(items) blocks until its
+    items are durable: the first caller to arrive becomes the leader and calls
+    flush(batch) with everything queued so far, while later callers queue up
+    for the next flush. One fsync then covers many saves. If a flush fails,
+    every caller in that batch gets the exception.
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._pending = []
+        self.stats = {"flushes": 0, "items": 0, "largest_batch": 0}
+
+    def submit(self, items):
+        entry = {"items": list(items), "done": threading.Event(), "error": None}
+        with self._lock:
+            self._pending.append(entry)
+        while not entry["done"].is_set():
+            with self._flushing:
+                if entry["done"].is_set():
+                    break
+                with self._lock:
+                    batch, self._pending = self._pending, []
+                if batch:
+                    self._run(batch)
+        if entry["error"] is not None:
+            raise entry["error"]
+
+    def _run(self, batch):
+        items = [item for entry in batch for item in entry["items"]]
+        error = None
+        try:
+            self.flush(items)
+        except Exception as e:
+            error = e
+        with self._lock:
+            self.stats["flushes"] += 1
+            self.stats["items"] += len(items)
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        for entry in batch:
+            entry["error"] = error
+            entry["done"].set()
@@ -0,0 +1,52 @@
+"""
+Regenerates the synthetic WAV fixtures in fixtures/audio.
+
+The clips are not real speech: each is a voiced-like tone with syllable-rate
+amplitude modulation, paired with a .txt transcript that FakeEngine replays.
+They exercise the audio plumbing (capture, batching, feature extraction)
+without needing a microphone or network access.
+"""
+import math
+import struct
+import wave
+from pathlib import Path
+
+
+SAMPLE_RATE = 8000
+
+CLIPS = [
+    ("01_dog", "I see my dog Max playing in the garden", 140, 1.6),
+    ("02_austria", "We were in Austria and it was very cold", 120, 1.8),
+    ("03_happy", "I feel happy when I look at this photo", 180, 1.5),
+    ("04_snowman", "I made a snowman with my grandchildren", 150, 1.7),
+    ("05_sad", "It makes me a little sad because she is gone", 105, 2.0),
+    ("06_save", "That's all please save", 160, 0.9),
+]
+
+
+def synth(pitch_hz, seconds, syllables_per_second=4.0):
+    samples = []
+    for n in range(int(SAMPLE_RATE * seconds)):
+        t = n / SAMPLE_RATE
+        envelope = 0.5 * (1 - math.cos(2 * math.pi * syllables_per_second * t))
+        vibrato = pitch_hz * (1 + 0.03 * math.sin(2 * math.pi * 5 * t))
+        value = sum(math.sin(2 * math.pi * vibrato * k * t) / k for k in (1, 2, 3))
+        samples.append(int(8000 * envelope * value))
+    return samples
+
+
+def main():
+    out_dir = Path(__file__).parent / "audio"
+    out_dir.mkdir(exist_ok=True)
+    for name, transcript, pitch, seconds in CLIPS:
+        with wave.open(str(out_dir / f"{name}.wav"), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(b"".join(struct.pack("<h", s) for s in synth(pitch, seconds)))
+        (out_dir / f"{name}.txt").write_text(transcript + "\n")
+    print(f"Wrote {len(CLIPS)} fixtures to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+import hashlib
+import importlib.util
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from startup import lazy_import
+
+log = logging.getLogger(__name__)
+
+Image = lazy_import("PIL.Image")
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
+
+# EXIF tags: DateTimeOriginal lives in the Exif sub-IFD, DateTime in the main IFD
+_EXIF_IFD = 0x8769
+_DATE_TIME_ORIGINAL = 36867
+_DATE_TIME = 306
+
+
+def content_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def exif_date(path):
+    """Return the photo's EXIF capture date as 'YYYY-MM-DD HH:MM:SS', or None."""
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+            value = exif.get_ifd(_EXIF_IFD).get(_DATE_TIME_ORIGINAL) or exif.get(_DATE_TIME)
+    except Exception:
+        return None
+    if not value:
+        return None
+    value = str(value).strip("\x00 ")
+    # EXIF writes dates as 2019:07:14 10:22:31
+    return value[:10].replace(":", "-") + value[10:] if len(value) >= 10 else None
+
+
+class ImageCatalog:
+    """
+    Persistent index of the photos under `root`. Photos in a subfolder belong
+    to the patient of that name; photos at the top level are shared. Each
+    entry records size, mtime, a content hash (for duplicate detection) and
+    the EXIF capture date. scan() only hashes files whose size or mtime
+    changed, so rescanning a large tree costs one stat per file.
+    """
+
+    def __init__(self, root, db_file="image_catalog.db"):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                rel_path TEXT PRIMARY KEY,
+                patient TEXT NOT NULL COLLATE NOCASE,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT,
+                taken_at TEXT,
+                indexed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS images_patient ON images (patient, rel_path)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS images_hash ON images (content_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS images_taken_at ON images (taken_at)")
+        self._conn.commit()
+        self._watcher = None
+
+    def _rel_path(self, path):
+        return Path(path).relative_to(self.root).as_posix()
+
+    @staticmethod
+    def _patient(rel_path):
+        return rel_path.split("/", 1)[0] if "/" in rel_path else ""
+
+    def _walk(self, directory):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk(entry.path)
+            elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                try:
+                    yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+    def _index_row(self, path, rel_path, st):
+        try:
+            digest = content_hash(path)
+        except OSError:
+            return None
+        return (rel_path, self._patient(rel_path), os.path.basename(rel_path), st.st_size,
+                st.st_mtime_ns, digest, exif_date(path), time.time())
+
+    def _write(self, upserts, removed):
+        with self._lock:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO images (rel_path, patient, filename, size, mtime_ns, "
+                    "content_hash, taken_at, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    upserts
+                )
+            if removed:
+                self._conn.executemany("DELETE FROM images WHERE rel_path = ?", [(p,) for p in removed])
+            self._conn.commit()
+
+    def _known(self, prefix=None):
+        with self._lock:
+            if prefix:
+                rows = self._conn.execute(
+                    "SELECT rel_path, size, mtime_ns FROM images WHERE rel_path LIKE ? ESCAPE '\\'",
+                    (_like_prefix(prefix),)
+                )
+            else:
+                rows = self._conn.execute("SELECT rel_path, size, mtime_ns FROM images")
+            return {rel_path: (size, mtime_ns) for rel_path, size, mtime_ns in rows}
+
+    def scan(self, subdir=None):
+        """
+        Bring the index up to date with the files on disk (or only those under
+        `subdir`) and return the delta as {"added", "updated", "removed"} lists.
+        """
+        directory = self.root / subdir if subdir else self.root
+        prefix = self._rel_path(directory) + "/" if subdir else None
+        with self._scan_lock:
+            known = self._known(prefix)
+            delta = {"added": [], "updated": [], "removed": []}
+            upserts = []
+            for path, st in self._walk(directory):
+                rel_path = self._rel_path(path)
+                previous = known.pop(rel_path, None)
+                if previous == (st.st_size, st.st_mtime_ns):
+                    continue
+                row = self._index_row(path, rel_path, st)
+                if row is None:
+                    continue
+                upserts.append(row)
+                delta["added" if previous is None else "updated"].append(rel_path)
+            delta["removed"] = sorted(known)
+            self._write(upserts, delta["removed"])
+        return delta
+
+    def update_paths(self, paths):
+        """Re-index specific files or directories reported by a watcher and return the delta."""
+        delta = {"added": [], "updated": [], "removed": []}
+        for path in paths:
+            path = Path(path)
+            try:
+                rel_path = self._rel_path(path)
+            except ValueError:
+                continue
+            if path.is_dir():
+                sub = self.scan(None if rel_path == "." else rel_path)
+            elif path.suffix.lower() not in IMAGE_EXTENSIONS or path.name.startswith("."):
+                if path.exists():
+                    continue
+                # A deleted or moved-away directory: drop everything that was under it
+                removed = sorted(self._known(rel_path + "/"))
+                self._write([], removed)
+                sub = {"added": [], "updated": [], "removed": removed}
+            else:
+                sub = self._update_file(path, rel_path)
+            for kind in delta:
+                delta[kind].extend(sub[kind])
+        return delta
+
+    def _update_file(self, path, rel_path):
+        with self._scan_lock:
+            with self._lock:
+                previous = self._conn.execute(
+                    "SELECT size, mtime_ns FROM images WHERE rel_path = ?", (rel_path,)
+                ).fetchone()
+            try:
+                st = path.stat()
+            except OSError:
+                if previous is None:
+                    return {"added": [], "updated": [], "removed": []}
+                self._write([], [rel_path])
+                return {"added": [], "updated": [], "removed": [rel_path]}
+            if previous == (st.st_size, st.st_mtime_ns):
+                return {"added": [], "updated": [], "removed": []}
+            row = self._index_row(str(path), rel_path, st)
+            if row is None:
+                return {"added": [], "updated": [], "removed": []}
+            self._write([row], [])
+            kind = "added" if previous is None else "updated"
+            return {"added": [], "updated": [], "removed": [], kind: [rel_path]}
+
+    def _where(self, patient=None, search=None, include_shared=True):
+        clauses, params = [], []
+        if patient:
+            # patient is a NOCASE column, so typed names match folder names in any case
+            if include_shared:
+                clauses.append("patient IN (?, '')")
+            else:
+                clauses.append("patient = ?")
+            params.append(patient)
+        if search:
+            clauses.append("rel_path LIKE ? ESCAPE '\\'")
+            params.append("%" + _escape_like(search) + "%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, patient=None, search=None, include_shared=True, offset=0, limit=None, order="rel_path"):
+        """Return catalog entries as dicts, filtered by patient folder and a path substring, one page at a time."""
+        if order not in ("rel_path", "taken_at", "filename"):
+            raise ValueError(f"Cannot order images by '{order}'")
+        where, params = self._where(patient, search, include_shared)
+        sql = (f"SELECT rel_path, patient, filename, size, mtime_ns, content_hash, taken_at FROM images{where} "
+               f"ORDER BY {order}, rel_path LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(sql, params + [-1 if limit is None else limit, offset]).fetchall()
+        return [
+            {"rel_path": r[0], "patient": r[1], "filename": r[2], "size": r[3],
+             "mtime_ns": r[4], "content_hash": r[5], "taken_at": r[6]}
+            for r in rows
+        ]
+
+    def get(self, rel_path):
+        """The catalog entry for one photo (as in query()), or None if it is not indexed."""
+        with self._lock:
+            r = self._conn.execute(
+                "SELECT rel_path, patient, filename, size, mtime_ns, content_hash, taken_at FROM images WHERE rel_path = ?",
+                (rel_path,)
+            ).fetchone()
+        if r is None:
+            return None
+        return {"rel_path": r[0], "patient": r[1], "filename": r[2], "size": r[3],
+                "mtime_ns": r[4], "content_hash": r[5], "taken_at": r[6]}
+
+    def count(self, patient=None, search=None, include_shared=True):
+        where, params = self._where(patient, search, include_shared)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM images{where}", params).fetchone()[0]
+
+    def patients(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT patient FROM images WHERE patient != '' ORDER BY patient")
+            return [r[0] for r in rows]
+
+    def duplicates(self):
+        """Groups of photos with identical content, as lists of relative paths."""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT content_hash, rel_path FROM images WHERE content_hash IN (
+                    SELECT content_hash FROM images GROUP BY content_hash HAVING COUNT(*) > 1
+                ) ORDER BY content_hash, rel_path
+            """).fetchall()
+        groups = {}
+        for digest, rel_path in rows:
+            groups.setdefault(digest, []).append(rel_path)
+        return list(groups.values())
+
+    def watch(self, on_change, interval=5.0, full_scan_every=12):
+        """
+        Keep the index current in the background and call on_change(delta)
+        from a worker thread whenever photos are added, changed or removed.
+        Uses filesystem events when the watchdog package is installed and
+        falls back to polling every `interval` seconds. A poll stats each
+        folder and only rescans folders whose mtime moved (a photo added,
+        removed or replaced); files edited in place leave their folder's
+        mtime alone and are picked up by a full scan every `full_scan_every` polls.
+        """
+        self.stop_watching()
+        if importlib.util.find_spec("watchdog") is not None:
+            self._watcher = _EventWatcher(self, on_change)
+        else:
+            self._watcher = _PollingWatcher(self, on_change, interval, full_scan_every)
+        self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def close(self):
+        self.stop_watching()
+        with self._lock:
+            self._conn.close()
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like_prefix(prefix):
+    return _escape_like(prefix) + "%"
+
+
+def _has_changes(delta):
+    return any(delta.values())
+
+
+class _PollingWatcher:
+    def __init__(self, catalog, on_change, interval, full_scan_every=12):
+        self.catalog = catalog
+        self.on_change = on_change
+        self.interval = interval
+        self.full_scan_every = full_scan_every
+        # directory -> (mtime_ns, subdirectories) as of the last poll
+        self._dirs = {}
+        self._polls = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="image-catalog-poll")
+
+    def start(self):
+        self._thread.start()
+
+    def _changed_dirs(self):
+        """Folders whose entries changed since the last poll: one stat per folder, a listing only for changed ones."""
+        changed, seen = [], {}
+        stack = [str(self.catalog.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            previous = self._dirs.get(directory)
+            if previous is not None and previous[0] == mtime_ns:
+                subdirs = previous[1]
+            else:
+                changed.append(directory)
+                try:
+                    subdirs = [e.path for e in os.scandir(directory)
+                               if not e.name.startswith(".") and e.is_dir(follow_symlinks=False)]
+                except OSError:
+                    continue
+            seen[directory] = (mtime_ns, subdirs)
+            stack.extend(subdirs)
+        self._dirs = seen
+        return changed
+
+    def poll(self):
+        self._polls += 1
+        changed = self._changed_dirs()
+        if self._polls % self.full_scan_every == 0 or str(self.catalog.root) in changed:
+            return self.catalog.scan()
+        delta = {"added": [], "updated": [], "removed": []}
+        # A changed folder is rescanned with everything under it, so its changed subfolders need no scan of their own
+        scanned = []
+        for directory in sorted(changed):
+            if any(directory.startswith(parent + os.sep) for parent in scanned):
+                continue
+            scanned.append(directory)
+            sub = self.catalog.scan(self.catalog._rel_path(directory))
+            for kind in delta:
+                delta[kind].extend(sub[kind])
+        return delta
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                delta = self.poll()
+            except Exception as e:
+                log.warning(f"⚠️ Image catalog scan failed: {e}")
+                continue
+            if _has_changes(delta):
+                self.on_change(delta)
+
+    def stop(self):
+        self._stop.set()
+
+
+class _EventWatcher:
+    """inotify/FSEvents/ReadDirectoryChanges via watchdog; events are batched for `settle` seconds."""
+
+    def __init__(self, catalog, on_change, settle=0.5):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        self.catalog = catalog
+        self.on_change = on_change
+        self.settle = settle
+        self._paths = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                with watcher._lock:
+                    watcher._paths.add(event.src_path)
+                    if getattr(event, "dest_path", None):
+                        watcher._paths.add(event.dest_path)
+                watcher._wake.set()
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), str(catalog.root), recursive=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="image-catalog-events")
+
+    def start(self):
+        self._observer.start()
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            if self._stop.is_set():
+                break
+            time.sleep(self.settle)
+            with self._lock:
+                paths, self._paths = self._paths, set()
+                self._wake.clear()
+            try:
+                delta = self.catalog.update_paths(sorted(paths))
+            except Exception as e:
+                log.warning(f"⚠️ Image catalog update failed: {e}")
+                continue
+            if _has_changes(delta):
+                self.on_change(delta)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._observer.stop()
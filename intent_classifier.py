@@ -0,0 +1,248 @@
+import re
+from collections import namedtuple
+
+# Word lists per emotion; every entry matches as a whole word or phrase, so
+# "sadly", "download" and "made" no longer count as sad, down or mad.
+# Ambiguous words only count inside a phrase ("tear up", not "tear the paper")
+EMOTION_LEXICON = {
+    "sad": ["sad", "sadness", "saddened", "unhappy", "depressed", "depressing", "miserable", "heartbroken",
+            "lonely", "grief", "grieving", "cry", "cried", "crying", "tears", "tearful", "in tears",
+            "tear up", "tears up", "teared up", "tearing up", "well up", "welled up",
+            "feel down", "feels down", "feeling down", "felt down", "so down", "bit down",
+            "gets me down", "get me down", "got me down", "getting me down", "brings me down",
+            "bring me down", "brought me down"],
+    "happy": ["happy", "happier", "happiness", "joy", "joyful", "glad", "delighted", "smile", "smiled",
+              "smiles", "smiling", "laugh", "laughed", "laughing", "cheerful", "enjoyed"],
+    "angry": ["angry", "anger", "mad", "furious", "upset", "annoyed", "irritated", "frustrated", "frustrating"],
+    "fear": ["fear", "afraid", "scared", "frightened", "nervous", "anxious", "worried", "terrified"],
+}
+
+# Ties between emotions go to the earlier one, as the old if/elif chain did
+EMOTION_PRIORITY = ["sad", "happy", "angry", "fear"]
+
+INTENT_LEXICON = {
+    "stop": ["done", "finished", "stop", "enough", "that's all", "thats all", "that is all", "no more",
+             "bye", "goodbye"],
+    "skip": ["skip"],
+    "save": ["save", "please save", "save it", "want to save"],
+    # Not a request to end, but still talk about the conversation rather than the photo
+    "wrap_up": ["now i want"],
+}
+
+# Intents that end the current step of the conversation
+STOP_INTENTS = frozenset({"stop", "skip", "save"})
+
+NEGATORS = {"not", "no", "never", "nothing", "hardly", "without", "nor", "cannot"}
+# Words allowed between a negator and the cue it modifies ("not very happy", "don't feel sad");
+# anything else breaks the link, so "nothing makes me happier" and "can't stop smiling" stay positive
+NEGATION_BRIDGE = {"very", "so", "too", "really", "that", "particularly", "all", "at", "even", "quite",
+                   "feel", "feeling", "felt", "be", "am", "is", "was", "were", "been", "being", "get", "got"}
+NEGATION_REACH = 2
+# Unpunctuated speech often opens with these ("no that's all", "no save it"); they negate an emotion
+# ("no fear") but never the stop/save/skip cue that follows them
+INTERJECTIONS = {"no", "nope"}
+
+Classification = namedtuple("Classification", "emotion intents negated")
+
+_TOKEN = re.compile(r"[a-z']+|[.,;:!?]")
+
+
+def _normalize(text):
+    return text.lower().replace("’", "'").replace("\n", " ")
+
+
+def _is_negator(token):
+    return token in NEGATORS or token.endswith("n't")
+
+
+class IntentClassifier:
+    """
+    Detects the patient's emotion and conversation intents (stop, skip, save)
+    from one tokenization of the text: each word is looked up among the
+    phrases that start with it, longest phrase first. A cue directly
+    modified by a negator ("not sad", "don't feel sad") is ignored; a
+    negator elsewhere in the sentence is not. Intents are only negated by
+    the word right before them ("I'm not done yet", "don't stop"), and never
+    by a leading "no", which in speech is usually an answer ("no, that's all").
+
+    `model` is an optional local classifier for utterances with no emotion
+    cue: a callable taking a list of texts and returning (emotion, confidence)
+    pairs; its answer is used when confidence >= model_threshold.
+    """
+
+    def __init__(self, emotions=None, intents=None, model=None, model_threshold=0.6):
+        self.model = model
+        self.model_threshold = model_threshold
+        # first word -> [(phrase words, kind, label, phrase)], longest phrases first
+        self._phrases = {}
+        for kind, lexicon in (("emotion", emotions or EMOTION_LEXICON), ("intent", intents or INTENT_LEXICON)):
+            for label, phrases in lexicon.items():
+                for phrase in phrases:
+                    phrase = _normalize(phrase)
+                    words = tuple(_TOKEN.findall(phrase))
+                    self._phrases.setdefault(words[0], []).append((words, kind, label, phrase))
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda candidate: -len(candidate[0]))
+        self._first_words = frozenset(self._phrases)
+        self._resolved = {}
+
+    @staticmethod
+    def _negated(tokens, position, kind):
+        if kind == "intent":
+            token = tokens[position - 1] if position else ""
+            return _is_negator(token) and token not in INTERJECTIONS
+        for back in range(position - 1, max(-1, position - 2 - NEGATION_REACH), -1):
+            token = tokens[back]
+            if _is_negator(token):
+                return True
+            if token not in NEGATION_BRIDGE:
+                return False
+        return False
+
+    def _scan(self, text):
+        tokens = _TOKEN.findall(text)
+        first_words = self._first_words
+        # Only positions holding the first word of some phrase are looked at
+        positions = [i for i, token in enumerate(tokens) if token in first_words]
+        if not positions:
+            return ()
+        hits = []
+        free = 0
+        for i in positions:
+            if i < free:
+                continue
+            for words, kind, label, phrase in self._phrases[tokens[i]]:
+                if len(words) == 1 or tuple(tokens[i:i + len(words)]) == words:
+                    hits.append((kind, label, phrase, self._negated(tokens, i, kind)))
+                    free = i + len(words)
+                    break
+        return tuple(hits)
+
+    def _resolve(self, hits):
+        # Utterances repeat the same few cue combinations, so resolved results are memoized
+        result = self._resolved.get(hits)
+        if result is None:
+            if len(self._resolved) >= 4096:
+                self._resolved.clear()
+            result = self._resolved[hits] = self._resolve_hits(hits)
+        return result
+
+    def _resolve_hits(self, hits):
+        counts = {}
+        intents = set()
+        negated = []
+        for kind, label, phrase, is_negated in hits:
+            if is_negated:
+                negated.append(phrase)
+            elif kind == "emotion":
+                counts[label] = counts.get(label, 0) + 1
+            else:
+                intents.add(label)
+        emotion = "neutral"
+        if counts:
+            best = max(counts.values())
+            emotion = next(label for label in EMOTION_PRIORITY + sorted(counts) if counts.get(label) == best)
+        return Classification(emotion, frozenset(intents), tuple(negated))
+
+    def classify(self, text):
+        result = self._resolve(self._scan(_normalize(text or "")))
+        if self.model is not None:
+            result = self._apply_model([_normalize(text or "")], [result])[0]
+        return result
+
+    def classify_batch(self, texts):
+        """Classify many utterances, returning a Classification per text, in order; the model (if any) runs once."""
+        texts = [_normalize(text or "") for text in texts]
+        results = [self._resolve(self._scan(text)) for text in texts]
+        if self.model is not None:
+            results = self._apply_model(texts, results)
+        return results
+
+    def _apply_model(self, texts, results):
+        pending = [i for i, result in enumerate(results) if result.emotion == "neutral" and texts[i].strip()]
+        if not pending:
+            return results
+        predictions = self.model([texts[i] for i in pending])
+        for i, (emotion, confidence) in zip(pending, predictions):
+            if emotion and confidence >= self.model_threshold:
+                results[i] = results[i]._replace(emotion=emotion)
+        return results
+
+    def emotion(self, text):
+        return self.classify(text).emotion
+
+    def is_stop(self, text):
+        return bool(text) and bool(self.classify(text).intents & STOP_INTENTS)
+
+
+DEFAULT_CLASSIFIER = IntentClassifier()
+
+
+def _legacy_emotion(text):
+    # The substring scan this module replaced, kept for the benchmark comparison
+    text = text.lower()
+    if any(word in text for word in ["sad", "unhappy", "depressed", "down", "tear"]):
+        return "sad"
+    elif any(word in text for word in ["happy", "joy", "glad", "delighted", "smile"]):
+        return "happy"
+    elif any(word in text for word in ["angry", "mad", "furious", "upset"]):
+        return "angry"
+    elif any(word in text for word in ["fear", "scared", "afraid", "nervous"]):
+        return "fear"
+    return "neutral"
+
+
+def _legacy_is_stop(text):
+    stop_words = ["done", "finished", "stop", "enough", "thats all", "no more", "bye", "goodbye", "skip",
+                  "save", "please save"]
+    return bool(text) and any(word in text.lower() for word in stop_words)
+
+
+def benchmark(labeled_file, repeat=200):
+    """Accuracy against a labeled JSONL set ({"text", "emotion", "stop"}) and utterances/second."""
+    import json
+    import time
+
+    with open(labeled_file, encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    texts = [e["text"] for e in examples]
+    classifier = DEFAULT_CLASSIFIER
+    results = classifier.classify_batch(texts)
+
+    def accuracy(predicted, key):
+        correct = sum(p == e[key] for p, e in zip(predicted, examples))
+        return correct / len(examples)
+
+    print(f"{len(examples)} labeled utterances from {labeled_file}")
+    print(f"Emotion accuracy: classifier {accuracy([r.emotion for r in results], 'emotion'):.1%}, "
+          f"substring scan {accuracy([_legacy_emotion(t) for t in texts], 'emotion'):.1%}")
+    print(f"Stop intent accuracy: classifier "
+          f"{accuracy([bool(r.intents & STOP_INTENTS) for r in results], 'stop'):.1%}, "
+          f"substring scan {accuracy([_legacy_is_stop(t) for t in texts], 'stop'):.1%}")
+    for result, example in zip(results, examples):
+        if result.emotion != example["emotion"] or bool(result.intents & STOP_INTENTS) != example["stop"]:
+            print(f"  miss: {example['text']!r} -> {result.emotion}, {sorted(result.intents)}")
+
+    workload = texts * repeat
+    timings = {}
+    start = time.perf_counter()
+    for text in workload:
+        _legacy_emotion(text)
+        _legacy_is_stop(text)
+    timings["substring scan"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for text in workload:
+        classifier.classify(text)
+    timings["classify"] = time.perf_counter() - start
+    start = time.perf_counter()
+    classifier.classify_batch(workload)
+    timings["classify_batch"] = time.perf_counter() - start
+    for name, elapsed in timings.items():
+        print(f"{name:15s} {len(workload) / elapsed:10.0f} utterances/s")
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else os.path.join("fixtures", "intents.jsonl"))
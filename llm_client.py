@@ -0,0 +1,192 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from startup import lazy_import
+
+requests = lazy_import("requests")
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+class LLMClient:
+    """
+    Chat-completions client with a keep-alive connection pool, connect/read
+    timeouts, bounded retries with jittered exponential backoff on 429/5xx,
+    and a cap on concurrent in-flight requests.
+    """
+
+    def __init__(self, api_key, base_url, model="sonar-pro", connect_timeout=5, read_timeout=30,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, max_concurrency=4, pool_size=10):
+        self.base_url = base_url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._limiter = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def chat(self, messages, temperature=0.3, max_tokens=150, model=None):
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            self._count("requests")
+            retry_after = None
+            # Only the request itself holds a concurrency slot; backoff sleeps leave it to other callers
+            with self._limiter:
+                try:
+                    response = self.session.post(self.base_url, json=payload, timeout=self.timeout)
+                    if response.status_code in RETRY_STATUSES:
+                        retry_after = response.headers.get("Retry-After")
+                        last_error = LLMError(f"HTTP {response.status_code} from {self.base_url}")
+                    else:
+                        response.raise_for_status()
+                        return response.json()["choices"][0]["message"]["content"]
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = e
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+        self._count("failures")
+        raise LLMError(f"LLM request failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncLLMClient:
+    """asyncio front end for LLMClient; calls share the sync client's connection pool."""
+
+    def __init__(self, client, max_concurrency=None):
+        self.client = client
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+
+    async def chat(self, messages, temperature=0.3, max_tokens=150, model=None):
+        if self._semaphore is None and self._max_concurrency:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        loop = asyncio.get_running_loop()
+        call = lambda: self.client.chat(messages, temperature=temperature, max_tokens=max_tokens, model=model)
+        if self._semaphore is None:
+            return await loop.run_in_executor(None, call)
+        async with self._semaphore:
+            return await loop.run_in_executor(None, call)
+
+
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_client(api_key, base_url, model="sonar-pro", **options):
+    """Return one client per (api_key, base_url, model) so concurrent sessions share connections."""
+    key = (api_key, base_url, model)
+    with _shared_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = LLMClient(api_key, base_url, model=model, **options)
+            _shared_clients[key] = client
+        return client
+
+
+class StubLLMServer:
+    """
+    Local stand-in for the chat-completions API. Replies with `reply` (a string
+    or a function of the request payload), optionally after `delay` seconds, and
+    fails the first `fail_first` requests with `fail_status`.
+    """
+
+    def __init__(self, reply="You shared a lovely memory.", delay=0.0, fail_first=0, fail_status=503):
+        self.reply = reply
+        self.delay = delay
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                payload = json.loads(body or b"{}")
+                with stub._lock:
+                    stub.requests.append(payload)
+                    failing = len(stub.requests) <= stub.fail_first
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if failing:
+                    self._send(stub.fail_status, {"error": "stub failure"})
+                    return
+                content = stub.reply(payload) if callable(stub.reply) else stub.reply
+                self._send(200, {"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+            def _send(self, status, data):
+                encoded = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,102 @@
+"""
+Load test for SessionManager: drives many simulated patient sessions at once
+from the recorded audio fixtures, against a local stub of the LLM API, and
+checks that every session saved exactly one memory with its summary filled in.
+
+    python load_test.py --sessions 50 --metrics load_test.prom
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+FIXTURES = ROOT / "fixtures" / "audio"
+# Three answers, then "that's all please save" at the tell-me-more prompt
+SCRIPT = ["01_dog.wav", "02_austria.wav", "03_happy.wav", "06_save.wav"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[int(pct / 100 * (len(ordered) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--max-sessions", type=int, default=16, help="conversations running at once")
+    parser.add_argument("--stt-workers", type=int, default=4)
+    parser.add_argument("--stt-latency", type=float, default=0.05, help="simulated seconds per recognition")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="stub LLM response delay in seconds")
+    parser.add_argument("--metrics", help="trace the conversation loop and write its histograms (Prometheus text) here")
+    args = parser.parse_args()
+
+    from test import GeneralizedDementiaCareAgent
+    from llm_client import StubLLMServer
+    from session_manager import SessionManager
+    from stt_engines import FakeEngine
+    from telemetry import TELEMETRY
+
+    metrics_file = os.path.abspath(args.metrics) if args.metrics else None
+    if metrics_file:
+        TELEMETRY.enable()
+    os.chdir(tempfile.mkdtemp(prefix="meemo_load_"))
+    with StubLLMServer(reply="You shared lovely memories of Max and Austria.", delay=args.llm_delay) as stub:
+        engine = FakeEngine(FIXTURES, latency=args.stt_latency)
+        base = GeneralizedDementiaCareAgent(api_key="stub", base_url=stub.url, stt_engine=engine, headless=True)
+        manager = SessionManager(base, max_sessions=args.max_sessions, stt_workers=args.stt_workers)
+
+        start = time.perf_counter()
+        for i in range(args.sessions):
+            endpoint = manager.file_endpoint([FIXTURES / name for name in SCRIPT])
+            manager.start_session(f"patient-{i:03d}", "football.jpg", endpoint)
+        sessions = manager.wait_all()
+        conversations_done = time.perf_counter() - start
+        summaries_done = base.summary_jobs.wait_idle(timeout=120)
+        elapsed = time.perf_counter() - start
+        manager.shutdown()
+
+        durations = [s.duration for s in sessions if s.duration is not None]
+        statuses = {}
+        for session in sessions:
+            statuses[session.status] = statuses.get(session.status, 0) + 1
+        memories = list(base.memory_store.all())
+        pending = [m for m in memories if m["summary_status"] != "done"]
+
+        print()
+        print(f"Sessions: {args.sessions} ({statuses}), max concurrent {args.max_sessions}")
+        print(f"Conversations finished in {conversations_done:.2f}s "
+              f"({args.sessions / conversations_done:.1f} sessions/s), summaries by {elapsed:.2f}s")
+        print(f"Session duration p50 {percentile(durations, 50):.3f}s, p95 {percentile(durations, 95):.3f}s, "
+              f"mean {statistics.mean(durations):.3f}s")
+        print(f"STT: {engine.report()}")
+        print(f"LLM: {base.llm.stats}, stub saw {len(stub.requests)} requests")
+        print(f"Summary cache: {base.summary_cache.report()}")
+        print(f"Memories saved: {len(memories)}, summaries pending: {len(pending)}")
+        if TELEMETRY.enabled:
+            for name, summary in TELEMETRY.snapshot().items():
+                if summary["count"]:
+                    print(f"  {name:14s} p50 {summary['p50_ms']:8.1f} ms, p95 {summary['p95_ms']:8.1f} ms, "
+                          f"p99 {summary['p99_ms']:8.1f} ms over {summary['count']}")
+        if metrics_file:
+            TELEMETRY.write_prometheus(metrics_file)
+            print(f"Metrics written to {metrics_file}")
+
+        failures = []
+        if statuses.get("completed", 0) != args.sessions:
+            failures.append("not every session completed")
+        if len(memories) != args.sessions:
+            failures.append(f"expected {args.sessions} memories, found {len(memories)}")
+        if not summaries_done or pending:
+            failures.append("summaries still pending")
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+import heapq
+import importlib.util
+import math
+import re
+import threading
+import zlib
+from operator import itemgetter
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "had", "has", "have",
+    "he", "her", "his", "i", "in", "is", "it", "its", "me", "my", "of", "on", "or", "our", "she",
+    "that", "the", "their", "them", "there", "they", "this", "to", "was", "we", "were", "what",
+    "which", "with", "you", "your", "about", "show", "memories", "memory", "photo", "photos", "mention",
+}
+
+
+def tokenize(text):
+    """Lowercased words without stop words, with a plain plural 's' folded away."""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        word = word.strip("'")
+        if word.endswith("'s"):
+            word = word[:-2]
+        if not word or word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def document_text(record):
+    """The searchable text of a memory: its summary plus the raw patient responses."""
+    parts = [record.get("memory_note") or ""]
+    parts.extend(record.get("raw_transcript") or [])
+    return " ".join(parts)
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 ranking. Documents can be added,
+    replaced and removed one at a time. Each posting stores its saturated
+    term-frequency weight, computed against a snapshot of the average
+    document length that is refreshed when the real average drifts by more
+    than 10%. Top-k queries walk the weight-sorted posting lists with the
+    threshold algorithm, so they stop long before scoring every match.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._sorted = {}
+        self._doc_terms = {}
+        self._doc_len = {}
+        self._total_len = 0
+        self._avg_len = 0.0
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def _weight(self, tf, length):
+        return tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / self._avg_len))
+
+    def _maybe_reweigh(self):
+        n = len(self._doc_len)
+        if not n:
+            return
+        avg_len = max(self._total_len / n, 1.0)
+        if self._avg_len and abs(avg_len - self._avg_len) <= 0.1 * self._avg_len:
+            return
+        self._avg_len = avg_len
+        for doc_id, counts in self._doc_terms.items():
+            length = self._doc_len[doc_id]
+            for term, tf in counts.items():
+                self._postings[term][doc_id] = self._weight(tf, length)
+        self._sorted.clear()
+
+    def add(self, doc_id, tokens):
+        self.remove(doc_id)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        self._doc_terms[doc_id] = counts
+        self._doc_len[doc_id] = len(tokens)
+        self._total_len += len(tokens)
+        if not self._avg_len:
+            self._avg_len = max(len(tokens), 1.0)
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = self._weight(tf, len(tokens))
+            self._sorted.pop(term, None)
+        self._maybe_reweigh()
+
+    def remove(self, doc_id):
+        counts = self._doc_terms.pop(doc_id, None)
+        if counts is None:
+            return
+        for term in counts:
+            postings = self._postings[term]
+            del postings[doc_id]
+            self._sorted.pop(term, None)
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def _sorted_postings(self, term):
+        ordered = self._sorted.get(term)
+        if ordered is None:
+            ordered = sorted(self._postings[term].items(), key=itemgetter(1), reverse=True)
+            self._sorted[term] = ordered
+        return ordered
+
+    def top(self, tokens, limit, allowed=None):
+        """[(doc_id, score)] for the `limit` best BM25 matches, best first (optionally only doc ids in `allowed`)."""
+        n = len(self._doc_len)
+        terms = [term for term in set(tokens) if term in self._postings]
+        if not n or not terms:
+            return []
+        lists = []
+        for term in terms:
+            postings = self._postings[term]
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            lists.append((idf, postings))
+
+        def score(doc_id):
+            return sum(idf * postings.get(doc_id, 0.0) for idf, postings in lists)
+
+        if allowed is not None and len(allowed) <= min(len(postings) for _, postings in lists):
+            # A narrow filter (one patient's memories): scoring its documents directly is cheapest
+            scored = ((doc_id, score(doc_id)) for doc_id in allowed)
+            return heapq.nlargest(limit, [item for item in scored if item[1] > 0], key=itemgetter(1))
+
+        ordered_lists = [(idf, self._sorted_postings(term)) for term, (idf, _) in zip(terms, lists)]
+        heap = []
+        seen = set()
+        depth = 0
+        while True:
+            threshold = 0.0
+            progressed = False
+            for idf, ordered in ordered_lists:
+                if depth >= len(ordered):
+                    continue
+                doc_id, weight = ordered[depth]
+                threshold += idf * weight
+                progressed = True
+                if doc_id in seen or (allowed is not None and doc_id not in allowed):
+                    continue
+                seen.add(doc_id)
+                item = (score(doc_id), doc_id)
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+            # No unseen document can beat the frontier sum, so the top-k is final
+            if not progressed or (len(heap) >= limit and heap[0][0] >= threshold):
+                break
+            depth += 1
+        return [(doc_id, value) for value, doc_id in sorted(heap, reverse=True)]
+
+
+class HashingEmbeddingIndex:
+    """
+    Local, dependency-light text embeddings for fuzzy matching: every word is
+    broken into character trigrams that are hashed into a fixed number of
+    signed buckets, and notes are compared by cosine similarity over one
+    NumPy matrix. Misspellings and word variants ("Austria"/"Austrian")
+    share most trigrams, so they still match.
+    """
+
+    def __init__(self, dim=128):
+        import numpy as np
+
+        self._np = np
+        self.dim = dim
+        self._matrix = np.zeros((1024, dim), dtype=np.float32)
+        self._rows = {}
+        self._ids = []
+        self._free = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def embed(self, tokens):
+        vector = self._np.zeros(self.dim, dtype=self._np.float32)
+        for token in tokens:
+            word = f"<{token}>"
+            for i in range(max(1, len(word) - 2)):
+                h = zlib.crc32(word[i:i + 3].encode("utf-8"))
+                vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = float(self._np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def add(self, doc_id, tokens):
+        row = self._rows.get(doc_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+                self._ids[row] = doc_id
+            else:
+                row = len(self._ids)
+                self._ids.append(doc_id)
+                if row >= len(self._matrix):
+                    grown = self._np.zeros((len(self._matrix) * 2, self.dim), dtype=self._np.float32)
+                    grown[:len(self._matrix)] = self._matrix
+                    self._matrix = grown
+            self._rows[doc_id] = row
+        self._matrix[row] = self.embed(tokens)
+
+    def remove(self, doc_id):
+        row = self._rows.pop(doc_id, None)
+        if row is not None:
+            self._matrix[row] = 0.0
+            self._ids[row] = None
+            self._free.append(row)
+
+    def top(self, tokens, limit, min_similarity=0.3, allowed=None):
+        """[(doc_id, similarity)] for the most similar notes, best first."""
+        np = self._np
+        if not self._ids:
+            return []
+        query = self.embed(tokens)
+        if allowed is not None:
+            # Only the allowed rows are multiplied, so a filtered query costs in proportion to the filter
+            rows = np.fromiter((self._rows[d] for d in allowed if d in self._rows), dtype=np.int64)
+            if not len(rows):
+                return []
+            similarities = self._matrix[rows] @ query
+        else:
+            rows = None
+            similarities = self._matrix[:len(self._ids)] @ query
+        candidates = np.flatnonzero(similarities >= min_similarity)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-similarities[candidates], limit - 1)[:limit]]
+        ordered = candidates[np.argsort(-similarities[candidates])]
+        return [(self._ids[row if rows is None else rows[row]], float(similarities[row])) for row in ordered]
+
+
+class MemorySearch:
+    """
+    Search over saved memories by their summaries and raw transcripts.
+    Combines BM25 keyword ranking with the hashing embedding index (when
+    NumPy is installed) by reciprocal rank fusion. Attached to a MemoryStore,
+    the indexes follow every save and summary update incrementally.
+    """
+
+    RRF_K = 60
+
+    def __init__(self, store=None, semantic=None, dim=128):
+        self.store = store
+        if semantic is None:
+            semantic = importlib.util.find_spec("numpy") is not None
+        self._lock = threading.Lock()
+        self.keywords = BM25Index()
+        self.embeddings = HashingEmbeddingIndex(dim) if semantic else None
+        self._docs = {}
+        self._by_patient = {}
+        if store is not None:
+            self.rebuild()
+            store.add_listener(self._on_store_change)
+
+    def __len__(self):
+        return len(self._docs)
+
+    @property
+    def semantic(self):
+        return self.embeddings is not None
+
+    def rebuild(self):
+        for record in self.store.all():
+            self.index_record(record)
+
+    def _on_store_change(self, keys):
+        for patient_name, image_filename in keys:
+            record = self.store.get(patient_name, image_filename)
+            if record is None:
+                self.remove(patient_name, image_filename)
+            else:
+                self.index_record(record)
+
+    def index_record(self, record):
+        doc_id = (record["patient_name"], record["image_filename"])
+        tokens = tokenize(document_text(record))
+        with self._lock:
+            self.keywords.add(doc_id, tokens)
+            if self.embeddings is not None:
+                self.embeddings.add(doc_id, tokens)
+            self._docs[doc_id] = {
+                "patient_name": record["patient_name"],
+                "image_filename": record["image_filename"],
+                "memory_note": record.get("memory_note") or "",
+                "created_date": record.get("created_date") or "",
+            }
+            self._by_patient.setdefault(doc_id[0].lower(), set()).add(doc_id)
+
+    def remove(self, patient_name, image_filename):
+        doc_id = (patient_name, image_filename)
+        with self._lock:
+            self.keywords.remove(doc_id)
+            if self.embeddings is not None:
+                self.embeddings.remove(doc_id)
+            if self._docs.pop(doc_id, None) is not None:
+                self._by_patient.get(patient_name.lower(), set()).discard(doc_id)
+
+    def search(self, query, patient_name=None, limit=10, mode="hybrid"):
+        """
+        Return up to `limit` memories matching `query`, best first, as dicts
+        with the memory fields plus `score`. mode is "hybrid", "keyword" or
+        "semantic"; without NumPy every mode falls back to keyword ranking.
+        """
+        if mode not in ("hybrid", "keyword", "semantic"):
+            raise ValueError(f"Unknown search mode '{mode}'")
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            allowed = None
+            if patient_name:
+                allowed = self._by_patient.get(patient_name.lower(), set())
+            rankings = []
+            if mode != "semantic" or self.embeddings is None:
+                rankings.append(self.keywords.top(tokens, max(limit, 50), allowed=allowed))
+            if mode != "keyword" and self.embeddings is not None:
+                candidates = allowed
+                if mode == "hybrid" and len(rankings[0]) >= limit:
+                    # Enough keyword hits: rerank just those by similarity instead of scanning every
+                    # note. Only thin or empty keyword results (misspellings) need the full scan.
+                    candidates = {doc_id for doc_id, _ in rankings[0]}
+                rankings.append(self.embeddings.top(tokens, max(limit, 50), allowed=candidates))
+            fused = {}
+            for ranking in rankings:
+                for rank, (doc_id, _) in enumerate(ranking):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+            best = heapq.nlargest(limit, fused.items(), key=lambda item: item[1])
+            return [dict(self._docs[doc_id], score=round(score, 5)) for doc_id, score in best]
+
+
+def _synthetic_records(count, seed=7):
+    import random
+
+    rng = random.Random(seed)
+    subjects = ["my dog Max", "our cat Whiskers", "my sister Anna", "my husband George", "the grandchildren",
+                "my mother", "the old farm", "our wedding", "my first car", "the school choir"]
+    places = ["Austria", "the seaside", "Paris", "the garden", "the lake house", "Scotland", "the mountains",
+              "grandma's kitchen", "the church", "New York"]
+    activities = ["built a snowman", "went fishing", "baked bread", "danced all night", "picked apples",
+                  "went skiing", "sang songs", "played football", "had a picnic", "watched the fireworks"]
+    feelings = ["happy", "cold but cheerful", "proud", "a little sad", "excited", "peaceful"]
+    records = []
+    for i in range(count):
+        subject, place = rng.choice(subjects), rng.choice(places)
+        activity, feeling = rng.choice(activities), rng.choice(feelings)
+        responses = [f"This is {subject} in {place}", f"We {activity}", f"I feel {feeling}"]
+        records.append({
+            "patient_name": f"patient-{i % 500}",
+            "image_filename": f"photo-{i}.jpg",
+            "memory_note": f"You remember {subject} in {place}, where you {activity}. It made you feel {feeling}.",
+            "raw_transcript": responses,
+            "created_date": "2024-01-01 10:00:00",
+        })
+    return records
+
+
+def benchmark(count=100_000, queries=200):
+    """Index `count` synthetic notes and time keyword, semantic and hybrid queries."""
+    import statistics
+    import time
+
+    records = _synthetic_records(count)
+    search = MemorySearch()
+    start = time.perf_counter()
+    for record in records:
+        search.index_record(record)
+    build = time.perf_counter() - start
+    print(f"Indexed {count} notes in {build:.2f}s (semantic index: {'on' if search.semantic else 'off, NumPy missing'})")
+
+    start = time.perf_counter()
+    for record in records[:1000]:
+        search.index_record(dict(record, memory_note=record["memory_note"] + " We laughed a lot."))
+    print(f"Incremental update: {(time.perf_counter() - start) / 1000 * 1000:.3f} ms per note")
+
+    samples = ["dog Max", "Austria snowman", "Austira snowmen", "picnic by the lake", "wedding dancing",
+               "sister Anna skiing", "fireworks New York", "fishing Scotland"]
+    modes = ["keyword"] + (["semantic", "hybrid"] if search.semantic else [])
+    for mode in modes:
+        for patient in (None, "patient-42"):
+            timings = []
+            for i in range(queries):
+                start = time.perf_counter()
+                search.search(samples[i % len(samples)], patient_name=patient, mode=mode)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            scope = "one patient" if patient else "all patients"
+            print(f"{mode:8s} {scope:13s} p50 {statistics.median(timings):6.2f} ms, "
+                  f"p95 {timings[int(0.95 * (len(timings) - 1))]:6.2f} ms")
+    for hit in search.search("Austira snowmen", limit=3):
+        print(f"  {hit['score']:.4f} {hit['image_filename']}: {hit['memory_note']}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
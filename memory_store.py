@@ -0,0 +1,275 @@
+import json
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+
+from durable import FileLock, GroupCommit, atomic_write
+
+log = logging.getLogger(__name__)
+
+
+MEMORY_COLUMNS = [
+    'image_filename', 'patient_name', 'memory_note',
+    'created_date', 'conversation_id'
+]
+
+# Kept alongside the exported columns: the raw patient responses and whether
+# the AI summary in memory_note has been filled in yet
+STORED_COLUMNS = MEMORY_COLUMNS + ['raw_transcript', 'summary_status']
+
+
+class MemoryStore(ABC):
+    """
+    Storage backend for patient memories, keyed on (patient_name, image_filename).
+    Subclasses provide the actual persistence; xlsx is only used for import/export.
+    Listeners are told which (patient_name, image_filename) keys changed after
+    every write, so indexes such as memory_search can update incrementally.
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _notify(self, keys):
+        for callback in self._listeners:
+            try:
+                callback(keys)
+            except Exception as e:
+                log.warning(f"⚠️ Memory listener failed: {e}")
+
+    @abstractmethod
+    def save(self, patient_name, image_filename, memory_note, conversation_id, created_date=None,
+             raw_transcript=None, summary_status='done'):
+        pass
+
+    @abstractmethod
+    def update_summary(self, patient_name, image_filename, conversation_id, memory_note, summary_status='done'):
+        """
+        Fill in the summary for a saved conversation, unless a newer conversation
+        has replaced it. A memory_note of None only updates the status.
+        """
+
+    @abstractmethod
+    def get(self, patient_name, image_filename):
+        pass
+
+    @abstractmethod
+    def pending_summaries(self):
+        """Records still waiting for their AI summary (summary_status 'pending')."""
+
+    def save_many(self, records):
+        for record in records:
+            self.save(**record)
+
+    @abstractmethod
+    def count(self):
+        pass
+
+    @abstractmethod
+    def all(self):
+        pass
+
+    def close(self):
+        pass
+
+    def import_xlsx(self, xlsx_file):
+        import pandas as pd
+        memories_df = pd.read_excel(xlsx_file)
+        records = []
+        for record in memories_df.to_dict('records'):
+            if not isinstance(record.get('patient_name'), str) or not isinstance(record.get('image_filename'), str):
+                continue
+            records.append({
+                'patient_name': record['patient_name'],
+                'image_filename': record['image_filename'],
+                'memory_note': str(record.get('memory_note', '')),
+                'conversation_id': str(record.get('conversation_id', '')),
+                'created_date': str(record.get('created_date', '')),
+            })
+        self.save_many(records)
+        return len(records)
+
+    def export_xlsx(self, xlsx_file):
+        import pandas as pd
+        df = pd.DataFrame(list(self.all()), columns=MEMORY_COLUMNS)
+        # Written beside the workbook and renamed over it, so a crash never leaves it half-written
+        with FileLock(f"{xlsx_file}.lock"):
+            atomic_write(xlsx_file, lambda tmp_path: df.to_excel(tmp_path, index=False))
+        return len(df)
+
+
+class SqliteMemoryStore(MemoryStore):
+    """
+    SQLite store in WAL mode, safe to share between threads and processes.
+    Every commit is fsynced (synchronous=FULL); concurrent saves are grouped
+    into one transaction so they share that fsync. Writers in other processes
+    wait up to busy_timeout seconds for the write lock instead of failing.
+    Reads use their own connection and never wait behind a commit.
+    """
+
+    def __init__(self, db_file, busy_timeout=30.0):
+        super().__init__()
+        self.db_file = str(db_file)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, timeout=busy_timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS memories (
+                patient_name TEXT NOT NULL,
+                image_filename TEXT NOT NULL,
+                memory_note TEXT NOT NULL,
+                created_date TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                raw_transcript TEXT,
+                summary_status TEXT NOT NULL DEFAULT 'done',
+                PRIMARY KEY (patient_name, image_filename)
+            )
+        """)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(memories)")}
+        if 'raw_transcript' not in existing:
+            self._conn.execute("ALTER TABLE memories ADD COLUMN raw_transcript TEXT")
+        if 'summary_status' not in existing:
+            self._conn.execute("ALTER TABLE memories ADD COLUMN summary_status TEXT NOT NULL DEFAULT 'done'")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(self.db_file, timeout=busy_timeout, check_same_thread=False)
+        self._commits = GroupCommit(self._write_rows)
+
+    _UPSERT_SQL = """
+        INSERT INTO memories (patient_name, image_filename, memory_note, created_date, conversation_id,
+                              raw_transcript, summary_status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (patient_name, image_filename) DO UPDATE SET
+            memory_note = excluded.memory_note,
+            created_date = excluded.created_date,
+            conversation_id = excluded.conversation_id,
+            raw_transcript = excluded.raw_transcript,
+            summary_status = excluded.summary_status
+    """
+
+    _SELECT_SQL = (
+        "SELECT image_filename, patient_name, memory_note, created_date, conversation_id, "
+        "raw_transcript, summary_status FROM memories"
+    )
+
+    @staticmethod
+    def _to_record(row):
+        record = dict(zip(STORED_COLUMNS, row))
+        record['raw_transcript'] = json.loads(record['raw_transcript']) if record['raw_transcript'] else None
+        return record
+
+    def save(self, patient_name, image_filename, memory_note, conversation_id, created_date=None,
+             raw_transcript=None, summary_status='done'):
+        self.save_many([{
+            'patient_name': patient_name,
+            'image_filename': image_filename,
+            'memory_note': memory_note,
+            'conversation_id': conversation_id,
+            'created_date': created_date,
+            'raw_transcript': raw_transcript,
+            'summary_status': summary_status,
+        }])
+
+    def save_many(self, records):
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [
+            (r['patient_name'], r['image_filename'], r['memory_note'],
+             r.get('created_date') or now, r['conversation_id'],
+             json.dumps(r['raw_transcript']) if r.get('raw_transcript') is not None else None,
+             r.get('summary_status') or 'done')
+            for r in records
+        ]
+        self._commits.submit(rows)
+        self._notify([(r[0], r[1]) for r in rows])
+
+    def _write_rows(self, rows):
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany(self._UPSERT_SQL, rows)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def update_summary(self, patient_name, image_filename, conversation_id, memory_note, summary_status='done'):
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE memories SET memory_note = COALESCE(?, memory_note), summary_status = ? "
+                "WHERE patient_name = ? AND image_filename = ? AND conversation_id = ?",
+                (memory_note, summary_status, patient_name, image_filename, conversation_id)
+            )
+            self._conn.commit()
+        if cursor.rowcount > 0:
+            self._notify([(patient_name, image_filename)])
+        return cursor.rowcount > 0
+
+    def _read(self, sql, params=()):
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def get(self, patient_name, image_filename):
+        rows = self._read(
+            self._SELECT_SQL + " WHERE patient_name = ? AND image_filename = ?",
+            (patient_name, image_filename)
+        )
+        if not rows:
+            return None
+        return self._to_record(rows[0])
+
+    def pending_summaries(self):
+        return [self._to_record(row) for row in self._read(self._SELECT_SQL + " WHERE summary_status = 'pending'")]
+
+    def count(self):
+        return self._read("SELECT COUNT(*) FROM memories")[0][0]
+
+    def all(self):
+        rows = self._read(self._SELECT_SQL + " ORDER BY created_date")
+        for row in rows:
+            yield self._to_record(row)
+
+    def get_meta(self, key):
+        rows = self._read("SELECT value FROM store_meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO store_meta VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, str(value))
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock, self._read_lock:
+            self._reader.close()
+            self._conn.close()
+
+
+def open_memory_store(db_file, legacy_xlsx_file=None):
+    """
+    Open the memory database, migrating an existing xlsx workbook into it
+    while it is still empty. The import is one transaction and is recorded
+    once done, so an interrupted migration is simply retried on the next start.
+    """
+    store = SqliteMemoryStore(db_file)
+    if legacy_xlsx_file and Path(legacy_xlsx_file).exists() and store.get_meta('legacy_import') is None:
+        if store.count():
+            store.set_meta('legacy_import', 'skipped, database already had memories')
+            return store
+        try:
+            with FileLock(f"{db_file}.migrate.lock"):
+                if store.count() == 0:
+                    imported = store.import_xlsx(legacy_xlsx_file)
+                    store.set_meta('legacy_import', f"{legacy_xlsx_file}: {imported} memories")
+                    log.info(f"📊 Migrated {imported} memories from {legacy_xlsx_file} to {db_file}")
+        except Exception as e:
+            log.warning(f"⚠️ Could not migrate {legacy_xlsx_file}: {e}")
+    return store
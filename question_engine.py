@@ -0,0 +1,262 @@
+import functools
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from conversation_engine import DEFAULT_QUESTIONS
+from summary_cache import SummaryCache, normalize_responses
+from telemetry import TELEMETRY
+
+log = logging.getLogger(__name__)
+
+QUESTION_PROMPT_TEMPLATE = """You are gently talking with a person living with dementia about one of their photos.
+
+About the photo: {descriptor}
+What they told you about it last time: {memory}
+What they have said so far today: {answers}
+
+Write {count} short, warm questions to ask next, building on what they said. Ask about feelings, people, places and senses, never test their memory (no "do you remember"). One question per line, no numbering, at most 20 words each."""
+
+# Camera-generated file names (IMG_1234, DSC00012, PXL_20210714_...) say nothing about the photo
+_CAMERA_NAME = re.compile(r"^(img|dsc|dscn|dcim|pxl|mvimg|photo|image|scan|screenshot)$", re.IGNORECASE)
+_NAME_SPLIT = re.compile(r"[\s_\-.()]+")
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_MONTHS = ("January", "February", "March", "April", "May", "June", "July",
+           "August", "September", "October", "November", "December")
+
+
+@functools.lru_cache(maxsize=4096)
+def describe_photo(rel_path, taken_at=None):
+    """
+    Short text about a photo from what the catalog already indexed: the
+    words in its file and folder names and its EXIF capture date. Cached,
+    since the same photos come up in every session.
+    """
+    parts = rel_path.replace("\\", "/").split("/")
+    words = []
+    for part in parts[1:-1] + [parts[-1].rsplit(".", 1)[0]]:
+        words.extend(w for w in _NAME_SPLIT.split(part) if w.isalpha() and not _CAMERA_NAME.match(w))
+    description = f"a photo of {' '.join(words).lower()}" if words else "a personal photo"
+    if taken_at and len(taken_at) >= 7 and taken_at[:4].isdigit() and taken_at[5:7].isdigit():
+        month = int(taken_at[5:7])
+        when = f"{_MONTHS[month - 1]} {taken_at[:4]}" if 1 <= month <= 12 else taken_at[:4]
+        description += f", taken in {when}"
+    return description
+
+
+def parse_questions(text, limit):
+    """One question per line, with list markers and quotes stripped; lines that are not questions are dropped."""
+    questions = []
+    for line in text.splitlines():
+        line = _LIST_MARKER.sub("", line).strip().strip('"').strip()
+        if line.endswith("?") and 3 <= len(line.split()) <= 30 and line not in questions:
+            questions.append(line)
+    return questions[:limit]
+
+
+class QuestionEngine:
+    """
+    Generates photo questions with the LLM from the patient's answers so far,
+    the prior memory for the photo and the photo's descriptor. Every
+    generation goes through a persistent cache keyed on its inputs, so the
+    opening questions for a photo (which only depend on the photo and the
+    last memory) are generated once and reused across sessions. One engine
+    is shared by all sessions; plan() starts a conversation's questions.
+    """
+
+    def __init__(self, chat, model, cache, static_questions=None, budget_ms=800, candidates=3, workers=2):
+        self.chat = chat
+        self.model = model
+        self.cache = cache
+        self.static_questions = list(static_questions or DEFAULT_QUESTIONS)
+        self.budget_ms = budget_ms
+        self.candidates = candidates
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="questions")
+
+    def _generate(self, descriptor, memory, answers):
+        answers = list(answers)
+        key = SummaryCache.make_key(
+            [descriptor, memory or ""] + answers, QUESTION_PROMPT_TEMPLATE, self.model, count=self.candidates
+        )
+
+        def generate():
+            prompt = QUESTION_PROMPT_TEMPLATE.format(
+                descriptor=descriptor,
+                memory=memory or "nothing yet, this is the first time",
+                answers=" | ".join(answers) or "nothing yet",
+                count=self.candidates,
+            )
+            with TELEMETRY.span("llm", model=self.model, purpose="questions"):
+                reply = self.chat([{"role": "user", "content": prompt}], temperature=0.5, max_tokens=200)
+            questions = parse_questions(reply, self.candidates)
+            if not questions:
+                # Raising keeps an unusable reply out of the cache
+                raise ValueError(f"No questions in LLM reply: {reply[:80]!r}")
+            return json.dumps(questions)
+
+        return json.loads(self.cache.get_or_compute(key, generate))
+
+    def submit(self, descriptor, memory, answers):
+        return self._pool.submit(self._generate, descriptor, memory, tuple(answers))
+
+    def warm(self, descriptor, memory=None):
+        """Start generating a photo's opening questions ahead of its conversation (e.g. for the next album photo)."""
+        return self.submit(descriptor, memory, ())
+
+    def plan(self, descriptor, memory=None, trace=None):
+        return QuestionPlan(self, descriptor, memory, trace)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class QuestionPlan:
+    """
+    The questions of one conversation, served through the `ask` port.
+    Generation runs ahead of the conversation: the opening set while the
+    greeting plays, and the set that follows an answer as soon as it is
+    heard (heard()), during emotion detection and the acknowledgement.
+    ask() then waits at most the latency budget. A late set keeps going in
+    the background and is the speculative pick for the next question; with
+    nothing usable in time, the static question is asked.
+    """
+
+    def __init__(self, engine, descriptor, memory, trace=None):
+        self.engine = engine
+        self.descriptor = descriptor
+        self.memory = memory
+        self.trace = trace
+        self.asked = []
+        self.sources = []
+        self._answers = []
+        self._lock = threading.Lock()
+        # The opening set only depends on the photo, so it is often cached already
+        self._pending = {(): engine.warm(descriptor, memory)}
+        self._speculative = None
+
+    def heard(self, answer):
+        """Start generating the questions that follow `answer` before the conversation asks for them."""
+        with self._lock:
+            self._answers.append(answer)
+            self._request(tuple(self._answers))
+
+    def _request(self, answers):
+        future = self._pending.get(answers)
+        if future is None:
+            future = self._pending[answers] = self.engine.submit(self.descriptor, self.memory, answers)
+        return future
+
+    def _wait(self, future, deadline):
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FutureTimeout:
+            return None
+        except Exception as e:
+            log.debug(f"Question generation failed: {e}")
+            return None
+
+    def _best(self, candidates, answer=None):
+        # A speculative set was written before the latest answer; prefer the candidate sharing most words with it
+        answer_words = set(normalize_responses([answer])[0].split()) if answer else set()
+        best, best_score = None, -1
+        for question in candidates or ():
+            if question in self.asked:
+                continue
+            score = len(answer_words & set(normalize_responses([question])[0].split()))
+            if score > best_score:
+                best, best_score = question, score
+        return best
+
+    def ask(self, index, responses):
+        start = time.perf_counter()
+        deadline = start + self.engine.budget_ms / 1000
+        answers = tuple(responses)
+        with self._lock:
+            current = self._request(answers)
+            speculative, self._speculative = self._speculative, current
+        question, source = self._best(self._wait(current, deadline)), "opening" if not answers else "generated"
+        if question is None and speculative is not None and speculative.done():
+            question, source = self._best(self._wait(speculative, deadline), answers[-1] if answers else None), "speculative"
+        if question is None:
+            static = self.engine.static_questions
+            question, source = static[min(index, len(static) - 1)], "static"
+        self.asked.append(question)
+        self.sources.append(source)
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.trace is not None:
+            self.trace.record("question", elapsed, source=source)
+        log.debug(f"❓ Question {index + 1} ({source}, {elapsed:.0f} ms): {question}")
+        return question
+
+    def close(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._speculative = None
+        for future in pending.values():
+            future.cancel()
+
+
+def _stub_reply(payload):
+    # Stand-in for the LLM: questions that pick up the last thing the patient said
+    prompt = payload["messages"][-1]["content"]
+    answers = prompt.split("What they have said so far today: ", 1)[1].split("\n", 1)[0]
+    last = answers.split(" | ")[-1].strip()
+    topic = " ".join(last.split()[-3:]) if last and last != "nothing yet" else "this photo"
+    return "\n".join([
+        f"1. What do you enjoy most about {topic}?",
+        f"2. Who was with you for {topic}?",
+        f"3. How did {topic} make you feel?",
+    ])
+
+
+def benchmark(delays=(0.05, 0.5, 2.0), budget_ms=800, sessions=20):
+    """Run the sample scripts against a local stub LLM at several response delays; report ask() latency and sources."""
+    import os
+    import tempfile
+
+    from conversation_engine import SAMPLE_SCRIPTS, ConversationEngine, ScriptedPorts, detect_text_emotion
+    from llm_client import LLMClient, StubLLMServer
+
+    for delay in delays:
+        with StubLLMServer(reply=_stub_reply, delay=delay) as stub:
+            client = LLMClient("stub", stub.url, max_retries=0)
+            cache = SummaryCache(os.path.join(tempfile.mkdtemp(prefix="meemo_questions_"), "question_cache.db"))
+            engine = QuestionEngine(client.chat, "stub", cache, budget_ms=budget_ms, workers=4)
+            latencies, sources = [], {}
+            for i in range(sessions):
+                plan = engine.plan(describe_photo(f"beach_holiday_{i % 4}.jpg", "1998-07-14 10:00:00"))
+                ports = ScriptedPorts(SAMPLE_SCRIPTS[i % len(SAMPLE_SCRIPTS)], detect_text_emotion)
+                record = ports.on_event
+
+                def on_event(kind, plan=plan, record=record, **data):
+                    if kind == "emotion":
+                        plan.heard(data["text"])
+                    record(kind, **data)
+
+                def ask(index, responses, plan=plan):
+                    start = time.perf_counter()
+                    question = plan.ask(index, responses)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    return question
+
+                ports.on_event, ports.ask = on_event, ask
+                ConversationEngine("patient", "photo.jpg", ports, engine.static_questions).run()
+                for source in plan.sources:
+                    sources[source] = sources.get(source, 0) + 1
+                plan.close()
+            engine.close()
+            client.close()
+            cache.close()
+        latencies.sort()
+        print(f"LLM delay {delay * 1000:5.0f} ms: {len(latencies)} questions, ask() p50 "
+              f"{latencies[len(latencies) // 2]:6.1f} ms, max {latencies[-1]:6.1f} ms "
+              f"(budget {budget_ms} ms), sources {sources}, {len(stub.requests)} LLM calls")
+
+
+if __name__ == "__main__":
+    benchmark()
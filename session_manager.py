@@ -0,0 +1,237 @@
+import json
+import logging
+import select
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from conversation_engine import ConversationCancelled, EndpointClosed
+from startup import lazy_import
+from stt_engines import load_wav
+
+log = logging.getLogger(__name__)
+
+sr = lazy_import("speech_recognition")
+
+
+class AudioEndpoint(ABC):
+    """
+    Speech I/O for one conversation session. say() plays a prompt to the
+    patient; hear() returns their reply as text, or TIMEOUT / UNCLEAR / ERROR
+    like GeneralizedDementiaCareAgent.listen().
+    """
+
+    analyze = None
+    # Future for the acoustic analysis of the last reply, when the endpoint has its audio
+    last_acoustic = None
+
+    def attach_analyzer(self, analyze):
+        self.analyze = analyze
+
+    @abstractmethod
+    def say(self, text):
+        pass
+
+    @abstractmethod
+    def hear(self, timeout=30):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileEndpoint(AudioEndpoint):
+    """
+    Replays recorded WAV clips (or AudioData) as the patient's side of the
+    conversation, recognizing each through `transcribe` on a shared STT pool.
+    Everything the AI says is recorded in `spoken`.
+    """
+
+    def __init__(self, clips, transcribe, stt_pool=None, speech_delay=0.0):
+        self.clips = [load_wav(clip) if isinstance(clip, (str, Path)) else clip for clip in clips]
+        self.transcribe = transcribe
+        self.stt_pool = stt_pool
+        self.speech_delay = speech_delay
+        self.spoken = []
+        self.heard = []
+        self._position = 0
+
+    def say(self, text):
+        self.spoken.append(text)
+        if self.speech_delay:
+            time.sleep(self.speech_delay)
+
+    def hear(self, timeout=30):
+        if self._position >= len(self.clips):
+            raise EndpointClosed("recorded script finished")
+        audio = self.clips[self._position]
+        self._position += 1
+        self.last_acoustic = self.analyze(audio) if self.analyze is not None else None
+        try:
+            if self.stt_pool is not None:
+                text = self.stt_pool.submit(self.transcribe, audio).result(timeout=timeout)
+            else:
+                text = self.transcribe(audio)
+        except sr.UnknownValueError:
+            text = "UNCLEAR"
+        except Exception:
+            text = "ERROR"
+        self.heard.append(text)
+        return text
+
+
+class SocketEndpoint(AudioEndpoint):
+    """
+    Stand-in for a room device reached over TCP. Prompts are sent as JSON
+    lines {"say": text}; the room answers with {"heard": text} lines carrying
+    its own recognition result (or TIMEOUT / UNCLEAR / ERROR).
+    """
+
+    def __init__(self, host, port, connect_timeout=5):
+        self._sock = socket.create_connection((host, port), timeout=connect_timeout)
+        # Lines are buffered here rather than through makefile(), whose reader is unusable after one timeout
+        self._buffer = b""
+        self._lock = threading.Lock()
+
+    def say(self, text):
+        with self._lock:
+            self._sock.sendall((json.dumps({"say": text}) + "\n").encode("utf-8"))
+
+    def hear(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "TIMEOUT"
+            try:
+                ready, _, _ = select.select([self._sock], [], [], remaining)
+                if not ready:
+                    return "TIMEOUT"
+                data = self._sock.recv(4096)
+            except (OSError, ValueError) as e:
+                raise EndpointClosed(f"room connection lost: {e}")
+            if not data:
+                raise EndpointClosed("room disconnected")
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        try:
+            return json.loads(line.decode("utf-8")).get("heard") or "UNCLEAR"
+        except (ValueError, AttributeError):
+            return "ERROR"
+
+    def close(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class Session:
+    def __init__(self, session_id, patient_name, image_filename, endpoint, agent):
+        self.session_id = session_id
+        self.patient_name = patient_name
+        self.image_filename = image_filename
+        self.endpoint = endpoint
+        self.agent = agent
+        self.status = "queued"
+        self.conversation_id = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def cancel(self):
+        self.agent.cancel_event.set()
+
+
+class SessionManager:
+    """
+    Runs many independent conversation sessions from one process. Each session
+    gets its own agent and audio endpoint; memory storage, the summary queue
+    and cache, the LLM client, the TTS cache and the speech recognizer are
+    shared from `base_agent`. At most `max_sessions` conversations run at once
+    and recognition for file endpoints goes through one bounded STT pool.
+    """
+
+    def __init__(self, base_agent, max_sessions=8, stt_workers=4):
+        self.base_agent = base_agent
+        self._session_pool = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="session")
+        self.stt_pool = ThreadPoolExecutor(max_workers=stt_workers, thread_name_prefix="session-stt")
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def file_endpoint(self, clips, speech_delay=0.0):
+        return FileEndpoint(clips, self.base_agent.stt_engine.transcribe, stt_pool=self.stt_pool,
+                            speech_delay=speech_delay)
+
+    def start_session(self, patient_name, image_filename, endpoint):
+        session_id = uuid.uuid4().hex[:8]
+        agent = self.base_agent.spawn_session(endpoint)
+        session = Session(session_id, patient_name, image_filename, endpoint, agent)
+        with self._lock:
+            self._sessions[session_id] = session
+        session.future = self._session_pool.submit(self._run, session)
+        return session
+
+    def _run(self, session):
+        session.status = "running"
+        session.started_at = time.perf_counter()
+        try:
+            session.conversation_id = session.agent.start_conversation(
+                session.patient_name, session.image_filename
+            )
+            session.status = "completed"
+        except ConversationCancelled as e:
+            session.status = "cancelled"
+            session.error = e
+        except Exception as e:
+            session.status = "failed"
+            session.error = e
+            log.error(f"❌ Session {session.session_id} failed: {e}")
+        finally:
+            session.finished_at = time.perf_counter()
+            session.endpoint.close()
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    def cancel(self, session_id):
+        session = self.get(session_id)
+        if session is not None:
+            session.cancel()
+            if session.future.cancel():
+                session.status = "cancelled"
+
+    def cancel_all(self):
+        for session in self.sessions():
+            self.cancel(session.session_id)
+
+    def wait_all(self, timeout=None):
+        for session in self.sessions():
+            try:
+                session.future.result(timeout=timeout)
+            except Exception:
+                pass
+        return self.sessions()
+
+    def shutdown(self, cancel=False):
+        if cancel:
+            self.cancel_all()
+        self._session_pool.shutdown(wait=True)
+        self.stt_pool.shutdown(wait=True)
@@ -0,0 +1,272 @@
+import importlib.util
+import json
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from startup import lazy_import
+
+np = lazy_import("numpy") if importlib.util.find_spec("numpy") is not None else None
+
+FRAME_MS = 40
+HOP_MS = 10
+MIN_PITCH_HZ = 75
+MAX_PITCH_HZ = 400
+# Frames quieter than this (dB relative to full scale) are treated as silence
+SPEECH_FLOOR_DB = -45.0
+# A new syllable starts when the energy rises this far above the last dip
+SYLLABLE_RISE_DB = 6.0
+
+FEATURES = ["energy_db", "pitch_st", "pitch_std_st", "speaking_rate"]
+
+
+def available():
+    return np is not None
+
+
+class ProsodyExtractor:
+    """
+    Streaming prosody features: feed() 16-bit PCM chunks as they arrive and
+    finish() returns loudness, pitch (autocorrelation per voiced frame),
+    pitch variability and speaking rate (energy-envelope syllable peaks).
+    Frames are processed a chunk at a time with vectorized NumPy, so memory
+    stays bounded for long utterances.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * FRAME_MS / 1000)
+        self.hop = int(sample_rate * HOP_MS / 1000)
+        self.min_lag = max(1, int(sample_rate / MAX_PITCH_HZ))
+        self.max_lag = min(self.frame - 1, int(sample_rate / MIN_PITCH_HZ))
+        self._fft_size = 1 << (2 * self.frame - 1).bit_length()
+        self._window = np.hanning(self.frame).astype(np.float32)
+        # Autocorrelation of the window itself, to undo its taper at longer lags (Boersma 1993)
+        window_spectrum = np.fft.rfft(self._window, n=self._fft_size)
+        window_autocorr = np.fft.irfft(window_spectrum * np.conj(window_spectrum), n=self._fft_size)
+        self._window_autocorr = (window_autocorr[:self.max_lag + 1] / window_autocorr[0]).astype(np.float32)
+        self._tail = np.zeros(0, dtype=np.float32)
+        self.frames = 0
+        self.speech_frames = 0
+        self._energy = []
+        self._pitch_st = []
+        self._syllables = 0
+        self._turn_db = None
+        self._rising = False
+
+    def feed(self, pcm16):
+        samples = np.frombuffer(pcm16, dtype="<i2").astype(np.float32) / 32768.0
+        samples = np.concatenate([self._tail, samples])
+        if len(samples) < self.frame:
+            self._tail = samples
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.frame)[::self.hop]
+        consumed = len(frames) * self.hop
+        self._tail = samples[consumed:]
+        self._process(frames)
+
+    def _process(self, frames):
+        self.frames += len(frames)
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10
+        energy_db = 20 * np.log10(rms)
+        speech = energy_db > SPEECH_FLOOR_DB
+        self.speech_frames += int(speech.sum())
+        self._energy.extend(energy_db[speech].tolist())
+        self._count_syllables(energy_db)
+        if speech.any():
+            self._pitch(frames[speech])
+
+    def _pitch(self, frames):
+        windowed = (frames - frames.mean(axis=1, keepdims=True)) * self._window
+        spectrum = np.fft.rfft(windowed, n=self._fft_size, axis=1)
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum), n=self._fft_size, axis=1)[:, :self.max_lag + 1]
+        normalized = autocorr / (autocorr[:, :1] + 1e-10) / self._window_autocorr
+        search = normalized[:, self.min_lag:self.max_lag + 1]
+        # Take the shortest lag that is nearly as strong as the best one, so
+        # the period is not mistaken for a multiple of itself (octave errors)
+        peak = search.max(axis=1, keepdims=True)
+        candidates = (search >= 0.9 * peak) & (search > np.roll(search, 1, axis=1)) & (search >= np.roll(search, -1, axis=1))
+        best = np.where(candidates.any(axis=1), np.argmax(candidates, axis=1), np.argmax(search, axis=1))
+        strength = search[np.arange(len(best)), best]
+        voiced = strength > 0.45
+        if voiced.any():
+            lags = (best[voiced] + self.min_lag).astype(np.float32)
+            self._pitch_st.extend((12 * np.log2(self.sample_rate / lags / 100.0)).tolist())
+
+    def _count_syllables(self, energy_db):
+        # Hysteresis over the loudness envelope: a rise of SYLLABLE_RISE_DB above
+        # the last dip starts a syllable, a fall of the same amount ends it
+        for value in energy_db.tolist():
+            if self._turn_db is None:
+                self._turn_db = value
+            if self._rising:
+                if value > self._turn_db:
+                    self._turn_db = value
+                elif value < self._turn_db - SYLLABLE_RISE_DB:
+                    self._rising = False
+                    self._turn_db = value
+            else:
+                if value < self._turn_db:
+                    self._turn_db = value
+                elif value > self._turn_db + SYLLABLE_RISE_DB and value > SPEECH_FLOOR_DB:
+                    self._rising = True
+                    self._syllables += 1
+                    self._turn_db = value
+
+    def finish(self):
+        speech_seconds = self.speech_frames * self.hop / self.sample_rate
+        energy = np.array(self._energy) if self._energy else np.array([SPEECH_FLOOR_DB])
+        pitch = np.array(self._pitch_st) if self._pitch_st else None
+        return {
+            "duration": round(self.frames * self.hop / self.sample_rate, 3),
+            "speech_ratio": round(self.speech_frames / self.frames, 3) if self.frames else 0.0,
+            "energy_db": float(energy.mean()),
+            "energy_std_db": float(energy.std()),
+            "pitch_hz": float(100 * 2 ** (np.median(pitch) / 12)) if pitch is not None else None,
+            "pitch_st": float(np.median(pitch)) if pitch is not None else None,
+            "pitch_std_st": float(pitch.std()) if pitch is not None else 0.0,
+            "speaking_rate": self._syllables / speech_seconds if speech_seconds else 0.0,
+        }
+
+
+def extract_features(audio, chunk_seconds=0.5):
+    """Prosody features of a SpeechRecognition AudioData, fed through the extractor in chunks."""
+    pcm = audio.get_raw_data(convert_width=2)
+    extractor = ProsodyExtractor(audio.sample_rate)
+    step = int(audio.sample_rate * chunk_seconds) * 2
+    for start in range(0, len(pcm), step):
+        extractor.feed(pcm[start:start + step])
+    return extractor.finish()
+
+
+class AcousticEmotionModel:
+    """
+    Nearest-centroid classifier over how an utterance differs from the
+    speaker's own baseline: louder or quieter, higher or lower pitched, more
+    or less melodic, faster or slower. Centroids and scales can be replaced
+    from a JSON file ({"scales": {...}, "centroids": {label: {...}}}).
+    """
+
+    SCALES = {"energy_db": 3.0, "pitch_st": 1.5, "pitch_std_st": 1.0, "speaking_rate": 0.7}
+    CENTROIDS = {
+        "neutral": {"energy_db": 0.0, "pitch_st": 0.0, "pitch_std_st": 0.0, "speaking_rate": 0.0},
+        "happy": {"energy_db": 4.0, "pitch_st": 2.0, "pitch_std_st": 1.5, "speaking_rate": 0.5},
+        "angry": {"energy_db": 7.0, "pitch_st": 1.0, "pitch_std_st": 0.0, "speaking_rate": 0.5},
+        "sad": {"energy_db": -5.0, "pitch_st": -1.5, "pitch_std_st": -1.0, "speaking_rate": -1.0},
+        "fear": {"energy_db": -1.0, "pitch_st": 3.0, "pitch_std_st": 1.0, "speaking_rate": 1.0},
+    }
+
+    def __init__(self, scales=None, centroids=None):
+        self.scales = scales or self.SCALES
+        self.centroids = centroids or self.CENTROIDS
+
+    @classmethod
+    def load(cls, model_file):
+        with open(model_file, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(scales=data.get("scales"), centroids=data.get("centroids"))
+
+    def predict(self, deltas):
+        """(label, confidence) from feature deltas, confidence being a softmax over centroid distances."""
+        scores = {}
+        for label, centroid in self.centroids.items():
+            distance = sum(((deltas[name] - centroid[name]) / self.scales[name]) ** 2 for name in FEATURES)
+            scores[label] = math.exp(-distance / 2)
+        total = sum(scores.values())
+        if not total:
+            return "neutral", 0.0
+        label = max(scores, key=scores.get)
+        return label, scores[label] / total
+
+
+class AcousticEmotionAnalyzer:
+    """
+    Estimates emotion from the captured audio itself. submit(audio) starts
+    the analysis on `executor` and returns a Future, so it runs while speech
+    recognition is still busy with the same clip. Each analyzer keeps the
+    speaker's running baseline (reset() for a new patient); the first
+    utterances establish it and are reported as neutral.
+    """
+
+    def __init__(self, executor=None, model=None, baseline_weight=0.2, warmup_utterances=2):
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="speech-emotion")
+        self.model = model or AcousticEmotionModel()
+        self.baseline_weight = baseline_weight
+        self.warmup_utterances = warmup_utterances
+        self._lock = threading.Lock()
+        self._baseline = None
+        self._utterances = 0
+
+    def reset(self):
+        with self._lock:
+            self._baseline = None
+            self._utterances = 0
+
+    def submit(self, audio):
+        return self.executor.submit(self.analyze, audio)
+
+    def analyze(self, audio):
+        features = extract_features(audio)
+        if features["pitch_st"] is None or features["speech_ratio"] < 0.1:
+            return {"emotion": "neutral", "confidence": 0.0, "features": features}
+        with self._lock:
+            if self._baseline is None:
+                self._baseline = {name: features[name] for name in FEATURES}
+            deltas = {name: features[name] - self._baseline[name] for name in FEATURES}
+            for name in FEATURES:
+                self._baseline[name] += self.baseline_weight * deltas[name]
+            self._utterances += 1
+            warming_up = self._utterances <= self.warmup_utterances
+        if warming_up:
+            return {"emotion": "neutral", "confidence": 0.0, "features": features}
+        emotion, confidence = self.model.predict(deltas)
+        return {"emotion": emotion, "confidence": round(confidence, 3), "features": features}
+
+
+def fuse_emotions(text_emotion, acoustic, min_confidence=0.55):
+    """
+    Combine the transcript's emotion with the acoustic estimate. Words are the
+    stronger signal: a clear text emotion wins; the voice decides only when
+    the words are neutral and the acoustic model is confident.
+    """
+    if text_emotion != "neutral" or not acoustic:
+        return text_emotion
+    if acoustic["emotion"] != "neutral" and acoustic["confidence"] >= min_confidence:
+        return acoustic["emotion"]
+    return text_emotion
+
+
+def benchmark(fixtures_dir, repeat=20):
+    """Feature extraction speed (and real-time factor) on the fixture WAVs."""
+    import time
+    from pathlib import Path
+
+    from stt_engines import audio_duration, load_wav
+
+    clips = [(path.name, load_wav(path)) for path in sorted(Path(fixtures_dir).glob("*.wav"))]
+    if not clips:
+        print(f"No .wav fixtures found in {fixtures_dir}")
+        return
+    total_audio = total_time = 0.0
+    for name, audio in clips:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            features = extract_features(audio)
+        elapsed = (time.perf_counter() - start) / repeat
+        duration = audio_duration(audio)
+        total_audio += duration
+        total_time += elapsed
+        pitch = f"{features['pitch_hz']:.0f} Hz" if features["pitch_hz"] else "unvoiced"
+        print(f"{name:16s} {duration:5.2f}s audio in {elapsed * 1000:6.2f} ms  "
+              f"pitch {pitch}, {features['speaking_rate']:.1f} syllables/s, {features['energy_db']:.1f} dBFS")
+    print(f"Real-time factor {total_time / total_audio:.4f} ({total_audio / total_time:.0f}x faster than real time)")
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    if not available():
+        print("NumPy is not installed; acoustic emotion analysis is disabled")
+        sys.exit(1)
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else os.path.join("fixtures", "audio"))
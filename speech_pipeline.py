@@ -0,0 +1,162 @@
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from startup import lazy_import
+
+pygame = lazy_import("pygame")
+
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text, min_chars=20):
+    """Split text into sentence chunks, merging fragments too short to sound natural alone."""
+    chunks = []
+    for part in _SENTENCE_END.split(text.strip()):
+        part = part.strip()
+        if not part:
+            continue
+        if chunks and len(chunks[-1]) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {part}"
+        else:
+            chunks.append(part)
+    if len(chunks) > 1 and len(chunks[-1]) < min_chars:
+        tail = chunks.pop()
+        chunks[-1] = f"{chunks[-1]} {tail}"
+    return chunks
+
+
+class SpeechHandle:
+    def __init__(self, text, chunks, lookahead):
+        self.text = text
+        self.chunks = chunks
+        self.created = time.perf_counter()
+        self.first_audio_at = None
+        self.finished_at = None
+        self.error = None
+        self.cancelled = threading.Event()
+        self._done = threading.Event()
+        self._ready = queue.Queue(maxsize=lookahead)
+
+    @classmethod
+    def completed(cls, text):
+        """A handle that is already done, for speech with nothing to play locally."""
+        handle = cls(text, [], lookahead=1)
+        handle.finished_at = handle.created
+        handle._done.set()
+        return handle
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def time_to_first_audio(self):
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.created
+
+    @property
+    def playback_time(self):
+        if self.first_audio_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.first_audio_at
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class SpeechPipeline:
+    """
+    Producer/consumer speech output. Each utterance is split into sentences;
+    sentence N+1 is synthesized on a worker thread while sentence N is playing,
+    so playback starts as soon as the first sentence is ready.
+    """
+
+    def __init__(self, tts_cache, lang='en', slow=False, lookahead=2, synth_workers=2):
+        self.tts_cache = tts_cache
+        self.lang = lang
+        self.slow = slow
+        self.lookahead = lookahead
+        self._synth_pool = ThreadPoolExecutor(max_workers=synth_workers, thread_name_prefix="tts-synth")
+        self._utterances = queue.Queue()
+        self._player = threading.Thread(target=self._play_loop, name="tts-player", daemon=True)
+        self._player.start()
+
+    def speak_async(self, text):
+        handle = SpeechHandle(text, split_sentences(text) or [text], self.lookahead)
+        self._synth_pool.submit(self._synthesize, handle)
+        self._utterances.put(handle)
+        return handle
+
+    def speak(self, text):
+        handle = self.speak_async(text)
+        handle.wait()
+        if handle.error is not None:
+            raise handle.error
+        return handle
+
+    def _synthesize(self, handle):
+        try:
+            for chunk in handle.chunks:
+                if handle.cancelled.is_set():
+                    break
+                sound = self.tts_cache.get_sound(chunk, lang=self.lang, slow=self.slow)
+                if sound is not None:
+                    handle._ready.put(("sound", sound))
+                else:
+                    audio_file = self.tts_cache.get_audio_file(chunk, lang=self.lang, slow=self.slow)
+                    handle._ready.put(("file", audio_file))
+        except Exception as e:
+            handle.error = e
+        finally:
+            handle._ready.put(None)
+
+    def _play_loop(self):
+        while True:
+            handle = self._utterances.get()
+            try:
+                while True:
+                    item = handle._ready.get()
+                    if item is None:
+                        break
+                    if handle.cancelled.is_set():
+                        continue
+                    if handle.first_audio_at is None:
+                        handle.first_audio_at = time.perf_counter()
+                    self._play(item, handle)
+            except Exception as e:
+                handle.error = e
+                handle.cancel()
+                while handle._ready.get() is not None:
+                    pass
+            finally:
+                handle.finished_at = time.perf_counter()
+                handle._done.set()
+
+    def _play(self, item, handle):
+        kind, payload = item
+        if kind == "sound":
+            channel = payload.play()
+            while channel is not None and channel.get_busy():
+                if handle.cancelled.is_set():
+                    channel.stop()
+                    return
+                pygame.time.wait(50)
+        else:
+            pygame.mixer.music.load(payload)
+            pygame.mixer.music.play()
+            while pygame.mixer.music.get_busy():
+                if handle.cancelled.is_set():
+                    pygame.mixer.music.stop()
+                    return
+                pygame.time.wait(50)
+
+    def shutdown(self):
+        self._synth_pool.shutdown(wait=False, cancel_futures=True)
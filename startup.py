@@ -0,0 +1,175 @@
+import importlib.util
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+def lazy_import(name):
+    """
+    Return a module that is only actually imported on first attribute access,
+    so heavy dependencies (pygame, speech_recognition, PIL, requests, gTTS)
+    don't slow down launching the window.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class CalibrationCache:
+    """
+    Remembers the microphone energy threshold per input device, so launches
+    reuse the last measurement instead of re-calibrating for 2 seconds.
+    Entries older than max_age are still used but flagged for refresh.
+    """
+
+    def __init__(self, cache_file="mic_calibration.json", max_age=24 * 3600):
+        self.cache_file = Path(cache_file)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, device_key):
+        with self._lock:
+            entry = self._load().get(str(device_key))
+        if entry is None:
+            return None, True
+        stale = time.time() - entry["measured_at"] > self.max_age
+        return entry["energy_threshold"], stale
+
+    def put(self, device_key, energy_threshold):
+        with self._lock:
+            entries = self._load()
+            entries[str(device_key)] = {"energy_threshold": energy_threshold, "measured_at": time.time()}
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_file, self.cache_file)
+
+
+class StartupTasks:
+    """
+    Runs named initialization steps either inline (in order) or concurrently
+    in the background, tracking which are ready and reporting progress through
+    on_progress(message).
+    """
+
+    def __init__(self, on_progress=None):
+        self.on_progress = on_progress or (lambda message: None)
+        self._tasks = []
+        self._events = {}
+        self.errors = {}
+        self.timings = {}
+        self._pool = None
+
+    def add(self, name, func):
+        self._tasks.append((name, func))
+        self._events[name] = threading.Event()
+
+    def _run_task(self, name, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            self.errors[name] = e
+            log.warning(f"⚠️ Startup step '{name}' failed: {e}")
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            self._events[name].set()
+            self.on_progress(self.status())
+
+    def run_inline(self):
+        for name, func in self._tasks:
+            self._run_task(name, func)
+
+    def run_background(self, max_workers=4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        for name, func in self._tasks:
+            self._pool.submit(self._run_task, name, func)
+        self._pool.shutdown(wait=False)
+
+    def is_ready(self, name=None):
+        if name is not None:
+            return self._events[name].is_set()
+        return all(event.is_set() for event in self._events.values())
+
+    def wait(self, names=None, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names or list(self._events):
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self._events[name].wait(remaining):
+                return False
+        return True
+
+    def status(self):
+        done = [name for name, event in self._events.items() if event.is_set()]
+        if len(done) == len(self._events):
+            failed = [name for name in done if name in self.errors]
+            if failed:
+                return f"⚠️ Ready, but {', '.join(failed)} failed to start"
+            return "✅ Ready! Enter patient name, select image, and start conversation."
+        waiting = [name for name in self._events if name not in done]
+        return f"⏳ Starting up ({len(done)}/{len(self._events)} ready) - waiting for {', '.join(waiting)}..."
+
+
+HEAVY_MODULES = ["pandas", "pygame", "speech_recognition", "gtts", "requests", "PIL.Image", "numpy"]
+
+
+def _time_import(statement, cwd):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", statement], cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, result.returncode == 0
+
+
+def benchmark(repeat=3):
+    """Time cold imports of each heavy dependency and of the app module, each in a fresh interpreter."""
+    cwd = str(Path(__file__).resolve().parent)
+    baseline = min(_time_import("pass", cwd)[0] for _ in range(repeat))
+    print(f"Interpreter start: {baseline * 1000:.0f} ms")
+    for module in HEAVY_MODULES + ["test"]:
+        runs = [_time_import(f"import {module}", cwd) for _ in range(repeat)]
+        if not all(ok for _, ok in runs):
+            print(f"{module:20s} not importable here")
+            continue
+        best = min(elapsed for elapsed, _ in runs) - baseline
+        print(f"{module:20s} {best * 1000:7.0f} ms")
+    statement = (
+        f"import os, sys, tempfile, time; sys.path.insert(0, {cwd!r}); os.chdir(tempfile.mkdtemp()); "
+        "t = time.perf_counter(); "
+        "from test import GeneralizedDementiaCareAgent; "
+        "a = GeneralizedDementiaCareAgent(api_key='x', headless=True, fast_start=True); "
+        "t1 = time.perf_counter(); a.wait_ready(); t2 = time.perf_counter(); "
+        "print(f'{(t1 - t) * 1000:.0f} {(t2 - t) * 1000:.0f}')"
+    )
+    result = subprocess.run([sys.executable, "-c", statement], cwd=cwd, capture_output=True, text=True)
+    if result.returncode == 0:
+        constructed, ready = result.stdout.strip().splitlines()[-1].split()
+        print(f"Agent (headless, fast start): constructed in {constructed} ms, fully ready in {ready} ms")
+    else:
+        print("Agent startup benchmark could not run here")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,149 @@
+"""
+Stress test for the memory store: several processes, each with many writer
+and reader threads, save, summarize and recall memories in one database at
+once. Afterwards every acknowledged write must be there with its latest
+note, and readers must never have seen a memory disappear.
+
+    python stress_test.py --processes 4 --threads 8 --saves 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+
+def expected_note(process, thread, i, summarize_every):
+    # Every summarize_every-th memory gets its summary filled in after saving
+    if summarize_every and i % summarize_every == 0:
+        return f"summary {process}-{thread}-{i}"
+    return f"note {process}-{thread}-{i}"
+
+
+def run_process(db_file, process, threads, saves, readers, summarize_every):
+    from memory_store import open_memory_store
+
+    store = open_memory_store(db_file)
+    errors = []
+    stop = threading.Event()
+    reads = [0]
+
+    def writer(thread):
+        patient = f"patient-{process}-{thread}"
+        for i in range(saves):
+            image = f"photo-{i}.jpg"
+            conversation_id = uuid.uuid4().hex
+            try:
+                store.save(patient, image, f"note {process}-{thread}-{i}", conversation_id,
+                           raw_transcript=[f"reply {i}"], summary_status='pending')
+                if summarize_every and i % summarize_every == 0:
+                    if not store.update_summary(patient, image, conversation_id, f"summary {process}-{thread}-{i}"):
+                        errors.append(f"summary for {patient}/{image} not stored")
+                record = store.get(patient, image)
+                if record is None or record["conversation_id"] != conversation_id:
+                    errors.append(f"{patient}/{image} not readable right after saving")
+            except Exception as e:
+                errors.append(f"{patient}/{image}: {e!r}")
+
+    def reader():
+        last_count = 0
+        while not stop.is_set():
+            count = store.count()
+            if count < last_count:
+                errors.append(f"memory count went down from {last_count} to {count}")
+            last_count = count
+            store.get(f"patient-{process}-0", "photo-0.jpg")
+            reads[0] += 2
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+    stats = dict(store._commits.stats)
+    store.close()
+    return {"errors": errors, "elapsed": elapsed, "reads": reads[0], "commits": stats}
+
+
+def run(processes=4, threads=8, readers=2, saves=200, summarize_every=3, db_file=None):
+    """Run the stress test and check the database afterwards; returns the results and any failures."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from memory_store import open_memory_store
+
+    db_file = db_file or os.path.join(tempfile.mkdtemp(prefix="meemo_stress_"), "memories.db")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(run_process, db_file, p, threads, saves, readers, summarize_every)
+            for p in range(processes)
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    failures = [error for result in results for error in result["errors"]]
+    store = open_memory_store(db_file)
+    records = {(r["patient_name"], r["image_filename"]): r for r in store.all()}
+    for p in range(processes):
+        for t in range(threads):
+            for i in range(saves):
+                record = records.get((f"patient-{p}-{t}", f"photo-{i}.jpg"))
+                if record is None:
+                    failures.append(f"lost patient-{p}-{t}/photo-{i}.jpg")
+                elif record["memory_note"] != expected_note(p, t, i, summarize_every):
+                    failures.append(f"stale note for patient-{p}-{t}/photo-{i}.jpg: {record['memory_note']!r}")
+    pending = len(store.pending_summaries())
+    store.close()
+    summarized = sum(1 for i in range(saves) if summarize_every and i % summarize_every == 0)
+    if pending != processes * threads * (saves - summarized):
+        failures.append(f"{pending} memories awaiting a summary, expected {processes * threads * (saves - summarized)}")
+    return {
+        "db_file": db_file,
+        "expected": processes * threads * saves,
+        "stored": len(records),
+        "pending": pending,
+        "elapsed": elapsed,
+        "reads": sum(result["reads"] for result in results),
+        "flushes": sum(result["commits"]["flushes"] for result in results),
+        "items": sum(result["commits"]["items"] for result in results),
+        "largest_batch": max(result["commits"]["largest_batch"] for result in results),
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="writer threads per process")
+    parser.add_argument("--readers", type=int, default=2, help="recall threads per process")
+    parser.add_argument("--saves", type=int, default=200, help="memories saved per writer thread")
+    parser.add_argument("--summarize-every", type=int, default=3, help="fill in the summary of every Nth memory")
+    parser.add_argument("--db", help="database file (default: a fresh temporary one)")
+    args = parser.parse_args()
+
+    result = run(args.processes, args.threads, args.readers, args.saves, args.summarize_every, args.db)
+    expected, elapsed, flushes, failures = result["expected"], result["elapsed"], result["flushes"], result["failures"]
+    print(f"{args.processes} processes x {args.threads} writers + {args.readers} readers, db {result['db_file']}")
+    print(f"Saved {expected} memories in {elapsed:.2f}s ({expected / elapsed:.0f} saves/s), {result['reads']} reads")
+    print(f"Group commit: {result['items']} saves in {flushes} transactions "
+          f"({result['items'] / flushes if flushes else 0:.1f} per fsync), "
+          f"largest batch {result['largest_batch']} writers")
+    print(f"Memories in database: {result['stored']} of {expected} expected, {result['pending']} awaiting a summary")
+    for failure in failures[:20]:
+        print(f"❌ {failure}")
+    if len(failures) > 20:
+        print(f"❌ ... and {len(failures) - 20} more")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
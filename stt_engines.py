@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import os
+import statistics
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from startup import lazy_import
+
+log = logging.getLogger(__name__)
+
+sr = lazy_import("speech_recognition")
+
+
+class RecognizerEngine(ABC):
+    """
+    Speech-to-text backend used by the agent. transcribe() returns the text or
+    raises sr.UnknownValueError / sr.RequestError like the SpeechRecognition
+    recognizers do. Latency and throughput are recorded for every call.
+    """
+
+    name = "base"
+    batch_workers = 1
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+        self._stats_lock = threading.Lock()
+        self.latencies = []
+        self.audio_seconds = 0.0
+        self.batch_clips = 0
+        self.batch_seconds = 0.0
+
+    @abstractmethod
+    def _recognize(self, audio):
+        pass
+
+    def transcribe(self, audio):
+        start = time.perf_counter()
+        try:
+            return self._recognize(audio)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.latencies.append(elapsed)
+                self.audio_seconds += audio_duration(audio)
+
+    def _transcribe_or_status(self, audio):
+        try:
+            return self.transcribe(audio)
+        except sr.UnknownValueError:
+            return "UNCLEAR"
+        except Exception as e:
+            log.warning(f"🎤 Speech error ({self.name}): {e}")
+            return "ERROR"
+
+    def transcribe_batch(self, audios):
+        """Transcribe a queue of recorded clips, returning texts (or UNCLEAR/ERROR) in order."""
+        audios = list(audios)
+        start = time.perf_counter()
+        if self.batch_workers > 1 and len(audios) > 1:
+            with ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix=f"stt-{self.name}") as pool:
+                results = list(pool.map(self._transcribe_or_status, audios))
+        else:
+            results = [self._transcribe_or_status(audio) for audio in audios]
+        with self._stats_lock:
+            self.batch_clips += len(audios)
+            self.batch_seconds += time.perf_counter() - start
+        return results
+
+    def report(self):
+        with self._stats_lock:
+            latencies = list(self.latencies)
+            report = {"engine": self.name, "calls": len(latencies)}
+            if latencies:
+                ordered = sorted(latencies)
+                report["mean_latency_ms"] = round(statistics.mean(latencies) * 1000, 1)
+                report["p95_latency_ms"] = round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1)
+                report["real_time_factor"] = round(sum(latencies) / self.audio_seconds, 3) if self.audio_seconds else None
+            if self.batch_seconds:
+                report["batch_clips_per_second"] = round(self.batch_clips / self.batch_seconds, 2)
+        return report
+
+
+class GoogleEngine(RecognizerEngine):
+    name = "google"
+    batch_workers = 4
+
+    def __init__(self, recognizer=None, timeout=10, retries=1, language="en-US"):
+        super().__init__(recognizer)
+        self.recognizer.operation_timeout = timeout
+        self.retries = retries
+        self.language = language
+
+    def _recognize(self, audio):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.recognizer.recognize_google(audio, language=self.language)
+            except sr.RequestError:
+                if attempt == self.retries:
+                    raise
+                time.sleep(0.5 * (attempt + 1))
+
+
+class SphinxEngine(RecognizerEngine):
+    """Offline CMU Sphinx recognizer (needs the pocketsphinx package)."""
+
+    name = "sphinx"
+
+    def __init__(self, recognizer=None, language="en-US"):
+        super().__init__(recognizer)
+        self.language = language
+
+    def _recognize(self, audio):
+        return self.recognizer.recognize_sphinx(audio, language=self.language)
+
+
+class WhisperEngine(RecognizerEngine):
+    """Offline Whisper recognizer (needs openai-whisper); the model is loaded once and reused."""
+
+    name = "whisper"
+
+    def __init__(self, recognizer=None, model="base", language="english"):
+        super().__init__(recognizer)
+        self.model = model
+        self.language = language
+
+    def _recognize(self, audio):
+        text = self.recognizer.recognize_whisper(audio, model=self.model, language=self.language)
+        if not text.strip():
+            raise sr.UnknownValueError()
+        return text.strip()
+
+
+class FakeEngine(RecognizerEngine):
+    """
+    Replays WAV fixtures for tests and benchmarks. Each fixture is a .wav file
+    with a .txt transcript next to it; clips are matched by their raw audio.
+    """
+
+    name = "fake"
+
+    def __init__(self, fixtures_dir=None, transcripts=None, latency=0.0):
+        super().__init__(sr.Recognizer())
+        self.latency = latency
+        self._transcripts = {}
+        self.clips = []
+        if fixtures_dir:
+            for wav_path in sorted(Path(fixtures_dir).glob("*.wav")):
+                transcript_path = wav_path.with_suffix(".txt")
+                transcript = transcript_path.read_text().strip() if transcript_path.exists() else ""
+                audio = load_wav(wav_path)
+                self.add(audio, transcript)
+        for audio, transcript in (transcripts or []):
+            self.add(audio, transcript)
+
+    @staticmethod
+    def _key(audio):
+        return hashlib.sha1(audio.get_raw_data()).hexdigest()
+
+    def add(self, audio, transcript):
+        self._transcripts[self._key(audio)] = transcript
+        self.clips.append(audio)
+
+    def _recognize(self, audio):
+        if self.latency:
+            time.sleep(self.latency)
+        transcript = self._transcripts.get(self._key(audio))
+        if not transcript:
+            raise sr.UnknownValueError()
+        return transcript
+
+
+ENGINES = {
+    "google": GoogleEngine,
+    "sphinx": SphinxEngine,
+    "whisper": WhisperEngine,
+    "fake": FakeEngine,
+}
+
+
+def create_engine(name, recognizer=None, **options):
+    name = (name or "google").lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown speech engine '{name}' (choose from {', '.join(ENGINES)})")
+    if name == "fake":
+        return FakeEngine(**options)
+    return ENGINES[name](recognizer, **options)
+
+
+def load_wav(path):
+    with sr.AudioFile(str(path)) as source:
+        return sr.Recognizer().record(source)
+
+
+def audio_duration(audio):
+    return len(audio.get_raw_data()) / float(audio.sample_rate * audio.sample_width)
+
+
+def benchmark(engines, clips, repeat=1):
+    """Run every engine over the same clips, one by one and as a batch, and return their reports."""
+    reports = []
+    for engine in engines:
+        for _ in range(repeat):
+            for clip in clips:
+                engine._transcribe_or_status(clip)
+            engine.transcribe_batch(clips)
+        reports.append(engine.report())
+    return reports
+
+
+if __name__ == "__main__":
+    import sys
+
+    fixtures = sys.argv[1] if len(sys.argv) > 1 else os.path.join("fixtures", "audio")
+    names = sys.argv[2].split(",") if len(sys.argv) > 2 else ["fake"]
+    fake = FakeEngine(fixtures)
+    if not fake.clips:
+        print(f"No .wav fixtures found in {fixtures}")
+        sys.exit(1)
+    engines = []
+    for engine_name in names:
+        try:
+            engines.append(fake if engine_name == "fake" else create_engine(engine_name))
+        except Exception as e:
+            print(f"⚠️ Skipping {engine_name}: {e}")
+    for report in benchmark(engines, fake.clips):
+        print(report)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_responses(responses):
+    """Lowercase, drop punctuation and collapse whitespace so near-identical transcripts share a key."""
+    return [_SPACES.sub(" ", _NON_WORD.sub(" ", r.lower())).strip() for r in responses]
+
+
+class SummaryCache:
+    """
+    Persistent memo of AI summaries keyed on a hash of the normalized responses,
+    prompt template and model, with TTL and LRU eviction. Concurrent requests
+    for the same key share one in-flight API call.
+    """
+
+    def __init__(self, db_file, ttl_seconds=30 * 24 * 3600, max_entries=5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "api_calls": 0}
+        self._conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                cache_key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(responses, prompt_template, model, **params):
+        payload = json.dumps({
+            "responses": normalize_responses(responses),
+            "template": prompt_template,
+            "model": model,
+            "params": params,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT summary, created_at FROM summaries WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.ttl_seconds:
+            self._conn.execute("DELETE FROM summaries WHERE cache_key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE summaries SET last_used = ? WHERE cache_key = ?", (now, key))
+        self._conn.commit()
+        return row[0]
+
+    def _store(self, key, summary):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO summaries (cache_key, summary, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, summary, now, now)
+        )
+        self._conn.execute(
+            "DELETE FROM summaries WHERE created_at < ? OR cache_key IN ("
+            "  SELECT cache_key FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (now - self.ttl_seconds, self.max_entries)
+        )
+        self._conn.commit()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            summary = self._lookup(key)
+            if summary is not None:
+                self.stats["hits"] += 1
+                return summary
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.stats["misses"] += 1
+                self.stats["api_calls"] += 1
+                owner = True
+        if not owner:
+            return future.result()
+        try:
+            summary = compute()
+            with self._lock:
+                self._store(key, summary)
+            future.set_result(summary)
+            return summary
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def report(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0
+        stats["api_calls_saved"] = stats["hits"] + stats["coalesced"]
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
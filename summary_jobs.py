@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class SummaryJobQueue:
+    """
+    Durable background queue for memory summaries. Every job is appended to an
+    on-disk journal (fsynced) before it is queued, and marked done in the journal
+    once its summary is stored, so jobs left over from a crash are replayed on
+    the next start. Memories the store still marks pending but the journal never
+    saw (a crash between saving and submitting) are picked up on start too.
+    Failed summaries are retried with backoff.
+    """
+
+    def __init__(self, journal_file, summarize, store, max_attempts=5, retry_delay=2.0):
+        self.journal_file = Path(journal_file)
+        self.summarize = summarize
+        self.store = store
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue()
+        self._journal_lock = threading.Lock()
+        self._pending = {}
+        self._idle = threading.Condition(threading.Lock())
+        self._worker = threading.Thread(target=self._run, name="summary-jobs", daemon=True)
+        self._replay()
+        self._worker.start()
+
+    def _append(self, *entries):
+        with self._journal_lock:
+            with open(self.journal_file, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _replay(self):
+        jobs = {}
+        if self.journal_file.exists():
+            with open(self.journal_file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+                    if entry.get("op") == "submit":
+                        jobs[entry["job"]["job_id"]] = entry["job"]
+                    elif entry.get("op") == "done":
+                        jobs.pop(entry["job_id"], None)
+        journaled = {(j["patient_name"], j["image_filename"], j["conversation_id"]) for j in jobs.values()}
+        for record in self.store.pending_summaries():
+            key = (record["patient_name"], record["image_filename"], record["conversation_id"])
+            if key not in journaled and record["raw_transcript"]:
+                job = self._new_job(*key, record["raw_transcript"])
+                jobs[job["job_id"]] = job
+        if not jobs and not self.journal_file.exists():
+            return
+        self._compact(jobs.values())
+        for job in jobs.values():
+            self._enqueue(job)
+        if jobs:
+            log.info(f"📝 Resuming {len(jobs)} unfinished memory summaries")
+
+    def _compact(self, jobs, only_if_idle=False):
+        tmp_file = self.journal_file.with_suffix(".tmp")
+        with self._journal_lock:
+            if only_if_idle:
+                with self._idle:
+                    if self._pending:
+                        return
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                for job in jobs:
+                    f.write(json.dumps({"op": "submit", "job": job}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.journal_file)
+
+    def _track(self, job):
+        with self._idle:
+            self._pending[job["job_id"]] = job
+
+    def _enqueue(self, job):
+        self._track(job)
+        self._queue.put(job)
+
+    @staticmethod
+    def _new_job(patient_name, image_filename, conversation_id, responses):
+        return {
+            "job_id": uuid.uuid4().hex,
+            "patient_name": patient_name,
+            "image_filename": image_filename,
+            "conversation_id": conversation_id,
+            "responses": list(responses),
+            "attempts": 0,
+        }
+
+    def submit(self, patient_name, image_filename, conversation_id, responses):
+        job = self._new_job(patient_name, image_filename, conversation_id, responses)
+        # Track before journaling so an idle compaction can never drop this entry
+        self._track(job)
+        self._append({"op": "submit", "job": job})
+        self._queue.put(job)
+        return job["job_id"]
+
+    def submit_many(self, jobs):
+        """Queue several (patient_name, image_filename, conversation_id, responses) summaries with one journal fsync."""
+        jobs = [self._new_job(*job) for job in jobs]
+        for job in jobs:
+            self._track(job)
+        self._append(*({"op": "submit", "job": job} for job in jobs))
+        for job in jobs:
+            self._queue.put(job)
+        return [job["job_id"] for job in jobs]
+
+    def _finish(self, job):
+        self._append({"op": "done", "job_id": job["job_id"]})
+        with self._idle:
+            self._pending.pop(job["job_id"], None)
+            idle = not self._pending
+            if idle:
+                self._idle.notify_all()
+        if idle:
+            self._compact([], only_if_idle=True)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job["attempts"] += 1
+            try:
+                summary = self.summarize(job)
+                stored = self.store.update_summary(
+                    job["patient_name"], job["image_filename"], job["conversation_id"], summary
+                )
+                if stored:
+                    log.info(f"📝 Summary ready for {job['patient_name']} - {job['image_filename']}")
+                self._finish(job)
+            except Exception as e:
+                if job["attempts"] >= self.max_attempts:
+                    log.error(f"❌ Giving up on summary for {job['image_filename']} after {job['attempts']} attempts: {e}")
+                    self.store.update_summary(
+                        job["patient_name"], job["image_filename"], job["conversation_id"],
+                        None, summary_status="failed"
+                    )
+                    self._finish(job)
+                else:
+                    delay = self.retry_delay * (2 ** (job["attempts"] - 1))
+                    log.warning(f"⚠️ Summary failed ({e}), retrying in {delay:.0f}s")
+                    retry = threading.Timer(delay, self._queue.put, args=(job,))
+                    retry.daemon = True
+                    retry.start()
+
+    @property
+    def pending(self):
+        with self._idle:
+            return len(self._pending)
+
+    def wait_idle(self, timeout=None):
+        """Block until every queued summary has been stored or given up on."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
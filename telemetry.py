@@ -0,0 +1,370 @@
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+# Bucket bounds (ms) for the exported Prometheus histograms
+EXPORT_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+# Quantiles come from finer log-spaced buckets, each 5% wide
+_GROWTH = 1.05
+_LOG_GROWTH = math.log(_GROWTH)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Span names used by the conversation loop
+SPANS = ("tts_synthesis", "playback", "capture", "stt", "emotion", "question", "llm", "persist", "turn")
+
+
+def configure_logging(level=None):
+    """Leveled console logging for the app (MEEMO_LOG_LEVEL, default INFO), messages printed as-is."""
+    level = level or os.getenv("MEEMO_LOG_LEVEL", "INFO")
+    logging.basicConfig(level=level.upper() if isinstance(level, str) else level, format="%(message)s")
+
+
+class Histogram:
+    """
+    Latency histogram in milliseconds. Keeps 5%-wide log buckets for
+    p50/p95/p99 estimates (so memory does not grow with the number of
+    observations) and cumulative counts at EXPORT_BOUNDS_MS for Prometheus.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._fine = {}
+        self._export = [0] * (len(EXPORT_BOUNDS_MS) + 1)
+
+    def observe(self, ms):
+        self.count += 1
+        self.sum += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+        index = math.ceil(math.log(ms) / _LOG_GROWTH) if ms > 1 else 0
+        self._fine[index] = self._fine.get(index, 0) + 1
+        for i, bound in enumerate(EXPORT_BOUNDS_MS):
+            if ms <= bound:
+                self._export[i] += 1
+                return
+        self._export[-1] += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self._fine):
+            seen += self._fine[index]
+            if seen >= rank:
+                return min(self.max, max(self.min, _GROWTH ** index if index else 1.0))
+        return self.max
+
+    def cumulative(self):
+        counts = []
+        total = 0
+        for count in self._export[:-1]:
+            total += count
+            counts.append(total)
+        return counts
+
+    def snapshot(self):
+        data = {"count": self.count, "sum_ms": round(self.sum, 3)}
+        if self.count:
+            data["min_ms"] = round(self.min, 3)
+            data["max_ms"] = round(self.max, 3)
+            for q in QUANTILES:
+                data[f"p{round(q * 100)}_ms"] = round(self.quantile(q), 3)
+        return data
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "start")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.record(self.name, (time.perf_counter() - self.start) * 1000, **self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Telemetry:
+    """
+    Process-wide span recorder. Every finished span goes into a histogram for
+    its (name, session) and one for (name, all sessions), and is appended to
+    the JSON-lines file when one is configured. Session histograms live until
+    write_session_summary(); only the all-sessions ones are exported, so
+    memory and Prometheus series don't grow with the number of conversations.
+    When disabled, span() returns a shared no-op context manager and record()
+    returns at once, so instrumented code costs one attribute check per span.
+    """
+
+    def __init__(self, enabled=False, jsonl_path=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._jsonl = None
+        self._server = None
+        if enabled:
+            self.enable(jsonl_path)
+
+    def enable(self, jsonl_path=None):
+        with self._lock:
+            if jsonl_path and self._jsonl is None:
+                self._jsonl = open(jsonl_path, "a", encoding="utf-8")
+            self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
+    def session(self, session_id):
+        return SessionTrace(self, session_id)
+
+    def span(self, name, session="", turn=None, **attrs):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(_Bound(self, session, turn), name, attrs)
+
+    def record(self, name, ms, session="", turn=None, **attrs):
+        if not self.enabled or ms is None:
+            return
+        with self._lock:
+            for key in ((name, session), (name, "")) if session else ((name, ""),):
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram()
+                histogram.observe(ms)
+            if self._jsonl is not None:
+                event = {"ts": round(time.time(), 3), "span": name, "ms": round(ms, 3)}
+                if session:
+                    event["session"] = session
+                if turn is not None:
+                    event["turn"] = turn
+                if attrs:
+                    event.update(attrs)
+                self._jsonl.write(json.dumps(event) + "\n")
+
+    def snapshot(self, session=None):
+        """{span name: histogram summary} for one session, or across all sessions by default."""
+        with self._lock:
+            return {
+                name: histogram.snapshot()
+                for (name, key), histogram in sorted(self._histograms.items())
+                if key == (session or "")
+            }
+
+    def write_session_summary(self, session):
+        """Append the per-session histogram summary to the JSON-lines file and drop the session's histograms."""
+        summary = self.snapshot(session)
+        with self._lock:
+            if session:
+                for key in [key for key in self._histograms if key[1] == session]:
+                    del self._histograms[key]
+            if self._jsonl is not None and summary:
+                self._jsonl.write(json.dumps({"ts": round(time.time(), 3), "session": session, "summary": summary}) + "\n")
+                self._jsonl.flush()
+        return summary
+
+    def flush(self):
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.flush()
+
+    def prometheus_text(self):
+        """The all-sessions histograms in the Prometheus text exposition format (seconds, as Prometheus expects)."""
+        lines = [
+            "# HELP meemo_span_duration_seconds Duration of conversation loop steps.",
+            "# TYPE meemo_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted((name, h) for (name, session), h in self._histograms.items() if not session)
+            rows = [(name, h.cumulative(), h.count, h.sum) for name, h in items]
+        for name, cumulative, count, total in rows:
+            labels = f'span="{_escape(name)}"'
+            for bound, value in zip(EXPORT_BOUNDS_MS, cumulative):
+                lines.append(f'meemo_span_duration_seconds_bucket{{{labels},le="{bound / 1000:g}"}} {value}')
+            lines.append(f'meemo_span_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"meemo_span_duration_seconds_sum{{{labels}}} {total / 1000:.6f}")
+            lines.append(f"meemo_span_duration_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write prometheus_text() atomically, for node_exporter's textfile collector or a scraper."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".partial_", suffix=".prom")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Expose /metrics over HTTP on a daemon thread; returns the bound (host, port)."""
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server.server_address
+
+    def stop_serving(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Bound:
+    __slots__ = ("telemetry", "session", "turn")
+
+    def __init__(self, telemetry, session, turn):
+        self.telemetry = telemetry
+        self.session = session
+        self.turn = turn
+
+    def record(self, name, ms, **attrs):
+        self.telemetry.record(name, ms, session=self.session, turn=self.turn, **attrs)
+
+
+class SessionTrace:
+    """Spans of one conversation session, tagged with its id and the current turn number."""
+
+    def __init__(self, telemetry, session_id):
+        self.telemetry = telemetry
+        self.session_id = session_id
+        self.turn = 0
+
+    @property
+    def enabled(self):
+        return self.telemetry.enabled
+
+    def next_turn(self):
+        self.turn += 1
+
+    def span(self, name, **attrs):
+        if not self.telemetry.enabled:
+            return _NULL_SPAN
+        return _Span(_Bound(self.telemetry, self.session_id, self.turn), name, attrs)
+
+    def record(self, name, ms, turn=None, **attrs):
+        if self.telemetry.enabled:
+            self.telemetry.record(name, ms, session=self.session_id, turn=self.turn if turn is None else turn, **attrs)
+
+    def summary(self):
+        return self.telemetry.write_session_summary(self.session_id)
+
+
+def from_env():
+    """
+    The process-wide Telemetry, enabled when MEEMO_TRACE_FILE (JSON lines)
+    or MEEMO_METRICS_PORT (Prometheus /metrics) is set, or MEEMO_TRACE=1.
+    The /metrics endpoint itself is started by serve_from_env().
+    """
+    jsonl_path = os.getenv("MEEMO_TRACE_FILE")
+    enabled = bool(jsonl_path or os.getenv("MEEMO_METRICS_PORT") or os.getenv("MEEMO_TRACE"))
+    return Telemetry(enabled=enabled, jsonl_path=jsonl_path)
+
+
+TELEMETRY = from_env()
+
+
+def serve_from_env(telemetry=None):
+    """
+    Serve /metrics on MEEMO_METRICS_PORT, if set. Called from the app's entry
+    point rather than on import, so worker processes that import the app
+    never try to bind the port.
+    """
+    port = os.getenv("MEEMO_METRICS_PORT")
+    if not port:
+        return None
+    telemetry = telemetry or TELEMETRY
+    try:
+        host, bound = telemetry.serve(int(port))
+        log.info(f"📈 Metrics on http://{host}:{bound}/metrics")
+        return host, bound
+    except (OSError, ValueError) as e:
+        log.warning(f"⚠️ Metrics endpoint unavailable: {e}")
+        return None
+
+
+def overhead_benchmark(iterations=200000):
+    """Cost of an instrumented span with telemetry off and on (in-memory histograms only)."""
+    results = {}
+    for enabled in (False, True):
+        telemetry = Telemetry(enabled=enabled)
+        trace = telemetry.session("bench")
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with trace.span("stt"):
+                pass
+        results["on" if enabled else "off"] = (time.perf_counter() - start) / iterations * 1e9
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    results["empty loop"] = (time.perf_counter() - start) / iterations * 1e9
+    for label, ns in results.items():
+        print(f"{label:10s} {ns:8.0f} ns per span")
+    return results
+
+
+if __name__ == "__main__":
+    overhead_benchmark()
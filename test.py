@@ -1,18 +1,44 @@
+import logging
 import os
-import pandas as pd
-import requests
-import speech_recognition as sr
-from gtts import gTTS
-import pygame
-import tempfile
-import uuid
-from datetime import datetime
 from pathlib import Path
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog, ttk
 import threading
 from dotenv import load_dotenv
-from PIL import Image, ImageTk
+from startup import CalibrationCache, StartupTasks, lazy_import
+from memory_store import open_memory_store
+from memory_search import MemorySearch
+from intent_classifier import DEFAULT_CLASSIFIER
+from speech_emotion import AcousticEmotionAnalyzer, fuse_emotions
+import speech_emotion
+from tts_cache import TTSCache
+from speech_pipeline import SpeechHandle, SpeechPipeline, split_sentences
+from background_listener import BackgroundListener, TurnTimer
+from stt_engines import RecognizerEngine, create_engine
+from llm_client import get_shared_client
+from summary_jobs import SummaryJobQueue
+from summary_cache import SummaryCache
+from image_catalog import ImageCatalog
+from analytics import ConversationLog, TurnRecorder
+from album_session import AlbumSession
+from question_engine import QuestionEngine, describe_photo
+from transcript_compaction import TranscriptCompactor
+from telemetry import TELEMETRY, configure_logging, serve_from_env
+from thumbnails import LIST_SIZE, VIEWER_SIZE, PhotoImageLRU, ThumbnailCache
+from conversation_engine import (
+    DEFAULT_QUESTIONS, ConversationCancelled, ConversationEngine, ConversationPorts, detect_text_emotion
+)
+
+# Heavy dependencies load on first use so the window can appear straight away
+sr = lazy_import("speech_recognition")
+pygame = lazy_import("pygame")
+ImageTk = lazy_import("PIL.ImageTk")
+
+log = logging.getLogger(__name__)
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
 
 
 # Load environment variables
@@ -20,339 +46,737 @@ load_dotenv()
 
 
 class GeneralizedDementiaCareAgent:
-    def __init__(self, api_key=None):
+    CONVERSATION_QUESTIONS = DEFAULT_QUESTIONS
+
+    # Fixed prompts spoken during conversations; pre-rendered into the TTS cache at startup
+    STATIC_PROMPTS = CONVERSATION_QUESTIONS + [
+        "I'd love to hear about this photo",
+        "I'm here whenever you're ready. Take all the time you need.",
+        "I didn't quite catch that. Could you repeat it for me?",
+        "Let me try listening again. Please go ahead.",
+        "I notice this might be a difficult feeling. It's okay to take your time or skip if you want. Say 'skip' to move on or continue sharing.",
+        "Okay, I understand. We won't save this memory. Thank you for sharing with me today. Take care!",
+        "Thank you for continuing to share.",
+        "It's lovely to hear you're feeling happy!",
+        "Do you want to tell me more about the photo, or should I save what you've shared?",
+        "Okay, I'll save your memories now.",
+        "Okay, please go ahead and tell me more.",
+        "I'm here whenever you're ready.",
+        "Thanks for sharing more. I'll save your memories now.",
+        "Do you want to share more or should I save?",
+        "Thanks for sharing. I'll save your memories now.",
+        "Okay, please continue.",
+        "Thank you for sharing those wonderful memories with me. I'll save them so we can remember together.",
+        "We haven't talked about this photo yet. Would you like to tell me about it?",
+        "I'm having trouble accessing the memories right now.",
+    ]
+
+    SUMMARY_PROMPT_TEMPLATE = """{empathetic_prefix}
+
+Create a natural, conversational summary of what this patient shared about their photo.
+
+Patient said: {patient_text}
+
+Write a warm summary as if gently telling the patient what they shared. Use "you" and make it flow naturally. Don't use bullet points or formal language.
+
+Examples:
+- "I was happy in Austria, it was cold, I made snowman" → "You were happy in Austria even though it was cold. You had fun making a snowman."
+- "My dog Max loved playing" → "You have wonderful memories of your dog Max who loved playing."
+
+Keep it natural and caring, 2-3 sentences maximum."""
+
+    # Services a session spawned from this agent shares instead of creating its own
+    SHARED_SERVICES = [
+        'llm', 'recognizer', 'stt_engine', 'tts_cache', 'speech', 'microphone',
+        'images_folder', 'memories_file', 'memories_db', 'memory_store',
+        'summary_cache', 'summary_jobs', 'image_catalog', 'memory_search', 'conversation_log',
+        'question_engine', 'transcript_compactor', 'calibration_cache',
+    ]
+
+    def __init__(self, api_key=None, background_capture=True, barge_in=False, stt_engine=None,
+                 endpoint=None, headless=False, base_url=None, shared_from=None,
+                 fast_start=False, on_startup_progress=None, calibration_refresh=6 * 3600,
+                 adaptive_questions=True):
         self.api_key = api_key or os.getenv("PERPLEXITY_API_KEY")
-        self.base_url = "https://api.perplexity.ai/chat/completions"
+        self.base_url = base_url or "https://api.perplexity.ai/chat/completions"
         self.model = "sonar-pro"
+        # An endpoint (file, socket or room device) replaces the local speakers and microphone
+        self.endpoint = endpoint
+        headless = headless or endpoint is not None
+        # Keep the mic hot and recognize on a worker pool; barge-in is best with a
+        # headset, on open speakers the AI's own voice would interrupt it
+        self.background_capture = background_capture and not headless
+        self.barge_in = barge_in
+        self.listener = None
+        self.timer = TurnTimer()
+        self.trace = TELEMETRY.session("")
+        self._turn_heard = False
+        self.cancel_event = threading.Event()
+        self._conversation_lock = threading.Lock()
+        self.acoustic_emotion = None
+        self._acoustic_result = None
+        self._acoustic_patient = None
+        self._recorder = None
+        self._questions = None
+        self._transcript = None
+        self.album = None
+        # Per-session settings, also needed by sessions sharing another agent's services
+        self.adaptive_questions = adaptive_questions
+        self.calibration_refresh = calibration_refresh
+        self._on_startup_progress = on_startup_progress
+        if shared_from is not None:
+            shared_from.wait_ready()
+            for name in self.SHARED_SERVICES:
+                setattr(self, name, getattr(shared_from, name))
+            self.startup = shared_from.startup
+            self._init_acoustic_emotion(shared_from.acoustic_emotion)
+            return
 
-        pygame.mixer.init()
-        self.temp_dir = tempfile.mkdtemp()
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
-        self._calibrate_microphone()
         self.images_folder = "patient_images"
         Path(self.images_folder).mkdir(exist_ok=True)
+        # Opening the persisted index is cheap; the rescan for changes is a startup step
+        self.image_catalog = ImageCatalog(self.images_folder, "image_catalog.db")
+        # Per-turn history of every conversation, with rollups for care reviews
+        self.conversation_log = ConversationLog("conversation_log.db")
         self.memories_file = "patient_memories.xlsx"
-        self._init_memory_file()
-        print("🎤 System ready! Put JPG/PNG images in 'patient_images' folder")
-        print("🌟 Works with ANY photo topic: family, pets, travel, celebrations!")
+        self.memories_db = "patient_memories.db"
+        self.question_engine = None
+        self.tts_cache = None
+        self.speech = None
+        self.microphone = None
+        self.calibration_cache = CalibrationCache()
+
+        # Independent startup steps; with fast_start they run concurrently in the background
+        self.startup = StartupTasks(on_progress=self._startup_progress)
+        self.startup.add("memories", self._init_memory_file)
+        self.startup.add("language model", self._init_llm)
+        self.startup.add("images", self._init_image_catalog)
+        self.startup.add("speech recognition", lambda: self._init_speech_recognition(stt_engine, headless))
+        if not headless:
+            self.startup.add("audio", self._init_audio)
+        if fast_start:
+            self.startup.run_background()
+        else:
+            self.startup.run_inline()
+
+
+    def _startup_progress(self, message):
+        if self.startup.is_ready():
+            log.info("🎤 System ready! Put JPG/PNG images in 'patient_images' folder")
+            log.info("🌟 Works with ANY photo topic: family, pets, travel, celebrations!")
+        if self._on_startup_progress:
+            self._on_startup_progress(message)
+
+
+    def wait_ready(self, timeout=None):
+        """Block until every startup step has finished (immediately true unless fast_start was used)."""
+        return self.startup.wait(timeout=timeout)
+
+
+    def _init_llm(self):
+        self.llm = get_shared_client(self.api_key, self.base_url, model=self.model)
+        if self.adaptive_questions and self.api_key:
+            # Follow-up questions written from the patient's answers, within a latency budget
+            self.question_engine = QuestionEngine(
+                self.llm.chat, self.model, SummaryCache("question_cache.db"),
+                static_questions=self.CONVERSATION_QUESTIONS,
+                budget_ms=int(os.getenv("MEEMO_QUESTION_BUDGET_MS", "800"))
+            )
+
+
+    def _init_image_catalog(self):
+        delta = self.image_catalog.scan()
+        log.info(f"🖼️ Image catalog: {self.image_catalog.count()} photos "
+              f"({len(delta['added'])} new, {len(delta['updated'])} changed, {len(delta['removed'])} removed)")
+
+
+    def _init_audio(self):
+        pygame.mixer.init()
+        self.tts_cache = TTSCache()
+        # Playback looks phrases up sentence by sentence, so warm the same chunks
+        self.tts_cache.warm_up(self._speech_chunks(self.STATIC_PROMPTS))
+        self.speech = SpeechPipeline(self.tts_cache, lang='en', slow=False)
+
+
+    def _init_speech_recognition(self, stt_engine, headless):
+        self.recognizer = sr.Recognizer()
+        if isinstance(stt_engine, RecognizerEngine):
+            self.stt_engine = stt_engine
+        else:
+            self.stt_engine = create_engine(stt_engine or os.getenv("MEEMO_STT_ENGINE", "google"), self.recognizer)
+        log.info(f"🎤 Speech engine: {self.stt_engine.name}")
+        self._init_acoustic_emotion()
+        if not headless:
+            self.microphone = sr.Microphone()
+            self._calibrate_microphone()
+
+
+    def _init_acoustic_emotion(self, shared=None):
+        # Each agent keeps its own speaker baseline; sessions share the worker thread
+        if shared is not None:
+            self.acoustic_emotion = AcousticEmotionAnalyzer(executor=shared.executor, model=shared.model)
+        elif speech_emotion.available():
+            self.acoustic_emotion = AcousticEmotionAnalyzer()
+            log.info("🎵 Acoustic emotion analysis on")
+        if self.acoustic_emotion is not None and self.endpoint is not None:
+            self.endpoint.attach_analyzer(self._analyze_audio)
+
+
+    def _analyze_audio(self, audio):
+        """Start acoustic emotion analysis of a captured clip; returns a Future (or None when disabled)."""
+        if self.acoustic_emotion is None:
+            return None
+        return self.acoustic_emotion.submit(audio)
+
+
+    def spawn_session(self, endpoint):
+        """Create an agent for one more concurrent session, sharing this agent's services."""
+        return type(self)(api_key=self.api_key, base_url=self.base_url, endpoint=endpoint, shared_from=self)
+
+
+    @property
+    def conversation_active(self):
+        return self._conversation_lock.locked()
+
+
+    def cancel_conversation(self):
+        self.cancel_event.set()
+
+
+    def _check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise ConversationCancelled("conversation cancelled")
+
+
+    def _calibrate_microphone(self, force=False):
+        device_key = self.microphone.device_index if self.microphone.device_index is not None else "default"
+        threshold, stale = self.calibration_cache.get(device_key)
+        if threshold is not None:
+            self.recognizer.energy_threshold = threshold
+            log.info(f"🎤 Using saved microphone calibration ({threshold:.0f})")
+        if threshold is None or stale or force:
+            log.info("🎤 Calibrating microphone...")
+            try:
+                with self.microphone as source:
+                    self.recognizer.adjust_for_ambient_noise(source, duration=2)
+                self.calibration_cache.put(device_key, self.recognizer.energy_threshold)
+                log.info("✅ Microphone ready")
+            except Exception as e:
+                log.warning(f"⚠️ Microphone issue: {e}")
+        self._schedule_calibration_refresh()
+
+
+    def _schedule_calibration_refresh(self):
+        if not self.calibration_refresh:
+            return
+        refresh = threading.Timer(self.calibration_refresh, self._refresh_calibration)
+        refresh.daemon = True
+        refresh.start()
+
+
+    def _refresh_calibration(self):
+        # The microphone is busy during a conversation; try again next period
+        if self.conversation_active:
+            self._schedule_calibration_refresh()
+            return
+        self._calibrate_microphone(force=True)
+
+
+    def _init_memory_file(self):
+        self.memory_store = open_memory_store(self.memories_db, legacy_xlsx_file=self.memories_file)
+        log.info(f"📊 Memory store ready: {self.memories_db} ({self.memory_store.count()} memories)")
+        # Built before the summary queue replays, so its updates reach the index too
+        self.memory_search = MemorySearch(self.memory_store)
+        self.summary_cache = SummaryCache("summary_cache.db")
+        # Long conversations are folded into rolling notes as they go; the LLM client may still be starting
+        self.transcript_compactor = TranscriptCompactor(
+            lambda *args, **kwargs: self.llm.chat(*args, **kwargs), self.model, self.summary_cache
+        )
+        self.summary_jobs = SummaryJobQueue("summary_jobs.journal", self._summarize_job, self.memory_store)
+
+
+    def search_memories(self, query, patient_name=None, limit=10):
+        """Find saved memories by what was said (e.g. "her dog Max", "Austria"), best match first."""
+        self.wait_ready()
+        results = self.memory_search.search(query, patient_name=patient_name, limit=limit)
+        log.info(f"🔍 Search '{query}': {len(results)} memories")
+        return results
 
 
-    def _calibrate_microphone(self):
-        print("🎤 Calibrating microphone...")
+    def export_memories(self, xlsx_file=None):
+        xlsx_file = xlsx_file or self.memories_file
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=2)
-            print("✅ Microphone ready")
+            exported = self.memory_store.export_xlsx(xlsx_file)
+            log.info(f"📊 Exported {exported} memories to {xlsx_file}")
+            return exported
         except Exception as e:
-            print(f"⚠️ Microphone issue: {e}")
+            log.error(f"❌ Error exporting memories: {e}")
+            return 0
 
 
-    def _init_memory_file(self):
-        if not Path(self.memories_file).exists():
-            df = pd.DataFrame(columns=[
-                'image_filename', 'patient_name', 'memory_note',
-                'created_date', 'conversation_id'
-            ])
-            df.to_excel(self.memories_file, index=False)
-            print("📊 Memory file created: patient_memories.xlsx")
+    def _start_turn(self):
+        # A turn is a prompt plus the reply to it; the first prompt after a reply starts the next one
+        if self._turn_heard:
+            self.trace.next_turn()
+            self._turn_heard = False
 
 
     def speak(self, text):
-        print(f"🔊 AI: {text}")
+        self._check_cancelled()
+        log.info(f"🔊 AI: {text}")
+        self._start_turn()
+        self.timer.mark("prompt_start")
         try:
-            tts = gTTS(text=text, lang='en', slow=False)
-            temp_file = os.path.join(self.temp_dir, f"speech_{uuid.uuid4().hex[:8]}.mp3")
-            tts.save(temp_file)
-            pygame.mixer.music.load(temp_file)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.wait(100)
-            try:
-                os.remove(temp_file)
-            except:
-                pass
+            if self.endpoint is not None:
+                with self.trace.span("playback", source="endpoint"):
+                    self.endpoint.say(text)
+                return
+            handle = self.speech.speak_async(text)
+            if self.listener is not None:
+                self.listener.set_playback(handle)
+            handle.wait()
+            if self.trace.enabled:
+                self.trace.record("tts_synthesis", _ms(handle.time_to_first_audio))
+                self.trace.record("playback", _ms(handle.playback_time), cancelled=handle.cancelled.is_set())
+            if handle.error is not None:
+                raise handle.error
+        except Exception as e:
+            log.warning(f"🔊 TTS Error: {e} (AI would speak this text)")
+        finally:
+            self.timer.mark("prompt_end")
+
+
+    def speak_async(self, text):
+        """Queue text for playback and return a SpeechHandle without waiting for it to finish."""
+        log.info(f"🔊 AI: {text}")
+        if self.speech is None:
+            # Headless and endpoint sessions have no local playback; an endpoint says it right away
+            if self.endpoint is not None:
+                try:
+                    self.endpoint.say(text)
+                except Exception as e:
+                    log.warning(f"🔊 Endpoint error: {e} (AI would speak this text)")
+            return SpeechHandle.completed(text)
+        return self.speech.speak_async(text)
+
+
+    def _start_background_capture(self):
+        self.listener = BackgroundListener(
+            self.recognizer, self.microphone,
+            recognize=self.stt_engine.transcribe, analyze=self._analyze_audio,
+            barge_in=self.barge_in, timer=self.timer
+        )
+        self.listener.start()
+        log.debug("🎤 Background capture on")
+
+
+    def _ensure_background_capture(self):
+        """Start capture unless it is already running (an album keeps it on between photos); True if started here."""
+        if not self.background_capture:
+            return False
+        if self.listener is not None:
+            self.listener.timer = self.timer
+            return False
+        try:
+            self._start_background_capture()
+            return True
         except Exception as e:
-            print(f"🔊 TTS Error: {e}")
-            print("(AI would speak this text)")
+            log.warning(f"⚠️ Background capture unavailable ({e}), listening turn by turn")
+            return False
+
+
+    def _stop_background_capture(self):
+        if self.listener is not None:
+            self.listener.shutdown()
+            self.listener = None
 
 
     def listen(self, timeout=25):
+        self._check_cancelled()
+        self._acoustic_result = None
+        self._turn_heard = True
+        if self.endpoint is not None:
+            self.timer.mark("speech_end")
+            # The endpoint captures and recognizes in one call
+            with self.trace.span("stt", source="endpoint"):
+                text = self.endpoint.hear(timeout=timeout)
+            self.timer.mark("recognized")
+            self._acoustic_result = self.endpoint.last_acoustic
+            if text not in ("TIMEOUT", "UNCLEAR", "ERROR"):
+                log.info(f"👂 Patient: {text}")
+            return text
+        if self.listener is not None and self.listener.running:
+            log.debug("🎤 Listening... (speak now - take your time)")
+            text = self.listener.next_utterance(timeout=timeout)
+            self._acoustic_result = self.listener.last_acoustic
+            if text == "TIMEOUT":
+                log.info("⏰ No speech detected (taking longer break)")
+            else:
+                self.trace.record("stt", self.listener.last_recognition_ms, source="background")
+                if text == "UNCLEAR":
+                    log.info("❓ Speech unclear")
+                elif text != "ERROR":
+                    log.info(f"👂 Patient: {text}")
+            return text
         try:
-            print("🎤 Listening... (speak now - take your time)")
-            with self.microphone as source:
+            log.debug("🎤 Listening... (speak now - take your time)")
+            with self.trace.span("capture"), self.microphone as source:
                 audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=15)
-            print("🔄 Processing speech...")
-            text = self.recognizer.recognize_google(audio)
-            print(f"👂 Patient: {text}")
+            self.timer.mark("speech_end")
+            # The voice is analyzed while the same clip is being recognized
+            self._acoustic_result = self._analyze_audio(audio)
+            log.debug("🔄 Processing speech...")
+            with self.trace.span("stt", engine=self.stt_engine.name):
+                text = self.stt_engine.transcribe(audio)
+            self.timer.mark("recognized")
+            log.info(f"👂 Patient: {text}")
             return text
         except sr.WaitTimeoutError:
-            print("⏰ No speech detected (taking longer break)")
+            log.info("⏰ No speech detected (taking longer break)")
             return "TIMEOUT"
         except sr.UnknownValueError:
-            print("❓ Speech unclear")
+            log.info("❓ Speech unclear")
             return "UNCLEAR"
         except Exception as e:
-            print(f"🎤 Speech error: {e}")
+            log.warning(f"🎤 Speech error: {e}")
             return "ERROR"
 
 
-    def get_images(self):
-        extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
-        images = []
-        for file in Path(self.images_folder).iterdir():
-            if file.suffix.lower() in extensions:
-                images.append(file.name)
-        return sorted(images)
+    def get_images(self, patient=None, search=None, offset=0, limit=None):
+        """
+        Photo paths relative to the images folder, from the catalog index.
+        With a patient, only their subfolder plus the shared top-level photos.
+        """
+        entries = self.image_catalog.query(patient=patient, search=search, offset=offset, limit=limit)
+        return [entry['rel_path'] for entry in entries]
 
 
     def detect_speech_emotion(self, speech_text):
         """
-        Basic placeholder for speech emotion detection by keyword matching in text.
-        Replace this with an actual speech emotion model for real use.
+        Emotion of the reply: the words (shared intent classifier) fused with
+        how it sounded, when the clip was analyzed acoustically during capture.
         """
-        text = speech_text.lower()
-        if any(word in text for word in ["sad", "unhappy", "depressed", "down", "tear"]):
-            return "sad"
-        elif any(word in text for word in ["happy", "joy", "glad", "delighted", "smile"]):
-            return "happy"
-        elif any(word in text for word in ["angry", "mad", "furious", "upset"]):
-            return "angry"
-        elif any(word in text for word in ["fear", "scared", "afraid", "nervous"]):
-            return "fear"
-        return "neutral"
+        with self.trace.span("emotion") as span:
+            text_emotion = detect_text_emotion(speech_text)
+            pending, self._acoustic_result = self._acoustic_result, None
+            acoustic = None
+            if pending is not None:
+                try:
+                    acoustic = pending.result(timeout=0.5)
+                except Exception as e:
+                    log.warning(f"⚠️ Acoustic emotion unavailable: {e}")
+            emotion = fuse_emotions(text_emotion, acoustic)
+            span.set(emotion=emotion, acoustic=acoustic is not None)
+        if emotion != text_emotion:
+            log.info(f"🎵 Voice sounds {emotion} (confidence {acoustic['confidence']:.2f})")
+        return emotion
 
 
     def start_conversation(self, patient_name, image_filename, on_conversation_end=None):
+        if not self._conversation_lock.acquire(blocking=False):
+            log.warning("⚠️ A conversation is already running")
+            return None
+        started_capture = False
         try:
-            save_memory = True
-            sad_response_continue = False
-            print(f"Starting conversation about {image_filename}")
-            print(f"Patient: {patient_name}")
-
-            self.speak(f"I'd love to hear about this photo")
-            conversationid = str(uuid.uuid4())
-            patientresponses = []
-
-            conversationquestions = [
-                "Tell me, what do you see in this photo? Take your time.",
-                "That's wonderful. Can you tell me more about what you remember from this moment?",
-                "Thank you for sharing that. What feelings does this photo bring up for you?"
-            ]
-            questionindex = 0
-            meaningfulresponses = 0
-            maxresponses = 3
-            stopwords = ["done", "finished", "stop", "enough", "thats all", "no more", "bye", "goodbye", "skip", "save", "please save"]
-
-            self.speak(conversationquestions[0])
-            questionindex = 1
-            while meaningfulresponses < maxresponses:
-                patientresponse = self.listen(timeout=30)
-                if patientresponse == "TIMEOUT":
-                    self.speak("I'm here whenever you're ready. Take all the time you need.")
-                    continue
-                elif patientresponse == "UNCLEAR":
-                    self.speak("I didn't quite catch that. Could you repeat it for me?")
-                    continue
-                elif patientresponse == "ERROR":
-                    self.speak("Let me try listening again. Please go ahead.")
-                    continue
-
-                detectedemotion = self.detect_speech_emotion(patientresponse)
-                print(f"Detected speech emotion: {detectedemotion}")
-
-                if detectedemotion in ["sad", "angry", "fear", "frustrated"] and sad_response_continue == False:
-                    self.speak("I notice this might be a difficult feeling. It's okay to take your time or skip if you want. Say 'skip' to move on or continue sharing.")
-                    patience_response = self.listen(timeout=30)
-                    if patience_response and any(word in patience_response.lower() for word in stopwords):
-                        save_memory = False
-                        self.speak("Okay, I understand. We won't save this memory. Thank you for sharing with me today. Take care!")
-                        print("User chose to skip and not save")
-                        print("Conversation completed!")
-                        return conversationid
-                    else:
-                        sad_response_continue = True
-                        self.speak("Thank you for continuing to share.")
-                elif detectedemotion == "happy":
-                    self.speak("It's lovely to hear you're feeling happy!")
-
-                patientresponses.append(patientresponse)
-                meaningfulresponses += 1
-                print(f"Meaningful responses collected: {meaningfulresponses}/{maxresponses}")
-
-                if any(word in patientresponse.lower() for word in stopwords):
-                    print("Patient wants to end conversation")
-                    break
-
-                if questionindex < len(conversationquestions) and meaningfulresponses < maxresponses:
-                    self.speak(conversationquestions[questionindex])
-                    questionindex += 1
-
-            if meaningfulresponses >= maxresponses and save_memory:
-                self.speak("Do you want to tell me more about the photo, or should I save what you've shared?")
-                final_response = self.listen(timeout=30)
-                if final_response and any(word in final_response.lower() for word in stopwords):
-                    self.speak("Okay, I'll save your memories now.")
-                else:
-                    self.speak("Okay, please go ahead and tell me more.")
-
-                    while True:
-                        more_response = self.listen(timeout=30)
-                        if more_response is None:
-                            self.speak("I'm here whenever you're ready.")
-                            continue
-
-                        if any(word in more_response.lower() for word in stopwords):
-                            self.speak("Thanks for sharing more. I'll save your memories now.")
-                            break
-
-                        patientresponses.append(more_response)
-
-                        self.speak("Do you want to share more or should I save?")
-                        cont_resp = self.listen(timeout=30)
-                        if cont_resp and any(word in cont_resp.lower() for word in stopwords):
-                            self.speak("Thanks for sharing. I'll save your memories now.")
-                            break
-                        else:
-                            self.speak("Okay, please continue.")
-
-            if save_memory:
-                print("Creating generalized memory from conversation...")
-                memorytext = self._create_generalized_memory(patientresponses, image_filename, patient_name)
-                self.speak("Thank you for sharing those wonderful memories with me. I'll save them so we can remember together.")
-                success = self._save_memory(patient_name, image_filename, memorytext, conversationid)
-                if success:
-                    print("Memory successfully saved!")
-                else:
-                    print("Failed to save memory")
-
-            print("Conversation completed!")
-            return conversationid
+            self.wait_ready()
+            self.timer = TurnTimer()
+            if self.acoustic_emotion is not None and patient_name != self._acoustic_patient:
+                self.acoustic_emotion.reset()
+                self._acoustic_patient = patient_name
+            started_capture = self._ensure_background_capture()
+            ports = self.conversation_ports()
+            engine = ConversationEngine(patient_name, image_filename, ports, self.CONVERSATION_QUESTIONS)
+            self.trace = TELEMETRY.session(engine.conversation_id)
+            self._questions = self._question_plan(patient_name, image_filename)
+            if self._questions is not None:
+                ports.ask = self._questions.ask
+            self._turn_heard = False
+            self._recorder = TurnRecorder(patient_name, image_filename, engine.conversation_id)
+            self._transcript = self.transcript_compactor.start(engine.conversation_id)
+            outcome = "failed"
+            try:
+                conversation_id = engine.run()
+                outcome = engine.state
+                return conversation_id
+            except ConversationCancelled:
+                outcome = "cancelled"
+                raise
+            finally:
+                self._log_conversation(outcome, engine.responses)
+                self._transcript = None
+                if not engine.saved:
+                    self.transcript_compactor.discard(engine.conversation_id)
 
         finally:
+            if self._questions is not None:
+                log.debug(f"❓ Question sources: {self._questions.sources}")
+                self._questions.close()
+                self._questions = None
+            if started_capture:
+                self._stop_background_capture()
+            for row in self.timer.report():
+                self.trace.record("turn", row.get("turnaround_ms"), turn=row["turn"])
+            self.trace.summary()
+            self.cancel_event.clear()
+            self._conversation_lock.release()
             if on_conversation_end:
                 on_conversation_end()
 
 
-    def _create_generalized_memory(self, responses, image_filename, patient_name, empathetic_prefix=""):
-        if not responses:
-            return "We looked at this photo together."
-        print(f"📝 Creating AI-powered memory from: {responses}")
+    def conversation_ports(self):
+        return ConversationPorts(
+            speak=self.speak,
+            listen=self.listen,
+            detect_emotion=self.detect_speech_emotion,
+            persist=self._persist_conversation,
+            on_event=self._on_conversation_event,
+        )
+
+
+    def _question_plan(self, patient_name, image_filename):
+        if self.question_engine is None:
+            return None
+        memory = self.lookup_memory(patient_name, image_filename)
+        return self.question_engine.plan(
+            self.photo_descriptor(image_filename), memory[0] if memory else None, trace=self.trace
+        )
+
+
+    def photo_descriptor(self, image_filename):
+        entry = self.image_catalog.get(image_filename)
+        return describe_photo(image_filename, entry["taken_at"] if entry else None)
+
+
+    def prefetch_questions(self, patient_name, image_filename, memory_note=None, timeout=30):
+        """Generate a photo's opening questions ahead of its conversation and synthesize the first one."""
+        if self.question_engine is None:
+            return []
+        future = self.question_engine.warm(self.photo_descriptor(image_filename), memory_note)
+        try:
+            questions = future.result(timeout=timeout)
+        except Exception as e:
+            log.debug(f"Could not prefetch questions for {image_filename}: {e}")
+            return []
+        self.prefetch_speech(questions[:1])
+        return questions
+
+
+    def _on_conversation_event(self, kind, **data):
+        if kind == "emotion" and self._questions is not None:
+            # The answer is in: start writing the next question while its emotion is checked
+            self._questions.heard(data["text"])
+        if kind == "response" and self._transcript is not None:
+            for response in self._meaningful_responses([data["text"]]):
+                self._transcript.add(response)
+        if self._recorder is not None:
+            self._recorder.on_event(kind, **data)
+
+
+    def _log_conversation(self, outcome, responses):
+        recorder, self._recorder = self._recorder, None
+        try:
+            self.conversation_log.record(recorder.conversation(outcome, len(responses)), recorder.turns)
+        except Exception as e:
+            log.error(f"❌ Could not log conversation turns: {e}")
+
+
+    def care_report(self, patient_name=None):
+        """Sessions per week, weekly emotions, average responses and sad-skip photos, from the rollups."""
+        return self.conversation_log.report(patient_name)
+
+
+    def _persist_conversation(self, patient_name, image_filename, conversation_id, responses):
+        # Save the raw responses now; the AI summary is filled in by the background job queue
+        meaningful = self._meaningful_responses(responses)
+        with self.trace.span("persist"):
+            success = self._save_memory(
+                patient_name, image_filename, self._fallback_memory(responses, meaningful),
+                conversation_id, raw_transcript=responses,
+                summary_status='pending' if meaningful else 'done'
+            )
+            if not (success and meaningful):
+                self.transcript_compactor.discard(conversation_id)
+            elif self.album is not None:
+                self.album.defer_summary(patient_name, image_filename, conversation_id, responses)
+            else:
+                self.summary_jobs.submit(patient_name, image_filename, conversation_id, responses)
+        if success and meaningful:
+            log.info("Memory saved, summary queued")
+        elif success:
+            log.info("Memory successfully saved!")
+        else:
+            log.error("Failed to save memory")
+        return success
+
+
+    def _meaningful_responses(self, responses):
+        # Replies that only steer the conversation ("please save", "I'm done") are not memories
         meaningful_responses = []
-        for response in responses:
+        for response, classification in zip(responses, DEFAULT_CLASSIFIER.classify_batch(responses)):
             cleaned = response.strip()
-            control_phrases = ['save', 'done', 'finished', 'want to save', 'now i want']
-            is_control = any(phrase in cleaned.lower() for phrase in control_phrases)
-            if not is_control and len(cleaned) > 3:
+            if not classification.intents and len(cleaned) > 3:
                 meaningful_responses.append(cleaned)
+        return meaningful_responses
+
+
+    def _fallback_memory(self, responses, meaningful_responses):
+        if not responses:
+            return "We looked at this photo together."
         if not meaningful_responses:
             return "We had a conversation about this photo."
-        patient_text = " | ".join(meaningful_responses)
-        prompt = f"""{empathetic_prefix}
+        if len(meaningful_responses) == 1:
+            return f"You shared: {meaningful_responses[0]}"
+        return f"You told me about {meaningful_responses[0].lower()} and {meaningful_responses[1].lower()}"
 
-Create a natural, conversational summary of what this patient shared about their photo.
 
-Patient said: {patient_text}
+    def _summarize_job(self, job):
+        # Journaled jobs replay as soon as the memories step is done; with fast_start the LLM client may still be starting
+        self.startup.wait(["language model"])
+        summary = self._create_generalized_memory(
+            job["responses"], job["image_filename"], job["patient_name"], fallback_on_error=False,
+            conversation_id=job["conversation_id"]
+        )
+        log.debug(f"📝 Summary cache: {self.summary_cache.report()}")
+        return summary
 
-Write a warm summary as if gently telling the patient what they shared. Use "you" and make it flow naturally. Don't use bullet points or formal language.
 
-Examples:
-- "I was happy in Austria, it was cold, I made snowman" → "You were happy in Austria even though it was cold. You had fun making a snowman."
-- "My dog Max loved playing" → "You have wonderful memories of your dog Max who loved playing."
+    def _create_generalized_memory(self, responses, image_filename, patient_name, empathetic_prefix="",
+                                   fallback_on_error=True, conversation_id=None):
+        meaningful_responses = self._meaningful_responses(responses)
+        if not meaningful_responses:
+            return self._fallback_memory(responses, meaningful_responses)
+        log.debug(f"📝 Creating AI-powered memory from {len(responses)} responses")
+        # Long conversations arrive as rolling notes plus the latest replies, so the prompt stays bounded
+        notes, recent = self.transcript_compactor.state(conversation_id, meaningful_responses, timeout=60)
+        parts = ([f"Earlier: {notes}"] if notes else []) + recent
+        patient_text = " | ".join(parts)
+        prompt = self.SUMMARY_PROMPT_TEMPLATE.format(
+            empathetic_prefix=empathetic_prefix, patient_text=patient_text
+        )
 
-Keep it natural and caring, 2-3 sentences maximum."""
-        try:
-            headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-            data = {
-                "model": "sonar-pro",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3,
-                "max_tokens": 150
-            }
-            response = requests.post(self.base_url, headers=headers, json=data)
-            response.raise_for_status()
-            ai_summary = response.json()["choices"][0]["message"]["content"].strip()
+        def summarize():
+            # Summaries run on the job queue, after the conversation, so they are not tied to a session
+            with TELEMETRY.span("llm", model=self.model):
+                ai_summary = self.llm.chat(
+                    [{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=150
+                ).strip()
             if ai_summary.startswith('"') and ai_summary.endswith('"'):
                 ai_summary = ai_summary[1:-1]
             if not ai_summary.endswith('.'):
                 ai_summary += '.'
-            print(f"📝 AI created: {ai_summary}")
+            log.debug(f"📝 AI created: {ai_summary}")
             return ai_summary
+
+        cache_key = SummaryCache.make_key(
+            parts, self.SUMMARY_PROMPT_TEMPLATE, self.model,
+            empathetic_prefix=empathetic_prefix, temperature=0.3, max_tokens=150
+        )
+        try:
+            return self.summary_cache.get_or_compute(cache_key, summarize)
         except Exception as e:
-            print(f"❌ AI failed ({e}), using fallback")
-            if len(meaningful_responses) == 1:
-                return f"You shared: {meaningful_responses[0]}"
-            else:
-                return f"You told me about {meaningful_responses[0].lower()} and {meaningful_responses[1].lower()}"
+            if not fallback_on_error:
+                raise
+            log.warning(f"❌ AI failed ({e}), using fallback")
+            return self._fallback_memory(responses, meaningful_responses)
 
 
-    def _save_memory(self, patient_name, image_filename, memory_note, conversation_id):
+    def _save_memory(self, patient_name, image_filename, memory_note, conversation_id,
+                     raw_transcript=None, summary_status='done'):
         try:
-            print(f"💾 Attempting to save memory...")
-            print(f"   Patient: {patient_name}")
-            print(f"   Image: {image_filename}")
-            print(f"   Memory: {memory_note[:100]}...")
-            memories_df = pd.read_excel(self.memories_file)
-            print(f"   Current memories count: {len(memories_df)}")
-            before_count = len(memories_df)
-            memories_df = memories_df[~(
-                (memories_df['image_filename'] == image_filename) &
-                (memories_df['patient_name'] == patient_name)
-            )]
-            after_count = len(memories_df)
-            if before_count != after_count:
-                print(f"   Replaced existing memory: {before_count} -> {after_count}")
-            new_memory = {
-                'image_filename': image_filename,
-                'patient_name': patient_name,
-                'memory_note': memory_note,
-                'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'conversation_id': conversation_id
-            }
-            memories_df = pd.concat([memories_df, pd.DataFrame([new_memory])], ignore_index=True)
-            memories_df.to_excel(self.memories_file, index=False)
-            print(f"💾 Memory saved successfully! Total memories: {len(memories_df)}")
-            print(f"   Saved to: {self.memories_file}")
+            log.debug(f"💾 Saving memory for {patient_name} - {image_filename}: {memory_note[:100]}...")
+            self.memory_store.save(
+                patient_name, image_filename, memory_note, conversation_id,
+                raw_transcript=raw_transcript, summary_status=summary_status
+            )
+            log.debug(f"💾 Memory saved to {self.memories_db}")
             return True
         except Exception as e:
-            print(f"❌ Error saving memory: {e}")
+            log.error(f"❌ Error saving memory: {e}")
             return False
 
 
+    def lookup_memory(self, patient_name, image_filename):
+        """(memory_note, created_date) for a photo, or None if it has not been talked about yet."""
+        log.debug(f"🔍 Looking for memory: {patient_name} + {image_filename}")
+        memory_record = self.memory_store.get(patient_name, image_filename)
+        if memory_record is None:
+            return None
+        memory_note = memory_record['memory_note']
+        if memory_record['summary_status'] != 'done' and memory_record['raw_transcript']:
+            # Summary not stored yet (or gave up): read back from the raw transcript
+            log.debug(f"Summary {memory_record['summary_status']}, using raw transcript")
+            raw_transcript = memory_record['raw_transcript']
+            memory_note = self._fallback_memory(raw_transcript, self._meaningful_responses(raw_transcript))
+        return memory_note, memory_record['created_date']
+
+
+    def prefetch_speech(self, texts):
+        """Synthesize lines ahead of time, sentence by sentence as the speech pipeline will ask for them."""
+        if self.tts_cache is None:
+            return 0
+        return self.tts_cache.prepare(self._speech_chunks(texts))
+
+
+    @staticmethod
+    def _speech_chunks(texts):
+        return list(dict.fromkeys(chunk for text in texts for chunk in split_sentences(text) or [text]))
+
+
+    def start_album(self, patient_name, images, on_photo=None, prefetch_image=None):
+        """
+        Talk through several photos in a row (an AlbumSession), preparing each
+        next photo while the current one is discussed. Returns the conversation ids.
+        """
+        self.wait_ready()
+        self.album = AlbumSession(self, patient_name, images, on_photo=on_photo, prefetch_image=prefetch_image)
+        self.timer = TurnTimer()
+        started_capture = self._ensure_background_capture()
+        try:
+            return self.album.run()
+        finally:
+            if started_capture:
+                self._stop_background_capture()
+            transitions = self.album.transitions_ms
+            if transitions:
+                log.info(f"📚 Album: {len(self.album.completed)}/{len(images)} photos, "
+                         f"transitions max {max(transitions):.0f} ms")
+            self.album = None
+
+
     def recall_memory(self, patient_name, image_filename):
+        self.wait_ready()
         try:
-            print(f"🔍 Looking for memory: {patient_name} + {image_filename}")
-            memories_df = pd.read_excel(self.memories_file)
-            print(f"   Total memories in file: {len(memories_df)}")
-            if len(memories_df) > 0:
-                print("   Existing memories:")
-                for idx, row in memories_df.iterrows():
-                    print(f"     {idx}: {row['patient_name']} - {row['image_filename']}")
-            memory_record = memories_df[
-                (memories_df['image_filename'] == image_filename) &
-                (memories_df['patient_name'] == patient_name)
-            ]
-            if memory_record.empty:
-                print("   No matching memory found")
+            memory = self.lookup_memory(patient_name, image_filename)
+            if memory is None:
+                log.info("No matching memory found")
                 self.speak("We haven't talked about this photo yet. Would you like to tell me about it?")
                 return None
-            memory_note = memory_record.iloc[0]['memory_note']
-            created_date = memory_record.iloc[0]['created_date']
-            print(f"   Found memory: {memory_note[:50]}...")
+            memory_note, created_date = memory
+            log.debug(f"Found memory: {memory_note[:50]}...")
             image_display_name = image_filename.replace('_', ' ').replace('.jpg', '').replace('.png', '').replace('.jpeg', '')
             self.speak(f"I remember when we talked about this photo on {created_date[:10]}.")
             self.speak(memory_note)
             return memory_note
         except Exception as e:
-            print(f"❌ Error recalling memory: {e}")
+            log.error(f"❌ Error recalling memory: {e}")
             self.speak("I'm having trouble accessing the memories right now.")
             return None
 
 
 class DementiaCareGUI:
+    NO_IMAGES = "No images found - add JPG/PNG files to 'patient_images' folder"
+    PAGE_SIZE = 200
+
     def __init__(self):
-        self.agent = GeneralizedDementiaCareAgent()
         self.image_window = None
+        self.thumbnails = ThumbnailCache()
+        # Viewer photos are reused across conversations; list thumbnails must stay referenced while shown
+        self.viewer_images = PhotoImageLRU(lambda path: ImageTk.PhotoImage(file=path))
+        self.list_images = {}
+        self._loaded_images = 0
+        self._total_images = 0
         self.root = tk.Tk()
         self.root.title("Dementia Memory Assistant - Universal System")
         self.root.geometry("800x600")
@@ -360,7 +784,20 @@ class DementiaCareGUI:
             self.root.configure(bg='#f0f0f0')
         except:
             pass
+        # The window comes up immediately; the agent finishes starting in the background
+        self.agent = GeneralizedDementiaCareAgent(fast_start=True, on_startup_progress=self.set_status)
         self.create_widgets()
+        self.set_status(self.agent.startup.status())
+        # The list starts from the persisted index; the startup rescan and the watcher fill in changes
+        threading.Thread(target=self._wait_for_image_scan, daemon=True).start()
+        self.agent.image_catalog.watch(
+            on_change=lambda delta: self.root.after(0, self._apply_catalog_delta, delta)
+        )
+
+
+    def _wait_for_image_scan(self):
+        self.agent.startup.wait(["images"])
+        self.root.after(0, self._sync_image_rows)
 
 
     def create_widgets(self):
@@ -376,11 +813,13 @@ class DementiaCareGUI:
         self.patient_var = tk.StringVar()
         self.patient_entry = tk.Entry(patient_frame, textvariable=self.patient_var, width=25, font=("Arial", 12))
         self.patient_entry.pack(side=tk.LEFT, padx=10)
+        # Photos in a folder named after the patient are shown together with the shared ones
+        self.patient_var.trace_add("write", lambda *args: self._sync_image_rows(reset=True))
         instructions_frame = tk.Frame(self.root, bg='#e8f4f8', relief=tk.RAISED, bd=1)
         instructions_frame.pack(pady=10, padx=20, fill=tk.X)
         instructions = tk.Label(
             instructions_frame,
-            text="📁 Put JPG/PNG images in 'patient_images' folder\n"
+            text="📁 Put JPG/PNG images in 'patient_images' (or 'patient_images/<patient name>')\n"
                  "🌟 Works with: Family photos, pets, vacations, celebrations, school memories, etc.\n"
                  "🖼️ Select image below and start conversation",
             font=("Arial", 10), fg="#2c3e50", bg='#e8f4f8'
@@ -392,13 +831,17 @@ class DementiaCareGUI:
         images_frame.pack(fill=tk.BOTH, expand=True, padx=20)
         scrollbar = tk.Scrollbar(images_frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.images_listbox = tk.Listbox(
-            images_frame, yscrollcommand=scrollbar.set,
-            font=("Arial", 11), height=12,
-            selectbackground='#3498db', selectforeground='white'
+        self._images_scrollbar = scrollbar
+        # A Treeview rather than a Listbox so every row can carry its thumbnail
+        style = ttk.Style(self.root)
+        style.configure("Images.Treeview", font=("Arial", 11), rowheight=LIST_SIZE[1] + 6)
+        style.map("Images.Treeview", background=[('selected', '#3498db')], foreground=[('selected', 'white')])
+        self.images_list = ttk.Treeview(
+            images_frame, yscrollcommand=self._on_images_scrolled, show="tree",
+            selectmode="browse", height=6, style="Images.Treeview"
         )
-        self.images_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.images_listbox.yview)
+        self.images_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.images_list.yview)
         button_frame = tk.Frame(self.root, bg='#f0f0f0')
         button_frame.pack(pady=20)
         tk.Button(
@@ -412,12 +855,24 @@ class DementiaCareGUI:
             bg="#27ae60", fg="white", font=("Arial", 11, "bold"),
             padx=15
         ).pack(side=tk.LEFT, padx=8)
+        tk.Button(
+            button_frame, text="📚 Photo Album",
+            command=self.start_album,
+            bg="#e67e22", fg="white", font=("Arial", 11, "bold"),
+            padx=15
+        ).pack(side=tk.LEFT, padx=8)
         tk.Button(
             button_frame, text="🧠 Recall Memory",
             command=self.recall_memory,
             bg="#3498db", fg="white", font=("Arial", 11, "bold"),
             padx=15
         ).pack(side=tk.LEFT, padx=8)
+        tk.Button(
+            button_frame, text="🔍 Search Memories",
+            command=self.search_memories,
+            bg="#8e44ad", fg="white", font=("Arial", 11, "bold"),
+            padx=15
+        ).pack(side=tk.LEFT, padx=8)
         self.status_var = tk.StringVar()
         self.status_var.set("Ready! Enter patient name, select image, and start conversation.")
         status_bar = tk.Label(
@@ -426,38 +881,163 @@ class DementiaCareGUI:
             bg='#ecf0f1', fg='#2c3e50'
         )
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
-        self.refresh_images()
+        self._sync_image_rows(reset=True)
 
 
     def refresh_images(self):
-        self.images_listbox.delete(0, tk.END)
-        images = self.agent.get_images()
+        self._sync_image_rows(reset=True)
+        self.status_var.set("🔄 Checking 'patient_images' for new photos...")
+
+        def rescan():
+            try:
+                delta = self.agent.image_catalog.scan()
+            except Exception as e:
+                self.set_status(f"❌ Error scanning images: {e}")
+                return
+            self.root.after(0, self._apply_catalog_delta, delta)
+
+        threading.Thread(target=rescan, daemon=True).start()
+
+
+    def _image_filter(self):
+        return self.patient_var.get().strip() or None
+
+
+    def _sync_image_rows(self, reset=False, changed=()):
+        """
+        Bring the rows loaded so far in line with the catalog: deleted photos
+        disappear and new ones are inserted in place, without rebuilding the list.
+        """
+        if reset:
+            self.images_list.delete(*self.images_list.get_children())
+            self.list_images.clear()
+            self._loaded_images = 0
+        patient = self._image_filter()
+        images = self.agent.get_images(patient=patient, limit=max(self._loaded_images, self.PAGE_SIZE))
+        self._total_images = self.agent.image_catalog.count(patient=patient)
+        wanted = set(images)
+        for iid in self.images_list.get_children():
+            if iid not in wanted:
+                self.images_list.delete(iid)
+                self.list_images.pop(iid, None)
+        new_images = []
+        for index, img in enumerate(images):
+            if not self.images_list.exists(img):
+                self.images_list.insert("", index, iid=img, text=f"  {img}")
+                new_images.append(img)
+        self._loaded_images = len(images)
         if not images:
-            self.images_listbox.insert(tk.END, "No images found - add JPG/PNG files to 'patient_images' folder")
-            self.status_var.set("No images found. Add JPG/PNG files to 'patient_images' folder.")
+            self.images_list.insert("", tk.END, iid=self.NO_IMAGES, text=self.NO_IMAGES)
+        self._prefetch_rows(new_images + [img for img in changed if img in wanted and img not in new_images])
+
+
+    def _load_more_images(self):
+        images = self.agent.get_images(patient=self._image_filter(), offset=self._loaded_images,
+                                       limit=self.PAGE_SIZE)
+        for img in images:
+            if not self.images_list.exists(img):
+                self.images_list.insert("", tk.END, iid=img, text=f"  {img}")
+        self._loaded_images += len(images)
+        self._prefetch_rows(images)
+        return len(images)
+
+
+    def _on_images_scrolled(self, first, last):
+        self._images_scrollbar.set(first, last)
+        # Load the next page as the list nears its end, so big folders only load what is seen
+        if float(last) > 0.95 and self._loaded_images < self._total_images:
+            self.root.after_idle(self._load_more_images)
+
+
+    def _apply_catalog_delta(self, delta):
+        self._sync_image_rows(changed=delta["updated"])
+        if self._total_images:
+            self.status_var.set(f"Found {self._total_images} images. Works with any topic: family, pets, travel, celebrations!")
         else:
-            for img in images:
-                self.images_listbox.insert(tk.END, img)
-            self.status_var.set(f"Found {len(images)} images. Works with any topic: family, pets, travel, celebrations!")
+            self.status_var.set("No images found. Add JPG/PNG files to 'patient_images' folder.")
+
+
+    def _prefetch_rows(self, images):
+        if images:
+            paths = [os.path.join(self.agent.images_folder, img) for img in images]
+            threading.Thread(target=self._prefetch_thumbnails, args=(paths,), daemon=True).start()
+
+
+    def _prefetch_thumbnails(self, paths):
+        # List thumbnails first so the visible list fills in quickly, then the viewer-sized ones
+        self.thumbnails.prefetch(paths, LIST_SIZE, on_ready=self._list_thumbnail_ready)
+        self.thumbnails.prefetch(paths, VIEWER_SIZE)
+
+
+    def _list_thumbnail_ready(self, image_path, thumbnail_path):
+        if thumbnail_path is not None:
+            image_filename = Path(image_path).relative_to(self.agent.images_folder).as_posix()
+            self.root.after(0, self._show_list_thumbnail, image_filename, thumbnail_path)
+
+
+    def _show_list_thumbnail(self, image_filename, thumbnail_path):
+        if not self.images_list.exists(image_filename):
+            return
+        try:
+            photo = ImageTk.PhotoImage(file=thumbnail_path)
+        except Exception as e:
+            log.warning(f"⚠️ Could not load thumbnail for {image_filename}: {e}")
+            return
+        self.list_images[image_filename] = photo
+        self.images_list.item(image_filename, image=photo)
+
+
+    def set_status(self, message):
+        # Tk is not thread-safe: worker threads hand status updates to the main loop
+        self.root.after(0, self.status_var.set, message)
 
 
     def show_image_window(self, image_filename):
         image_path = os.path.join(self.agent.images_folder, image_filename)
+        self.image_window = tk.Toplevel(self.root)
+        self.image_window.title(f"Viewing Image: {image_filename}")
+        self.image_window.geometry("500x420")
+        self.image_window.configure(bg='#fff')
+        img_label = tk.Label(self.image_window, text="Loading photo...", font=("Arial", 11), bg='#fff')
+        img_label.pack(expand=True, fill=tk.BOTH)
+        tk.Label(self.image_window, text="Describe what you see!",
+                 font=("Arial", 13), bg='#fff').pack(pady=5)
+        try:
+            thumbnail_path = self.thumbnails.cached_file(image_path, VIEWER_SIZE)
+        except OSError as e:
+            img_label.config(text=f"Could not display image: {e}")
+            return
+        if thumbnail_path is not None:
+            self._show_viewer_image(img_label, thumbnail_path)
+            return
+
+        def render():
+            try:
+                path = self.thumbnails.get_file(image_path, VIEWER_SIZE)
+            except Exception as e:
+                log.error(f"❌ Could not display image {image_filename}: {e}")
+                self.root.after(0, self._show_viewer_error, img_label, e)
+                return
+            self.root.after(0, self._show_viewer_image, img_label, path)
+
+        threading.Thread(target=render, daemon=True).start()
+
+
+    def _show_viewer_image(self, img_label, thumbnail_path):
+        if not img_label.winfo_exists():
+            return
         try:
-            img = Image.open(image_path)
-            img.thumbnail((480, 380))
-            self.image_window = tk.Toplevel(self.root)
-            self.image_window.title(f"Viewing Image: {image_filename}")
-            self.image_window.geometry("500x420")
-            self.image_window.configure(bg='#fff')
-            photo = ImageTk.PhotoImage(img)
-            img_label = tk.Label(self.image_window, image=photo, bg='#fff')
-            img_label.image = photo
-            img_label.pack(expand=True, fill=tk.BOTH)
-            tk.Label(self.image_window, text="Describe what you see!",
-                     font=("Arial", 13), bg='#fff').pack(pady=5)
+            photo = self.viewer_images.get(thumbnail_path)
         except Exception as e:
-            messagebox.showerror("Error", f"Could not display image: {e}")
+            self._show_viewer_error(img_label, e)
+            return
+        img_label.config(image=photo, text="")
+        img_label.image = photo
+
+
+    def _show_viewer_error(self, img_label, error):
+        if img_label.winfo_exists():
+            img_label.config(text=f"Could not display image: {error}")
 
 
     def close_image_window(self):
@@ -471,18 +1051,21 @@ class DementiaCareGUI:
 
     def start_conversation(self):
         patient_name = self.patient_var.get().strip()
-        selection = self.images_listbox.curselection()
+        selection = self.images_list.selection()
         if not patient_name:
             messagebox.showerror("Error", "Please enter patient name")
             return
         if not selection:
             messagebox.showerror("Error", "Please select an image")
             return
-        selected_text = self.images_listbox.get(selection[0])
-        if "No images found" in selected_text:
+        selected_text = selection[0]
+        if selected_text == self.NO_IMAGES:
             messagebox.showerror("Error", "No images available. Add images to 'patient_images' folder.")
             return
         image_filename = selected_text
+        if self.agent.conversation_active:
+            messagebox.showerror("Error", "A conversation is already running")
+            return
         self.show_image_window(image_filename)
         self.status_var.set(f"Starting conversation about {image_filename}...")
         self.root.update()
@@ -490,26 +1073,71 @@ class DementiaCareGUI:
         def run_conversation():
             try:
                 self.agent.start_conversation(patient_name, image_filename, on_conversation_end=self.close_image_window)
-                self.status_var.set("✅ Conversation completed and memory saved!")
+                self.set_status("✅ Conversation completed and memory saved!")
             except Exception as e:
-                self.status_var.set(f"❌ Error: {str(e)}")
-                print(f"Conversation error: {e}")
+                self.set_status(f"❌ Error: {str(e)}")
+                log.error(f"Conversation error: {e}")
 
         thread = threading.Thread(target=run_conversation, daemon=True)
         thread.start()
 
 
+    def start_album(self):
+        patient_name = self.patient_var.get().strip()
+        if not patient_name:
+            messagebox.showerror("Error", "Please enter patient name")
+            return
+        rows = [row for row in self.images_list.get_children() if row != self.NO_IMAGES]
+        if not rows:
+            messagebox.showerror("Error", "No images available. Add images to 'patient_images' folder.")
+            return
+        if self.agent.conversation_active:
+            messagebox.showerror("Error", "A conversation is already running")
+            return
+        # The album starts at the selected photo (or the first one) and runs through the listed photos
+        selection = self.images_list.selection()
+        images = rows[rows.index(selection[0]):] if selection and selection[0] in rows else rows
+        self.status_var.set(f"📚 Starting a photo album of {len(images)} photos...")
+
+        def prefetch_image(image_filename):
+            self.thumbnails.prefetch([os.path.join(self.agent.images_folder, image_filename)], VIEWER_SIZE)
+
+        def on_photo(index, image_filename):
+            self.root.after(0, self._show_album_photo, index, len(images), image_filename)
+
+        def run_album():
+            try:
+                completed = self.agent.start_album(
+                    patient_name, images, on_photo=on_photo, prefetch_image=prefetch_image
+                )
+                self.set_status(f"✅ Album finished: {len(completed)} photos talked about, memories saved")
+            except Exception as e:
+                self.set_status(f"❌ Error: {str(e)}")
+                log.error(f"Album error: {e}")
+            finally:
+                self.close_image_window()
+
+        threading.Thread(target=run_album, daemon=True).start()
+
+
+    def _show_album_photo(self, index, total, image_filename):
+        if self.image_window is not None and self.image_window.winfo_exists():
+            self.image_window.destroy()
+        self.show_image_window(image_filename)
+        self.status_var.set(f"📚 Photo {index + 1} of {total}: {image_filename}")
+
+
     def recall_memory(self):
         patient_name = self.patient_var.get().strip()
-        selection = self.images_listbox.curselection()
+        selection = self.images_list.selection()
         if not patient_name:
             messagebox.showerror("Error", "Please enter patient name")
             return
         if not selection:
             messagebox.showerror("Error", "Please select an image")
             return
-        image_filename = self.images_listbox.get(selection[0])
-        if "No images found" in image_filename:
+        image_filename = selection[0]
+        if image_filename == self.NO_IMAGES:
             messagebox.showerror("Error", "No images available.")
             return
 
@@ -517,22 +1145,84 @@ class DementiaCareGUI:
             try:
                 memory = self.agent.recall_memory(patient_name, image_filename)
                 if memory:
-                    self.status_var.set(f"✅ Recalled memory for {image_filename}")
+                    self.set_status(f"✅ Recalled memory for {image_filename}")
                 else:
-                    self.status_var.set(f"No memory found for {image_filename}")
+                    self.set_status(f"No memory found for {image_filename}")
             except Exception as e:
-                self.status_var.set(f"❌ Error: {str(e)}")
-                print(f"Recall error: {e}")
+                self.set_status(f"❌ Error: {str(e)}")
+                log.error(f"Recall error: {e}")
 
         thread = threading.Thread(target=run_recall, daemon=True)
         thread.start()
 
 
+    def search_memories(self):
+        query = simpledialog.askstring("Search Memories", "What should the memory mention?", parent=self.root)
+        if not query or not query.strip():
+            return
+        patient_name = self.patient_var.get().strip() or None
+        self.status_var.set(f"🔍 Searching memories for '{query}'...")
+
+        def run_search():
+            try:
+                results = self.agent.search_memories(query, patient_name=patient_name, limit=20)
+            except Exception as e:
+                self.set_status(f"❌ Error: {str(e)}")
+                log.error(f"Search error: {e}")
+                return
+            self.root.after(0, self._show_search_results, query, results)
+
+        thread = threading.Thread(target=run_search, daemon=True)
+        thread.start()
+
+
+    def _show_search_results(self, query, results):
+        if not results:
+            self.status_var.set(f"No memories mention '{query}'")
+            return
+        self.status_var.set(f"Found {len(results)} memories for '{query}' - double-click one to select its photo")
+        window = tk.Toplevel(self.root)
+        window.title(f"Memories about: {query}")
+        window.geometry("600x320")
+        results_listbox = tk.Listbox(window, font=("Arial", 10))
+        results_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        for result in results:
+            results_listbox.insert(
+                tk.END, f"{result['patient_name']} - {result['image_filename']}: {result['memory_note'][:80]}"
+            )
+
+        def select_result(event):
+            selection = results_listbox.curselection()
+            if selection:
+                self._select_image(results[selection[0]]['patient_name'], results[selection[0]]['image_filename'])
+
+        results_listbox.bind("<Double-Button-1>", select_result)
+
+
+    def _select_image(self, patient_name, image_filename):
+        if self.patient_var.get().strip().lower() != patient_name.lower():
+            self.patient_var.set(patient_name)
+        while not self.images_list.exists(image_filename) and self._loaded_images < self._total_images:
+            if not self._load_more_images():
+                break
+        if self.images_list.exists(image_filename):
+            self.images_list.selection_set(image_filename)
+            self.images_list.see(image_filename)
+        else:
+            self.status_var.set(f"{image_filename} is no longer in 'patient_images'")
+
+
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.agent.image_catalog.stop_watching()
+            self.thumbnails.shutdown()
 
 
 if __name__ == "__main__":
+    configure_logging()
+    serve_from_env()
     print("MEEMO")
     print("=" * 60)
     try:
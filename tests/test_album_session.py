@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from album_session import FIRST_PHOTO_INTRO, AlbumSession
+
+
+class FakeAgent:
+    def __init__(self, fail_speech=False, refuse=()):
+        self.fail_speech = fail_speech
+        self.refuse = set(refuse)
+        self.cancel_event = threading.Event()
+        self.spoken = []
+        self.queued = []
+        self.summary_jobs = self
+
+    def submit_many(self, jobs):
+        self.queued.extend(jobs)
+
+    def lookup_memory(self, patient_name, image_filename):
+        if image_filename == "broken.jpg":
+            raise RuntimeError("store unavailable")
+        return None
+
+    def prefetch_speech(self, texts):
+        if self.fail_speech:
+            raise IndexError("synthesis failed")
+
+    def prefetch_questions(self, patient_name, image_filename, memory_note=None):
+        return []
+
+    def speak(self, text):
+        self.spoken.append(text)
+
+    def start_conversation(self, patient_name, image_filename):
+        return None if image_filename in self.refuse else f"conv-{image_filename}"
+
+
+def test_prefetch_failures_fall_back_to_live_speech():
+    agent = FakeAgent(fail_speech=True)
+    completed = AlbumSession(agent, "Ann", ["a.jpg", "broken.jpg", "c.jpg"]).run()
+    assert completed == ["conv-a.jpg", "conv-broken.jpg", "conv-c.jpg"]
+    assert agent.spoken[0] == FIRST_PHOTO_INTRO
+
+
+def test_refused_conversations_are_not_listed():
+    agent = FakeAgent(refuse={"b.jpg"})
+    assert AlbumSession(agent, "Ann", ["a.jpg", "b.jpg"]).run() == ["conv-a.jpg"]
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import ConversationLog, _synthetic_conversations
+
+ROLLUPS = ("rollup_weekly", "rollup_emotions", "rollup_photos")
+
+
+def _rollups(conversation_log):
+    return {table: sorted(conversation_log._query(f"SELECT * FROM {table}")) for table in ROLLUPS}
+
+
+def test_incremental_rollups_match_a_rebuild(tmp_path):
+    conversation_log = ConversationLog(tmp_path / "conversation_log.db")
+    conversations = list(_synthetic_conversations(500))
+    conversation_log.record_many(conversations[:400])
+    for conversation, turns in conversations[400:]:
+        conversation_log.record(conversation, turns)
+    # Logging a conversation twice must not count it twice
+    conversation_log.record(*conversations[0])
+
+    incremental = _rollups(conversation_log)
+    assert all(incremental.values())
+    conversation_log.rebuild_rollups()
+    assert _rollups(conversation_log) == incremental
+    conversation_log.close()
+
+
+def test_reports_read_the_rollups(tmp_path):
+    conversation_log = ConversationLog(tmp_path / "conversation_log.db")
+    conversations = list(_synthetic_conversations(200))
+    conversation_log.record_many(conversations)
+    assert sum(sessions for week, sessions in conversation_log.sessions_per_week()) == 200
+    assert conversation_log.turn_count() == sum(len(turns) for conversation, turns in conversations)
+    skipped = sum(conversation["outcome"] == "skipped" for conversation, turns in conversations)
+    assert sum(row[2] for row in conversation_log.skip_triggers("sad", limit=1000)) == skipped
+    conversation_log.close()
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import speech_recognition as sr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import background_listener
+from background_listener import BackgroundListener
+
+
+class FakePlayback:
+    def __init__(self, finished_at=None):
+        self.finished_at = finished_at
+        self.cancelled = False
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def _audio(seconds, sample_rate=16000, sample_width=2):
+    return sr.AudioData(b"\0" * int(seconds * sample_rate * sample_width), sample_rate, sample_width)
+
+
+def _listener(monkeypatch, now, barge_in=False):
+    monkeypatch.setattr(background_listener.time, "perf_counter", lambda: now)
+    return BackgroundListener(None, None, recognize=lambda audio: "heard", barge_in=barge_in)
+
+
+def test_phrase_started_during_playback_is_dropped_as_echo(monkeypatch):
+    # Playback ended at t=100; a 2 s phrase captured at t=101 started at t=99, while the question was playing
+    listener = _listener(monkeypatch, 101.0)
+    listener.set_playback(FakePlayback(finished_at=100.0))
+    listener._on_phrase(None, _audio(2.0))
+    assert listener.next_utterance(timeout=0.01) == "TIMEOUT"
+    listener.shutdown()
+
+
+def test_phrase_started_after_playback_is_kept(monkeypatch):
+    listener = _listener(monkeypatch, 103.0)
+    listener.set_playback(FakePlayback(finished_at=100.0))
+    listener._on_phrase(None, _audio(2.0))
+    assert listener.next_utterance(timeout=1) == "heard"
+    listener.shutdown()
+
+
+def test_phrase_within_echo_margin_is_dropped(monkeypatch):
+    listener = _listener(monkeypatch, 102.1)
+    listener.set_playback(FakePlayback(finished_at=100.0))
+    listener._on_phrase(None, _audio(2.0))
+    assert listener.next_utterance(timeout=0.01) == "TIMEOUT"
+    listener.shutdown()
+
+
+def test_barge_in_stops_running_playback(monkeypatch):
+    listener = _listener(monkeypatch, 101.0, barge_in=True)
+    playback = FakePlayback()
+    listener.set_playback(playback)
+    listener._on_phrase(None, _audio(1.0))
+    assert playback.cancelled and listener.barge_ins == 1
+    assert listener.next_utterance(timeout=1) == "heard"
+    listener.shutdown()
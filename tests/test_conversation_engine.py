@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_engine import DONE, SAMPLE_SCRIPTS, SKIPPED, TELL_MORE, EndpointClosed, HeadlessRunner
+
+
+@pytest.fixture
+def runner():
+    return HeadlessRunner()
+
+
+def _states(result):
+    return [data["state"] for kind, data in result["events"] if kind == "state"]
+
+
+def test_answers_then_save(runner):
+    result = runner.run(SAMPLE_SCRIPTS[0])
+    assert result["error"] is None and result["final_state"] == DONE and result["saved"]
+    assert result["responses"] == SAMPLE_SCRIPTS[0][:3]
+
+
+def test_difficult_feeling_then_skip_saves_nothing(runner):
+    result = runner.run(SAMPLE_SCRIPTS[2])
+    assert result["error"] is None and result["final_state"] == SKIPPED and not result["saved"]
+    assert "We won't save this memory" in result["spoken"][-1]
+
+
+def test_tell_more_then_save(runner):
+    result = runner.run(SAMPLE_SCRIPTS[1])
+    assert result["error"] is None and result["final_state"] == DONE and result["saved"]
+    assert TELL_MORE in _states(result)
+    # Listen statuses are re-asked, never recorded as answers
+    assert result["responses"] == [
+        "My sister and me at the beach", "We built sandcastles all day", "It was warm and sunny",
+        "Our mother packed sandwiches",
+    ]
+
+
+@pytest.mark.parametrize("reply", ["no that's all", "no thats all", "no please save", "no save it", "no goodbye"])
+def test_no_then_stop_at_more_or_save_saves(runner, reply):
+    result = runner.run(["We went to the lake", "My father rowed", "It was sunny", reply])
+    assert result["error"] is None and result["final_state"] == DONE and result["saved"]
+    assert TELL_MORE not in _states(result)
+
+
+def test_not_done_keeps_listening(runner):
+    result = runner.run(["We went to the lake", "My father rowed", "It was sunny", "I'm not done yet"])
+    assert isinstance(result["error"], EndpointClosed)
+    assert result["final_state"] == TELL_MORE and not result["saved"]
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_catalog import ImageCatalog, _PollingWatcher
+
+
+@pytest.fixture
+def photos(tmp_path):
+    root = tmp_path / "patient_images"
+    (root / "Ann").mkdir(parents=True)
+    (root / "Bob").mkdir()
+    (root / "Ann" / "beach.jpg").write_bytes(b"beach")
+    (root / "Bob" / "garden.png").write_bytes(b"garden")
+    (root / "shared.jpg").write_bytes(b"shared")
+    return root
+
+
+@pytest.fixture
+def catalog(photos, tmp_path):
+    catalog = ImageCatalog(photos, tmp_path / "image_catalog.db")
+    yield catalog
+    catalog.close()
+
+
+def _sorted(delta):
+    # scan() lists files in directory order
+    return {kind: sorted(paths) for kind, paths in delta.items()}
+
+
+def _touch(path, content):
+    stat = path.stat() if path.exists() else None
+    path.write_bytes(content)
+    if stat is not None:
+        # Make sure the mtime moves even on filesystems with coarse timestamps
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_scan_reports_added_updated_and_removed(catalog, photos):
+    assert _sorted(catalog.scan()) == {"added": ["Ann/beach.jpg", "Bob/garden.png", "shared.jpg"],
+                                       "updated": [], "removed": []}
+    assert catalog.scan() == {"added": [], "updated": [], "removed": []}
+
+    (photos / "Ann" / "lake.jpg").write_bytes(b"lake")
+    _touch(photos / "Bob" / "garden.png", b"garden in spring")
+    (photos / "shared.jpg").unlink()
+    (photos / "Ann" / "notes.txt").write_text("not a photo")
+    assert _sorted(catalog.scan()) == {"added": ["Ann/lake.jpg"], "updated": ["Bob/garden.png"],
+                                       "removed": ["shared.jpg"]}
+    assert catalog.count() == 3
+    assert catalog.count(patient="ann", include_shared=False) == 2
+
+
+def test_subdir_scan_only_touches_that_folder(catalog, photos):
+    catalog.scan()
+    (photos / "Ann" / "beach.jpg").unlink()
+    (photos / "Bob" / "dog.jpg").write_bytes(b"dog")
+    assert catalog.scan("Ann") == {"added": [], "updated": [], "removed": ["Ann/beach.jpg"]}
+    assert catalog.get("Bob/dog.jpg") is None
+
+
+def test_duplicates_are_grouped_by_content(catalog, photos):
+    (photos / "Bob" / "beach copy.jpg").write_bytes(b"beach")
+    catalog.scan()
+    assert catalog.duplicates() == [["Ann/beach.jpg", "Bob/beach copy.jpg"]]
+
+
+class ScanSpy:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.scans = []
+
+    def __getattr__(self, name):
+        return getattr(self.catalog, name)
+
+    def scan(self, subdir=None):
+        self.scans.append(subdir)
+        return self.catalog.scan(subdir)
+
+
+def test_polling_only_rescans_changed_folders(catalog, photos):
+    spy = ScanSpy(catalog)
+    watcher = _PollingWatcher(spy, on_change=None, interval=5.0, full_scan_every=100)
+    assert sorted(watcher.poll()["added"]) == ["Ann/beach.jpg", "Bob/garden.png", "shared.jpg"]
+    assert spy.scans == [None]
+
+    assert watcher.poll() == {"added": [], "updated": [], "removed": []}
+    assert spy.scans == [None]
+
+    (photos / "Ann" / "lake.jpg").write_bytes(b"lake")
+    os.utime(photos / "Ann", ns=(0, photos.joinpath("Ann").stat().st_mtime_ns + 1_000_000_000))
+    assert watcher.poll() == {"added": ["Ann/lake.jpg"], "updated": [], "removed": []}
+    assert spy.scans == [None, "Ann"]
+
+
+def test_polling_catches_in_place_edits_on_full_scans(catalog, photos):
+    watcher = _PollingWatcher(catalog, on_change=None, interval=5.0, full_scan_every=2)
+    watcher.poll()
+    _touch(photos / "Bob" / "garden.png", b"garden in spring")
+    assert watcher.poll()["updated"] == ["Bob/garden.png"]
@@ -0,0 +1,25 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from intent_classifier import DEFAULT_CLASSIFIER, STOP_INTENTS
+
+with open(os.path.join(ROOT, "fixtures", "intents.jsonl"), encoding="utf-8") as f:
+    EXAMPLES = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("example", EXAMPLES, ids=[e["text"][:40] for e in EXAMPLES])
+def test_labeled_utterances(example):
+    result = DEFAULT_CLASSIFIER.classify(example["text"])
+    assert result.emotion == example["emotion"]
+    assert bool(result.intents & STOP_INTENTS) == example["stop"]
+
+
+def test_batch_matches_single():
+    texts = [e["text"] for e in EXAMPLES]
+    assert DEFAULT_CLASSIFIER.classify_batch(texts) == [DEFAULT_CLASSIFIER.classify(t) for t in texts]
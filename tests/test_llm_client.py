@@ -0,0 +1,48 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_client import LLMClient, LLMError, StubLLMServer
+
+MESSAGES = [{"role": "user", "content": "Summarize"}]
+
+
+def test_retries_until_the_stub_recovers():
+    with StubLLMServer(reply="Recovered.", fail_first=2) as stub:
+        client = LLMClient("key", stub.url, max_retries=3, backoff_base=0.01)
+        assert client.chat(MESSAGES) == "Recovered."
+        client.close()
+    assert len(stub.requests) == 3
+    assert client.stats == {"requests": 3, "retries": 2, "failures": 0}
+
+
+def test_gives_up_after_max_retries():
+    with StubLLMServer(fail_first=10, fail_status=503) as stub:
+        client = LLMClient("key", stub.url, max_retries=2, backoff_base=0.01)
+        with pytest.raises(LLMError, match="after 3 attempts: HTTP 503"):
+            client.chat(MESSAGES)
+        client.close()
+    assert len(stub.requests) == 3
+    assert client.stats == {"requests": 3, "retries": 2, "failures": 1}
+
+
+def test_backoff_does_not_hold_a_concurrency_slot():
+    with StubLLMServer(reply="ok", fail_first=1) as stub:
+        client = LLMClient("key", stub.url, max_retries=1, max_concurrency=1)
+        client._backoff = lambda attempt, retry_after=None: 1.0
+        failing = threading.Thread(target=client.chat, args=(MESSAGES,))
+        failing.start()
+        while not stub.requests:
+            time.sleep(0.005)
+        time.sleep(0.05)
+        # The first caller is now sleeping before its retry; a second caller gets the only slot meanwhile
+        start = time.perf_counter()
+        assert client.chat(MESSAGES) == "ok"
+        assert time.perf_counter() - start < 0.5
+        failing.join()
+        client.close()
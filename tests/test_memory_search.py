@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_search import MemorySearch, _synthetic_records
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def search():
+    index = MemorySearch(semantic=True)
+    for record in _synthetic_records(2000):
+        index.index_record(record)
+    return index
+
+
+def test_hybrid_finds_misspelled_queries(search):
+    hits = search.search("Austira snowmen", limit=3)
+    assert hits and all("Austria" in hit["memory_note"] and "snowman" in hit["memory_note"] for hit in hits)
+
+
+def test_filtered_semantic_returns_only_that_patients_notes(search):
+    hits = search.search("dog Max", patient_name="patient-42", mode="semantic", limit=5)
+    assert hits and {hit["patient_name"] for hit in hits} == {"patient-42"}
+    assert "Max" in hits[0]["memory_note"]
+
+
+def test_hybrid_reranks_keyword_hits(search):
+    hits = search.search("sister Anna skiing", limit=5)
+    assert len(hits) == 5
+    assert all("Anna" in hit["memory_note"] or "skiing" in hit["memory_note"] for hit in hits)
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from memory_store import MemoryStore, SqliteMemoryStore, open_memory_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteMemoryStore(tmp_path / "memories.db")
+    yield store
+    store.close()
+
+
+def test_memory_store_is_abstract():
+    with pytest.raises(TypeError):
+        MemoryStore()
+
+
+def test_save_upserts_on_patient_and_photo(store):
+    store.save("Ann", "beach.jpg", "first", "c1")
+    store.save("Ann", "beach.jpg", "second", "c2", raw_transcript=["we swam"], summary_status="pending")
+    store.save("Bob", "beach.jpg", "other patient", "c3")
+    assert store.count() == 2
+    record = store.get("Ann", "beach.jpg")
+    assert record["memory_note"] == "second" and record["conversation_id"] == "c2"
+    assert record["raw_transcript"] == ["we swam"]
+    assert [r["conversation_id"] for r in store.pending_summaries()] == ["c2"]
+
+
+def test_update_summary_only_fills_the_current_conversation(store):
+    store.save("Ann", "beach.jpg", "pending", "c1", summary_status="pending")
+    store.save("Ann", "beach.jpg", "pending", "c2", summary_status="pending")
+    # The summary of the replaced conversation arrives late and must not overwrite the newer one
+    assert not store.update_summary("Ann", "beach.jpg", "c1", "stale summary")
+    assert store.update_summary("Ann", "beach.jpg", "c2", "We talked about the lake.")
+    record = store.get("Ann", "beach.jpg")
+    assert record["memory_note"] == "We talked about the lake." and record["summary_status"] == "done"
+    assert store.pending_summaries() == []
+
+
+def test_update_summary_without_note_only_changes_status(store):
+    store.save("Ann", "beach.jpg", "kept", "c1", summary_status="pending")
+    assert store.update_summary("Ann", "beach.jpg", "c1", None, summary_status="failed")
+    record = store.get("Ann", "beach.jpg")
+    assert record["memory_note"] == "kept" and record["summary_status"] == "failed"
+
+
+def test_listeners_hear_about_writes(store):
+    changed = []
+    store.add_listener(changed.extend)
+    store.save("Ann", "beach.jpg", "note", "c1")
+    store.update_summary("Ann", "beach.jpg", "c1", "summary")
+    assert changed == [("Ann", "beach.jpg"), ("Ann", "beach.jpg")]
+
+
+def test_legacy_workbook_migrates_once(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("openpyxl")
+    workbook = tmp_path / "patient_memories.xlsx"
+    pd.read_csv(os.path.join(ROOT, "fixtures", "legacy_memories.csv")).to_excel(workbook, index=False)
+    db_file = tmp_path / "memories.db"
+
+    store = open_memory_store(db_file, legacy_xlsx_file=workbook)
+    assert store.count() == 3
+    assert store.get("Ann", "wedding.jpg")["memory_note"] == "You remembered dancing with Tom at your wedding."
+    assert store.get_meta("legacy_import").endswith("3 memories")
+    store.save("Ann", "beach.jpg", "updated since the migration", "c4")
+    store.close()
+
+    # Reopening must not import the workbook again over newer memories
+    store = open_memory_store(db_file, legacy_xlsx_file=workbook)
+    assert store.count() == 3
+    assert store.get("Ann", "beach.jpg")["memory_note"] == "updated since the migration"
+    store.close()
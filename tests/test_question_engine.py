@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_engine import DEFAULT_QUESTIONS
+from llm_client import LLMClient, StubLLMServer
+from question_engine import QuestionEngine, _stub_reply, describe_photo, parse_questions
+from summary_cache import SummaryCache
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    opened = []
+
+    def make(stub, budget_ms):
+        client = LLMClient("stub", stub.url, max_retries=0)
+        cache = SummaryCache(tmp_path / "question_cache.db")
+        engine = QuestionEngine(client.chat, "stub", cache, budget_ms=budget_ms)
+        opened.append((engine, client, cache))
+        return engine
+
+    yield make
+    for engine, client, cache in opened:
+        engine.close()
+        client.close()
+        cache.close()
+
+
+def test_slow_llm_falls_back_to_the_scripted_question(make_engine):
+    with StubLLMServer(reply=_stub_reply, delay=1.0) as stub:
+        engine = make_engine(stub, budget_ms=50)
+        plan = engine.plan(describe_photo("Ann/beach_holiday.jpg"))
+        start = time.perf_counter()
+        assert plan.ask(0, []) == DEFAULT_QUESTIONS[0]
+        assert plan.ask(1, ["We swam in the sea"]) == DEFAULT_QUESTIONS[1]
+        assert time.perf_counter() - start < 0.5
+        assert plan.sources == ["static", "static"]
+        plan.close()
+
+
+def test_fast_llm_questions_build_on_the_answers(make_engine):
+    with StubLLMServer(reply=_stub_reply) as stub:
+        engine = make_engine(stub, budget_ms=2000)
+        plan = engine.plan(describe_photo("Ann/beach_holiday.jpg"))
+        assert plan.ask(0, []) == "What do you enjoy most about this photo?"
+        plan.heard("We swam in the sea")
+        assert plan.ask(1, ["We swam in the sea"]) == "What do you enjoy most about in the sea?"
+        assert plan.sources == ["opening", "generated"]
+        plan.close()
+        # The opening set only depends on the photo, so the next session reuses it from the cache
+        calls = len(stub.requests)
+        assert engine.plan(describe_photo("Ann/beach_holiday.jpg")).ask(0, []) == plan.asked[0]
+        assert len(stub.requests) == calls
+
+
+def test_describe_photo_skips_camera_names():
+    assert describe_photo("Ann/Lake Garda/IMG_1234.jpg", "1998-07-14 10:00:00") == (
+        "a photo of lake garda, taken in July 1998"
+    )
+
+
+def test_parse_questions_drops_non_questions():
+    reply = "Here are some questions:\n1. Who rowed the boat?\n- What did the lake smell like?\nThanks!"
+    assert parse_questions(reply, 3) == ["Who rowed the boat?", "What did the lake smell like?"]
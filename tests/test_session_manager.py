@@ -0,0 +1,61 @@
+import json
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_engine import EndpointClosed
+from session_manager import AudioEndpoint, SocketEndpoint
+
+
+@pytest.fixture
+def room():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    accepted = {}
+    thread = threading.Thread(target=lambda: accepted.setdefault("conn", server.accept()[0]))
+    thread.start()
+    endpoint = SocketEndpoint(*server.getsockname())
+    thread.join()
+    yield endpoint, accepted["conn"]
+    endpoint.close()
+    accepted["conn"].close()
+    server.close()
+
+
+def test_hear_reads_after_a_timeout(room):
+    endpoint, conn = room
+    assert endpoint.hear(timeout=0.1) == "TIMEOUT"
+    conn.sendall((json.dumps({"heard": "my dog Max"}) + "\n").encode("utf-8"))
+    assert endpoint.hear(timeout=2) == "my dog Max"
+
+
+def test_hear_splits_lines_and_partial_reads(room):
+    endpoint, conn = room
+    conn.sendall(b'{"heard": "first"}\n{"heard": "sec')
+    assert endpoint.hear(timeout=2) == "first"
+    assert endpoint.hear(timeout=0.1) == "TIMEOUT"
+    conn.sendall(b'ond"}\nnot json\n')
+    assert endpoint.hear(timeout=2) == "second"
+    assert endpoint.hear(timeout=2) == "ERROR"
+
+
+def test_hear_raises_when_room_disconnects(room):
+    endpoint, conn = room
+    conn.close()
+    with pytest.raises(EndpointClosed):
+        endpoint.hear(timeout=2)
+
+
+def test_endpoints_must_implement_say_and_hear():
+    class SilentEndpoint(AudioEndpoint):
+        def say(self, text):
+            pass
+
+    with pytest.raises(TypeError):
+        SilentEndpoint()
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from speech_pipeline import SpeechHandle, split_sentences
+
+
+def test_two_chunks_ending_in_short_sentence():
+    assert split_sentences("Tell me, what do you see in this photo? Take your time.") == [
+        "Tell me, what do you see in this photo? Take your time."
+    ]
+    assert split_sentences("Let me try listening again. Please go ahead.") == [
+        "Let me try listening again. Please go ahead."
+    ]
+
+
+def test_three_chunks_ending_in_short_sentence_keeps_every_sentence():
+    text = "Okay, I understand. We won't save this memory. Thank you for sharing with me today. Take care!"
+    chunks = split_sentences(text)
+    assert " ".join(chunks) == text
+    assert chunks == [
+        "Okay, I understand. We won't save this memory.",
+        "Thank you for sharing with me today. Take care!",
+    ]
+
+
+def test_long_sentences_stay_separate():
+    text = "This is the first long sentence here. This is the second long sentence here."
+    assert split_sentences(text) == ["This is the first long sentence here.", "This is the second long sentence here."]
+
+
+def test_completed_handle_is_already_done():
+    handle = SpeechHandle.completed("Take your time.")
+    assert handle.done and handle.wait(0) and handle.error is None
+    assert handle.time_to_first_audio is None and not handle.cancelled.is_set()
@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stress_test
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    # A small run of the stress harness: every memory is summarized, so none may be left pending
+    result = stress_test.run(processes=2, threads=4, readers=1, saves=25, summarize_every=1,
+                             db_file=str(tmp_path / "memories.db"))
+    assert result["failures"] == []
+    assert result["stored"] == result["expected"] == 200
+    assert result["items"] == 200
+    assert result["pending"] == 0
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stt_engines import FakeEngine, RecognizerEngine, create_engine
+
+
+def test_engines_must_implement_recognize():
+    class Unfinished(RecognizerEngine):
+        name = "unfinished"
+
+    with pytest.raises(TypeError):
+        Unfinished()
+
+
+def test_fake_engine_replays_fixture_transcripts():
+    engine = create_engine("fake", fixtures_dir=os.path.join(ROOT, "fixtures", "audio"))
+    assert isinstance(engine, FakeEngine) and engine.clips
+    texts = engine.transcribe_batch(engine.clips)
+    assert len(texts) == len(engine.clips) and "ERROR" not in texts
+    assert engine.report()["calls"] == len(engine.clips)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError, match="Unknown speech engine"):
+        create_engine("nonexistent")
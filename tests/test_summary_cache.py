@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import summary_cache
+from summary_cache import SummaryCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SummaryCache(tmp_path / "summary_cache.db", ttl_seconds=60)
+    yield cache
+    cache.close()
+
+
+def test_concurrent_callers_share_one_compute(cache):
+    callers = 8
+    computes = []
+    release = threading.Event()
+    arrived = threading.Barrier(callers + 1)
+
+    def compute():
+        computes.append(threading.current_thread().name)
+        release.wait(5)
+        return "You shared a lovely memory."
+
+    results = []
+
+    def call():
+        arrived.wait()
+        results.append(cache.get_or_compute("key", compute))
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    arrived.wait()
+    # Let every caller reach the cache while the first compute is still running
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(computes) == 1
+    assert results == ["You shared a lovely memory."] * callers
+    assert cache.stats["api_calls"] == 1 and cache.stats["coalesced"] == callers - 1
+
+
+def test_failed_compute_is_not_cached(cache):
+    def fail():
+        raise RuntimeError("LLM down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("key", fail)
+    assert cache.get_or_compute("key", lambda: "second try") == "second try"
+
+
+def test_entries_expire_after_ttl(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(summary_cache.time, "time", lambda: now[0])
+    cache.get_or_compute("key", lambda: "first")
+    now[0] += 59
+    assert cache.get_or_compute("key", lambda: "recomputed") == "first"
+    now[0] += 2
+    assert cache.get_or_compute("key", lambda: "recomputed") == "recomputed"
+    assert cache.stats["hits"] == 1 and cache.stats["api_calls"] == 2
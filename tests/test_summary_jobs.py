@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_store import SqliteMemoryStore
+from summary_jobs import SummaryJobQueue
+
+
+def test_unfinished_job_is_replayed_exactly_once_after_a_crash(tmp_path):
+    journal = tmp_path / "summary_jobs.jsonl"
+    store = SqliteMemoryStore(tmp_path / "memories.db")
+    responses = ["We went to the lake", "My father rowed the boat"]
+
+    # The first process picks the job up and never finishes it, as if it crashed mid-summary
+    started = threading.Event()
+
+    def hang(job):
+        started.set()
+        threading.Event().wait()
+
+    jobs = SummaryJobQueue(journal, hang, store)
+    store.save("Ann", "beach.jpg", "pending", "c1", raw_transcript=responses, summary_status="pending")
+    jobs.submit("Ann", "beach.jpg", "c1", responses)
+    assert started.wait(5)
+
+    summarized = []
+
+    def summarize(job):
+        summarized.append((job["conversation_id"], job["responses"]))
+        return "You shared a summer at the lake."
+
+    restarted = SummaryJobQueue(journal, summarize, store)
+    assert restarted.wait_idle(timeout=5)
+    # Journaled and still pending in the store, but replayed once, not once per source
+    assert summarized == [("c1", responses)]
+    record = store.get("Ann", "beach.jpg")
+    assert record["memory_note"] == "You shared a summer at the lake." and record["summary_status"] == "done"
+
+    # Once done, a further restart has nothing left to replay
+    assert SummaryJobQueue(journal, summarize, store).pending == 0
+    assert len(summarized) == 1
+    store.close()
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import telemetry
+from telemetry import Telemetry
+
+
+def test_session_histograms_are_dropped_after_summary():
+    recorder = Telemetry(enabled=True)
+    for session in ("conv-1", "conv-2"):
+        trace = recorder.session(session)
+        trace.record("stt", 120.0)
+        trace.record("llm", 800.0)
+        assert trace.summary()["stt"]["count"] == 1
+    assert recorder.snapshot("conv-1") == {}
+    assert recorder.snapshot()["stt"]["count"] == 2
+    assert all(not session for _, session in recorder._histograms)
+
+
+def test_prometheus_exports_only_aggregate_series():
+    recorder = Telemetry(enabled=True)
+    recorder.session("conv-1").record("stt", 120.0)
+    text = recorder.prometheus_text()
+    assert 'span="stt"' in text
+    assert "session=" not in text
+    assert 'meemo_span_duration_seconds_count{span="stt"} 1' in text
+
+
+def test_metrics_port_is_not_bound_on_import(monkeypatch):
+    monkeypatch.setenv("MEEMO_METRICS_PORT", "1")
+    created = telemetry.from_env()
+    assert created.enabled
+    assert created._server is None
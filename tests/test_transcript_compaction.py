@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summary_cache import SummaryCache
+from transcript_compaction import TranscriptCompactor, _clip, _size, _stub_reply
+
+REPLIES = [
+    "We went to the lake every summer and my father rowed the little green boat",
+    "My sister Anna was scared of the fish but she loved the ice cream afterwards",
+    "The house smelled of pine and my mother baked apple cake on Sundays",
+]
+
+
+@pytest.fixture
+def compactor(tmp_path):
+    cache = SummaryCache(tmp_path / "summary_cache.db")
+    compactor = TranscriptCompactor(
+        lambda messages, **options: _stub_reply({"messages": messages}), "stub", cache, summary_words=40
+    )
+    yield compactor
+    compactor.close()
+    cache.close()
+
+
+def _conversation(length):
+    return [f"{REPLIES[i % len(REPLIES)]} ({i})" for i in range(length)]
+
+
+def _settle(rolling):
+    with rolling._settled:
+        while rolling._inflight is not None:
+            rolling._settled.wait(5)
+
+
+def test_working_set_stays_bounded_over_a_long_conversation(compactor):
+    limit = compactor.chunk_chars + compactor.summary_chars
+    rolling = compactor.start("long")
+    for reply in _conversation(600):
+        rolling.add(reply)
+        _settle(rolling)
+        assert len(rolling.summary) + _size(rolling.tail) <= limit
+    notes, tail = compactor.state("long", [])
+    assert rolling.compacted > 500
+    assert len(notes) <= compactor.summary_chars and _size(tail) <= compactor.chunk_chars
+    assert tail[-1] == "The house smelled of pine and my mother baked apple cake on Sundays (599)"
+
+
+def test_replayed_conversation_has_the_same_shape(compactor):
+    responses = _conversation(200)
+    rolling = compactor.start("live")
+    for reply in responses:
+        rolling.add(reply)
+        _settle(rolling)
+    live = compactor.state("live", [])
+    # After a restart the conversation is no longer tracked and is folded from its responses
+    replayed = compactor.state("replayed", responses)
+    assert isinstance(replayed[0], str) and isinstance(replayed[1], list)
+    assert replayed == live
+
+
+def test_short_conversation_is_not_compacted(compactor):
+    responses = _conversation(3)
+    assert compactor.state("short", responses) == ("", responses)
+
+
+def test_failed_fold_keeps_clipped_extracts(tmp_path):
+    def fail(messages, **options):
+        raise RuntimeError("LLM down")
+
+    cache = SummaryCache(tmp_path / "summary_cache.db")
+    compactor = TranscriptCompactor(fail, "stub", cache, summary_words=40)
+    notes, tail = compactor.state("offline", _conversation(100))
+    assert notes.startswith(REPLIES[0]) and len(notes) <= compactor.summary_chars
+    assert _size(tail) <= compactor.chunk_chars
+    compactor.close()
+    cache.close()
+
+
+def test_clipped_notes_fit_the_limit():
+    assert len(_clip("x" * 1000, 320)) == 320
+    assert _clip("short notes", 320) == "short notes"
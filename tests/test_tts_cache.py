@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tts_cache
+from tts_cache import TTSCache
+
+
+class FakeTTS:
+    """Writes one byte per character of the text instead of calling the gTTS service."""
+    calls = []
+
+    def __init__(self, text, lang, slow):
+        self.text = text
+
+    def save(self, path):
+        FakeTTS.calls.append(self.text)
+        with open(path, "wb") as f:
+            f.write(b"x" * len(self.text))
+
+
+@pytest.fixture
+def fake_tts(monkeypatch):
+    FakeTTS.calls = []
+    monkeypatch.setattr(tts_cache, "gtts", types.SimpleNamespace(gTTS=FakeTTS))
+    return FakeTTS
+
+
+def test_evicts_least_recently_used_phrases_over_the_byte_cap(tmp_path, fake_tts):
+    cache = TTSCache(tmp_path / "tts", max_bytes=100)
+    first, second, third = "a" * 40, "b" * 40, "c" * 40
+    cache.get_audio_file(first)
+    cache.get_audio_file(second)
+    # Using the first phrase again makes the second one the least recently used
+    cache.get_audio_file(first)
+    cache.get_audio_file(third)
+    assert list(cache._files) == [cache.cache_key(first), cache.cache_key(third)]
+    assert cache._total_bytes == 80 <= cache.max_bytes
+    assert not os.path.exists(cache._path(cache.cache_key(second)))
+    assert cache.stats["evictions"] == 1 and cache.stats["disk_hits"] == 1
+    assert fake_tts.calls == [first, second, third]
+
+
+def test_index_is_rebuilt_from_disk_in_lru_order(tmp_path, fake_tts):
+    cache = TTSCache(tmp_path / "tts", max_bytes=1000)
+    for phrase in ("one", "two", "three"):
+        cache.get_audio_file(phrase)
+    for age, phrase in enumerate(("two", "three", "one")):
+        os.utime(cache._path(cache.cache_key(phrase)), (1000 + age, 1000 + age))
+    reopened = TTSCache(tmp_path / "tts", max_bytes=1000)
+    assert list(reopened._files) == [cache.cache_key(p) for p in ("two", "three", "one")]
+    assert reopened._total_bytes == 11
+
+
+def test_key_locks_do_not_grow_with_phrases(tmp_path, fake_tts):
+    cache = TTSCache(tmp_path / "tts", lock_stripes=8)
+    threads = [threading.Thread(target=cache.get_audio_file, args=(f"phrase {i}",)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache._key_locks) == 8
+    assert len(cache._files) == 50 and len(fake_tts.calls) == 50
@@ -0,0 +1,163 @@
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from startup import lazy_import
+
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+VIEWER_SIZE = (480, 380)
+LIST_SIZE = (48, 48)
+
+
+def render_thumbnail(source_path, target_path, size):
+    """
+    Decode `source_path` at reduced size and write a JPEG thumbnail to
+    `target_path`. Runs in worker processes, so it only takes plain values.
+    """
+    with Image.open(source_path) as img:
+        # JPEG draft mode decodes straight to a 1/2..1/8 scale instead of the full image
+        img.draft("RGB", size)
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.thumbnail(size)
+        fd, tmp_path = tempfile.mkstemp(suffix=".jpg", dir=os.path.dirname(target_path), prefix=".partial_")
+        os.close(fd)
+        try:
+            img.save(tmp_path, "JPEG", quality=85)
+            os.replace(tmp_path, target_path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    return target_path
+
+
+class ThumbnailCache:
+    """
+    Persistent cache of reduced-size photos, keyed on (path, mtime, file size,
+    thumbnail size) so edited or replaced photos get fresh thumbnails.
+    Missing thumbnails are rendered in a background process pool by
+    prefetch(); get_file() renders synchronously when called off the GUI thread.
+    """
+
+    def __init__(self, cache_dir=".thumb_cache", workers=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = {}
+        self.stats = {"hits": 0, "rendered": 0, "errors": 0}
+
+    @staticmethod
+    def cache_key(source_path, size):
+        st = os.stat(source_path)
+        ident = f"{os.path.abspath(source_path)}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}"
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.jpg"
+
+    def cached_file(self, source_path, size):
+        """Return the thumbnail path if it has already been rendered, else None."""
+        path = self._path(self.cache_key(source_path, size))
+        if path.exists():
+            with self._lock:
+                self.stats["hits"] += 1
+            return str(path)
+        return None
+
+    def get_file(self, source_path, size):
+        """Return the thumbnail path, rendering it in this thread if needed."""
+        cached = self.cached_file(source_path, size)
+        if cached is not None:
+            return cached
+        target = self._path(self.cache_key(source_path, size))
+        render_thumbnail(str(source_path), str(target), size)
+        with self._lock:
+            self.stats["rendered"] += 1
+        return str(target)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers: forking a process with Tk and audio threads running is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def prefetch(self, source_paths, size, on_ready=None):
+        """
+        Render any missing thumbnails in the background. on_ready(source_path,
+        thumbnail_path) is called for every photo, immediately for cached ones
+        and from a pool thread for the rest (thumbnail_path is None on failure).
+        """
+        on_ready = on_ready or (lambda source_path, thumbnail_path: None)
+        for source_path in source_paths:
+            source_path = str(source_path)
+            try:
+                key = self.cache_key(source_path, size)
+            except OSError:
+                continue
+            target = self._path(key)
+            if target.exists():
+                on_ready(source_path, str(target))
+                continue
+            with self._lock:
+                future = self._pending.get(key)
+            if future is None:
+                future = self._get_pool().submit(render_thumbnail, source_path, str(target), size)
+                with self._lock:
+                    self._pending[key] = future
+                future.add_done_callback(lambda f, key=key: self._finished(key, f))
+            future.add_done_callback(
+                lambda f, source_path=source_path: on_ready(source_path, None if f.exception() else f.result())
+            )
+
+    def _finished(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.exception() is not None:
+                self.stats["errors"] += 1
+            else:
+                self.stats["rendered"] += 1
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+class PhotoImageLRU:
+    """
+    Small in-memory LRU of decoded Tk images keyed on thumbnail path.
+    `load(path)` builds the image; it must only be used on the Tk main thread.
+    """
+
+    def __init__(self, load, max_items=64):
+        self.load = load
+        self.max_items = max_items
+        self._images = OrderedDict()
+
+    def get(self, thumbnail_path):
+        image = self._images.get(thumbnail_path)
+        if image is not None:
+            self._images.move_to_end(thumbnail_path)
+            return image
+        image = self.load(thumbnail_path)
+        self._images[thumbnail_path] = image
+        while len(self._images) > self.max_items:
+            self._images.popitem(last=False)
+        return image
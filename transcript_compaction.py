@@ -0,0 +1,241 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from summary_cache import SummaryCache
+from telemetry import TELEMETRY
+
+log = logging.getLogger(__name__)
+
+COMPACTION_PROMPT_TEMPLATE = """You are keeping notes on what a person living with dementia has shared about one of their photos.
+
+Notes so far: {summary}
+
+What they said next: {chunk}
+
+Rewrite the notes to include what they said next. Keep every name, place, date and feeling, drop repetition and filler. Write plain sentences in the third person, at most {words} words."""
+
+
+def _size(responses):
+    return sum(len(r) for r in responses)
+
+
+def _clip(text, limit):
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 3].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;") + "..."
+
+
+class TranscriptCompactor:
+    """
+    Keeps long conversations summarizable. The patient's replies are folded
+    into a rolling set of notes in the background as the conversation goes
+    on, chunk by chunk, so what the final summary is written from (notes
+    plus the latest replies) stays the same size however long they talk.
+    One compactor is shared by all sessions; start() tracks a conversation
+    and state() hands its compacted transcript to the summary job.
+    """
+
+    def __init__(self, chat, model, cache, chunk_chars=1200, keep_chars=400, summary_words=120, workers=2):
+        self.chat = chat
+        self.model = model
+        self.cache = cache
+        self.chunk_chars = chunk_chars
+        self.keep_chars = keep_chars
+        self.summary_words = summary_words
+        # Notes are asked for in words; this bounds them even if the LLM ignores that
+        self.summary_chars = summary_words * 8
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compaction")
+        self._lock = threading.Lock()
+        self._live = {}
+
+    def compact(self, summary, chunk):
+        """Fold one chunk of replies into the notes; falls back to clipped extracts if the LLM fails."""
+        key = SummaryCache.make_key(
+            [summary] + list(chunk), COMPACTION_PROMPT_TEMPLATE, self.model, words=self.summary_words
+        )
+
+        def generate():
+            prompt = COMPACTION_PROMPT_TEMPLATE.format(
+                summary=summary or "nothing yet", chunk=" | ".join(chunk), words=self.summary_words
+            )
+            with TELEMETRY.span("llm", model=self.model, purpose="compaction"):
+                return self.chat(
+                    [{"role": "user", "content": prompt}], temperature=0.2, max_tokens=self.summary_words * 2
+                ).strip()
+
+        try:
+            notes = self.cache.get_or_compute(key, generate)
+        except Exception as e:
+            log.warning(f"⚠️ Transcript compaction failed ({e}), keeping extracts")
+            notes = " ".join([summary] + list(chunk)).strip()
+        return _clip(notes, self.summary_chars)
+
+    def start(self, conversation_id):
+        rolling = RollingTranscript(self)
+        with self._lock:
+            self._live[conversation_id] = rolling
+        return rolling
+
+    def discard(self, conversation_id):
+        with self._lock:
+            rolling = self._live.pop(conversation_id, None)
+        if rolling is not None:
+            rolling.close()
+
+    def state(self, conversation_id, responses, timeout=None):
+        """
+        (notes, latest replies) for a finished conversation: from its rolling
+        transcript when it ran in this process, otherwise (a summary replayed
+        after a restart) by folding `responses` chunk by chunk now.
+        """
+        with self._lock:
+            rolling = self._live.pop(conversation_id, None)
+        if rolling is None:
+            rolling = RollingTranscript(self, background=False)
+            for response in responses:
+                rolling.add(response)
+        return rolling.finish(timeout)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class RollingTranscript:
+    """
+    One conversation's replies as compacted notes plus a short tail of the
+    latest replies. When the tail passes chunk_chars, its oldest replies
+    (all but the last keep_chars) are folded into the notes on the
+    compactor's pool, one chunk at a time so each fold builds on the last.
+    """
+
+    def __init__(self, compactor, background=True):
+        self.compactor = compactor
+        self.background = background
+        self.summary = ""
+        self.tail = []
+        self.compacted = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._settled = threading.Condition(self._lock)
+        self._inflight = None
+
+    def add(self, response):
+        with self._lock:
+            self.tail.append(response)
+        self._pump()
+
+    def _next_chunk(self):
+        # Called with the lock held; only one fold runs at a time
+        if self._inflight is not None or _size(self.tail) <= self.compactor.chunk_chars:
+            return None
+        chunk = []
+        remaining = _size(self.tail)
+        while remaining > self.compactor.keep_chars and len(chunk) < len(self.tail) - 1:
+            chunk.append(self.tail[len(chunk)])
+            remaining -= len(chunk[-1])
+        if not chunk:
+            return None
+        self._inflight = chunk
+        return chunk
+
+    def _pump(self):
+        while not self.closed:
+            with self._lock:
+                chunk = self._next_chunk()
+            if chunk is None:
+                return
+            if self.background:
+                future = self.compactor._pool.submit(self.compactor.compact, self.summary, chunk)
+                future.add_done_callback(lambda f, chunk=chunk: self._done(chunk, f))
+                return
+            self._apply(chunk, self.compactor.compact(self.summary, chunk))
+
+    def _done(self, chunk, future):
+        if future.cancelled():
+            with self._lock:
+                self._inflight = None
+                self._settled.notify_all()
+            return
+        self._apply(chunk, future.result())
+        # Replies that arrived during the fold may already fill the next chunk
+        self._pump()
+
+    def _apply(self, chunk, notes):
+        with self._lock:
+            self.summary = notes
+            del self.tail[:len(chunk)]
+            self.compacted += len(chunk)
+            self._inflight = None
+            self._settled.notify_all()
+
+    def finish(self, timeout=None):
+        """Wait for the background fold, then catch up so the tail is back within chunk_chars; returns (notes, tail)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._settled:
+            while self._inflight is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._settled.wait(remaining)
+            # The patient may have outpaced the background folds; any catching up happens here
+            self.background = False
+        self._pump()
+        with self._lock:
+            return self.summary, list(self.tail)
+
+    def close(self):
+        self.closed = True
+
+
+def _stub_reply(payload):
+    # Stand-in for the LLM: keeps the gist of the old notes and the start of the new chunk
+    prompt = payload["messages"][-1]["content"]
+    if "Notes so far: " not in prompt:
+        return "You shared lovely memories of the lake."
+    notes = prompt.split("Notes so far: ", 1)[1].split("\n", 1)[0].split()
+    chunk = prompt.split("What they said next: ", 1)[1].split("\n", 1)[0].split()
+    return " ".join(notes[-80:] + chunk[:20]) + "."
+
+
+def benchmark(lengths=(10, 100, 1000, 3000), llm_delay=0.05, gap=0.005):
+    """Replay conversations of growing length against a stub LLM; report final prompt size and summary latency."""
+    import os
+    import tempfile
+
+    from llm_client import LLMClient, StubLLMServer
+
+    replies = [
+        "We went to the lake every summer and my father rowed the little green boat",
+        "My sister Anna was scared of the fish but she loved the ice cream afterwards",
+        "The house smelled of pine and my mother baked apple cake on Sundays",
+    ]
+    with StubLLMServer(reply=_stub_reply, delay=llm_delay) as stub:
+        client = LLMClient("stub", stub.url, max_retries=0)
+        cache = SummaryCache(os.path.join(tempfile.mkdtemp(prefix="meemo_compaction_"), "summary_cache.db"))
+        compactor = TranscriptCompactor(client.chat, "stub", cache)
+        for length in lengths:
+            rolling = compactor.start(f"conversation-{length}")
+            largest = 0
+            for i in range(length):
+                rolling.add(f"{replies[i % len(replies)]} ({i})")
+                with rolling._lock:
+                    largest = max(largest, len(rolling.summary) + _size(rolling.tail))
+                time.sleep(gap)
+            start = time.perf_counter()
+            notes, tail = compactor.state(f"conversation-{length}", [])
+            client.chat([{"role": "user", "content": notes + " | ".join(tail)}])
+            final_ms = (time.perf_counter() - start) * 1000
+            naive = sum(len(replies[i % len(replies)]) + 8 for i in range(length))
+            print(f"{length:5d} replies: final prompt {len(notes) + _size(tail):5d} chars (all replies {naive:7d}), "
+                  f"working set peak {largest:5d} chars, {rolling.compacted:4d} folded, "
+                  f"final summary {final_ms:6.1f} ms")
+        compactor.close()
+        client.close()
+        cache.close()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from startup import lazy_import
+
+log = logging.getLogger(__name__)
+
+gtts = lazy_import("gtts")
+pygame = lazy_import("pygame")
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech, keyed on (text, lang, slow).
+    Audio files live on disk under a size-bounded LRU policy; the most requested
+    phrases are also kept decoded in memory as pygame Sound objects.
+    """
+
+    def __init__(self, cache_dir=".tts_cache", max_bytes=200 * 1024 * 1024,
+                 max_sounds=32, hot_threshold=2, lock_stripes=64):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_sounds = max_sounds
+        self.hot_threshold = hot_threshold
+        self._lock = threading.Lock()
+        # Synthesis of a phrase is serialized by a lock striped on its key, so the locks never grow with phrases
+        self._key_locks = [threading.Lock() for _ in range(lock_stripes)]
+        self._files = OrderedDict()
+        self._sounds = OrderedDict()
+        self._hits = {}
+        self._total_bytes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".mp3") and not entry.name.startswith(".partial_"):
+                st = entry.stat()
+                entries.append((st.st_mtime, entry.name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def cache_key(text, lang='en', slow=False):
+        return hashlib.sha256(f"{lang}|{int(slow)}|{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.mp3"
+
+    def _key_lock(self, key):
+        return self._key_locks[int(key[:8], 16) % len(self._key_locks)]
+
+    def _touch(self, key):
+        self._files.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._files) > 1:
+            key, size = self._files.popitem(last=False)
+            self._total_bytes -= size
+            self._sounds.pop(key, None)
+            self._hits.pop(key, None)
+            self.stats["evictions"] += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def get_audio_file(self, text, lang='en', slow=False):
+        key = self.cache_key(text, lang, slow)
+        with self._key_lock(key):
+            with self._lock:
+                if key in self._files and self._path(key).exists():
+                    self.stats["disk_hits"] += 1
+                    self._touch(key)
+                    return str(self._path(key))
+                self.stats["misses"] += 1
+            fd, tmp_path = tempfile.mkstemp(suffix=".mp3", dir=self.cache_dir, prefix=".partial_")
+            os.close(fd)
+            try:
+                gtts.gTTS(text=text, lang=lang, slow=slow).save(tmp_path)
+                os.replace(tmp_path, self._path(key))
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            with self._lock:
+                size = self._path(key).stat().st_size
+                self._total_bytes += size - self._files.get(key, 0)
+                self._files[key] = size
+                self._files.move_to_end(key)
+                self._evict()
+            return str(self._path(key))
+
+    def get_sound(self, text, lang='en', slow=False):
+        """
+        Return a decoded Sound for hot phrases, or None when the phrase should be
+        streamed from its cached file with pygame.mixer.music instead.
+        """
+        key = self.cache_key(text, lang, slow)
+        with self._lock:
+            sound = self._sounds.get(key)
+            if sound is not None:
+                self._sounds.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return sound
+            self._hits[key] = self._hits.get(key, 0) + 1
+            promote = self._hits[key] >= self.hot_threshold
+        if not promote:
+            return None
+        path = self.get_audio_file(text, lang, slow)
+        try:
+            sound = pygame.mixer.Sound(path)
+        except Exception:
+            return None
+        with self._lock:
+            self._sounds[key] = sound
+            while len(self._sounds) > self.max_sounds:
+                self._sounds.popitem(last=False)
+        return sound
+
+    def _preload_sound(self, key, path):
+        try:
+            sound = pygame.mixer.Sound(path)
+        except Exception:
+            return
+        with self._lock:
+            self._sounds[key] = sound
+            self._hits[key] = max(self._hits.get(key, 0), self.hot_threshold)
+            while len(self._sounds) > self.max_sounds:
+                self._sounds.popitem(last=False)
+
+    def prepare(self, phrases, lang='en', slow=False, preload_sounds=True):
+        """Synthesize (and optionally decode) phrases in this thread so they play without delay; returns how many are ready."""
+        rendered = 0
+        for phrase in phrases:
+            try:
+                path = self.get_audio_file(phrase, lang, slow)
+                rendered += 1
+            except Exception as e:
+                log.warning(f"⚠️ TTS warm-up failed for '{phrase[:30]}...': {e}")
+                continue
+            if preload_sounds:
+                self._preload_sound(self.cache_key(phrase, lang, slow), path)
+        return rendered
+
+    def warm_up(self, phrases, lang='en', slow=False, preload_sounds=True):
+        def render():
+            rendered = self.prepare(phrases, lang, slow, preload_sounds)
+            log.info(f"🔊 TTS cache warmed: {rendered}/{len(phrases)} prompts ready")
+
+        thread = threading.Thread(target=render, daemon=True)
+        thread.start()
+        return thread